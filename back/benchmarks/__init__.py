@@ -0,0 +1 @@
+"""Бенчмарки фида и ранжирования (не входят в приложение)."""
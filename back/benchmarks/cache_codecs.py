@@ -0,0 +1,93 @@
+"""
+Микробенчмарк кодеков значений кеша (src.services.cache_codec).
+
+Для каждого сочетания сериализатора и сжатия выводит размер значения и
+время кодирования и декодирования на двух типичных значениях: ранжировании
+пула (id и total) и странице фида с полными профилями:
+
+    python -m benchmarks.cache_codecs --candidates 5000 --page-size 50 --repeat 200
+"""
+import argparse
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.dataset import make_profiles
+from benchmarks.report import format_table
+from src.services.cache_codec import COMPRESSORS, SERIALIZERS, CacheCodec
+
+
+def make_payloads(candidates: int, page_size: int, seed: int) -> Dict[str, Any]:
+    profiles = make_profiles(candidates, seed=seed)
+    ranking = {"ids": [profile.id for profile in profiles], "total": len(profiles)}
+    page = {
+        "items": [
+            {
+                "id": profile.id,
+                "name": f"Профиль {profile.id}",
+                "description": profile.description,
+                "university": profile.university,
+                "title": "Ментор",
+                "avatar_url": f"http://localhost:8000/img/{profile.id}.png",
+                "admission_type": profile.admission_type,
+            }
+            for profile in profiles[:page_size]
+        ],
+        "total": len(profiles),
+        "page": 1,
+        "size": page_size,
+        "pages": (len(profiles) + page_size - 1) // page_size,
+    }
+    return {"ranking": ranking, "page": page}
+
+
+def timed(func: Callable[[], Any], repeat: int) -> float:
+    """Среднее время одного вызова в микросекундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return 1e6 * (time.perf_counter() - started) / repeat
+
+
+def evaluate(codec: CacheCodec, payloads: Dict[str, Any], repeat: int) -> List[Dict[str, object]]:
+    rows = []
+    for name, value in payloads.items():
+        encoded = codec.encode(value)
+        assert codec.decode(encoded) == value
+        rows.append({
+            "codec": codec.name,
+            "payload": name,
+            "bytes": len(encoded),
+            "encode_us": timed(lambda: codec.encode(value), repeat),
+            "decode_us": timed(lambda: codec.decode(encoded), repeat),
+        })
+    return rows
+
+
+def available_codecs(threshold: int) -> List[CacheCodec]:
+    codecs = []
+    for serializer, (_, serializer_impl) in SERIALIZERS.items():
+        for compression, (_, compressor_impl) in COMPRESSORS.items():
+            if serializer_impl is not None and compressor_impl is not None:
+                codecs.append(CacheCodec(serializer, compression, threshold))
+    return codecs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение кодеков значений кеша")
+    parser.add_argument("--candidates", type=int, default=5000, help="Размер ранжируемого пула")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--threshold", type=int, default=1024, help="Порог сжатия, байт")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    payloads = make_payloads(args.candidates, args.page_size, args.seed)
+    rows = []
+    for codec in available_codecs(args.threshold):
+        rows += evaluate(codec, payloads, args.repeat)
+    rows.sort(key=lambda row: (row["payload"], row["bytes"]))
+    print(format_table(rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Сравнение ранжировщиков фида: LLM, локального и гибридного.
+
+Ранжировщики вызываются напрямую на синтетических кандидатах, LLM — через
+фейковый сервер из benchmarks.fake_llm. Для каждого выводятся задержка,
+число вызовов LLM и байт промпта на ранжирование и overlap@k с эталонным
+порядком (тот же порядок, что возвращает «идеальная» фейковая модель):
+
+    python -m benchmarks.compare_rankers --candidates 300 --queries 20 --k 10 --latency 1.0
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from benchmarks.dataset import make_profiles, overlap_at_k, reference_order
+from benchmarks.fake_llm import FakeLLMServer, add_config_arguments, config_from_args
+from benchmarks.report import format_table, latency_summary
+from src.services.interest_rating import (
+    HybridInterestRatingService,
+    InterestRatingService,
+    LocalInterestRatingService,
+)
+
+
+async def evaluate(name: str, ranker, candidates: List[Dict], queries: List[str], k: int, fake: FakeLLMServer) -> Dict:
+    calls_before = fake.stats.calls
+    prompt_bytes_before = fake.stats.prompt_bytes
+    latencies = []
+    overlaps = []
+    for query in queries:
+        started = time.perf_counter()
+        ranked = await ranker.get_ranked_mentors(candidates, query)
+        latencies.append(time.perf_counter() - started)
+        overlaps.append(overlap_at_k(ranked, reference_order(query, candidates), k))
+
+    summary = latency_summary(latencies)
+    return {
+        "ranker": name,
+        "p50_ms": summary["p50_ms"],
+        "p95_ms": summary["p95_ms"],
+        "p99_ms": summary["p99_ms"],
+        "llm_calls": (fake.stats.calls - calls_before) / len(queries),
+        "prompt_bytes": (fake.stats.prompt_bytes - prompt_bytes_before) / len(queries),
+        f"overlap@{k}": sum(overlaps) / len(overlaps),
+    }
+
+
+async def run(args: argparse.Namespace, fake: FakeLLMServer) -> None:
+    candidates = [profile.as_candidate() for profile in make_profiles(args.candidates, seed=args.seed)]
+    queries = [profile.description for profile in make_profiles(args.queries, seed=args.seed + 1)]
+
+    llm = InterestRatingService()
+    llm.api_url = fake.url
+    llm.deadline = args.deadline
+    local = LocalInterestRatingService()
+    rankers = {
+        "llm": llm,
+        "local": local,
+        "local-lexical": LocalInterestRatingService(scorer="lexical"),
+        "hybrid": HybridInterestRatingService(local, llm, top_k=args.top_k),
+    }
+    names = args.rankers or list(rankers)
+
+    rows = []
+    try:
+        for name in names:
+            rows.append(await evaluate(name, rankers[name], candidates, queries, args.k, fake))
+    finally:
+        await llm.aclose()
+    print(format_table(rows))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Сравнение ранжировщиков фида")
+    parser.add_argument("--candidates", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10, help="Глубина overlap@k")
+    parser.add_argument("--top-k", type=int, default=50, help="Кандидатов, переранжируемых LLM в гибриде")
+    parser.add_argument("--deadline", type=float, default=30.0, help="Дедлайн LLM-ранжирования, секунды")
+    parser.add_argument("--rankers", nargs="*", choices=["llm", "local", "local-lexical", "hybrid"])
+    parser.add_argument("--fake-llm-port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    with FakeLLMServer(config_from_args(args), port=args.fake_llm_port) as fake:
+        asyncio.run(run(args, fake))
+
+
+if __name__ == "__main__":
+    main()
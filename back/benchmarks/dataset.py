@@ -0,0 +1,114 @@
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# Словари тем: описания профилей собираются из слов своей темы
+TOPICS: Dict[str, List[str]] = {
+    "programming": ["программирование", "алгоритмы", "python", "структуры", "данных", "олимпиадное", "код", "backend"],
+    "math": ["математика", "геометрия", "алгебра", "задачи", "профильная", "неравенства", "производные", "теория"],
+    "physics": ["физика", "механика", "электричество", "оптика", "термодинамика", "эксперименты", "кинематика", "законы"],
+    "chemistry": ["химия", "органическая", "реакции", "вещества", "лаборатория", "растворы", "молекулы", "элементы"],
+    "biology": ["биология", "генетика", "клетки", "анатомия", "медицина", "экология", "ботаника", "эволюция"],
+    "literature": ["литература", "сочинение", "русский", "язык", "поэзия", "роман", "анализ", "текста"],
+    "history": ["история", "обществознание", "право", "даты", "реформы", "войны", "государство", "эпоха"],
+    "economics": ["экономика", "финансы", "рынок", "спрос", "предложение", "бизнес", "статистика", "менеджмент"],
+}
+
+FILLER = ["готовлю", "к", "поступлению", "помогу", "разобраться", "интересуюсь", "люблю", "занимаюсь", "хочу", "изучать"]
+
+UNIVERSITIES = ["МГУ", "ВШЭ", "МФТИ", "СПбГУ", "ИТМО", "МИФИ"]
+
+ADMISSION_TYPES = ["ЕГЭ", "олимпиады"]
+
+_WORD_TOPIC = {word: topic for topic, words in TOPICS.items() for word in words}
+_token_re = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class Profile:
+    """Синтетический профиль ментора или пользователя."""
+
+    id: int
+    topic: str
+    description: str
+    university: str
+    admission_type: str
+
+    def as_candidate(self) -> Dict[str, object]:
+        """Словарь кандидата в формате feed_service."""
+        return {
+            "id": self.id,
+            "description": self.description,
+            "university": self.university,
+            "target_universities": [self.university],
+            "admission_type": self.admission_type,
+        }
+
+
+def make_description(rng: random.Random, topic: str, words: int = 6) -> str:
+    """Описание из слов темы с вкраплениями общих слов (10-300 символов, как в схемах)."""
+    parts = rng.sample(TOPICS[topic], k=min(words, len(TOPICS[topic])))
+    for _ in range(words // 2):
+        parts.insert(rng.randrange(len(parts) + 1), rng.choice(FILLER))
+    return " ".join(parts).capitalize()[:300]
+
+
+def make_profiles(count: int, seed: int = 0, start_id: int = 1) -> List[Profile]:
+    """Детерминированно генерирует count профилей со случайными темами."""
+    rng = random.Random(seed)
+    topics = sorted(TOPICS)
+    profiles = []
+    for i in range(count):
+        topic = rng.choice(topics)
+        profiles.append(
+            Profile(
+                id=start_id + i,
+                topic=topic,
+                description=make_description(rng, topic),
+                university=rng.choice(UNIVERSITIES),
+                admission_type=rng.choice(ADMISSION_TYPES),
+            )
+        )
+    return profiles
+
+
+def infer_topic(text: Optional[str]) -> Optional[str]:
+    """Тема текста по большинству слов из словарей тем."""
+    topics = Counter(
+        _WORD_TOPIC[token] for token in _token_re.findall((text or "").lower()) if token in _WORD_TOPIC
+    )
+    return topics.most_common(1)[0][0] if topics else None
+
+
+def reference_order(query: str, candidates: Sequence[Dict[str, object]]) -> List[object]:
+    """
+    Эталонный порядок кандидатов для запроса.
+
+    Сначала кандидаты той же темы, что и запрос, внутри — по числу общих слов
+    темы; при равенстве сохраняется исходный порядок. Так же ранжирует
+    фейковый LLM-сервер, поэтому эталон соответствует «идеальной» модели.
+    """
+    query_topic = infer_topic(query)
+    query_words = set(_token_re.findall(query.lower())) & set(_WORD_TOPIC)
+
+    def relevance(candidate: Dict[str, object]) -> tuple:
+        text = str(candidate.get("description") or "")
+        words = set(_token_re.findall(text.lower()))
+        same_topic = query_topic is not None and infer_topic(text) == query_topic
+        return (same_topic, len(words & query_words))
+
+    return [
+        candidate["id"]
+        for candidate in sorted(candidates, key=relevance, reverse=True)
+    ]
+
+
+def overlap_at_k(ranked: Sequence[object], reference: Sequence[object], k: int) -> float:
+    """Доля общих элементов в первых k позициях двух ранжирований."""
+    if k <= 0:
+        return 0.0
+    head = {str(item) for item in ranked[:k]}
+    reference_head = {str(item) for item in reference[:k]}
+    return len(head & reference_head) / min(k, max(len(reference_head), 1))
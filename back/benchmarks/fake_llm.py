@@ -0,0 +1,230 @@
+"""
+Локальный OpenAI-совместимый сервер для бенчмарков ранжирования.
+
+Принимает те же запросы, что и InterestRatingService, и ранжирует кандидатов
+эталонным порядком из benchmarks.dataset с настраиваемой задержкой и формой
+ответа. Приложение направляется на него через LLM_API_URL:
+
+    python -m benchmarks.fake_llm --port 8089 --latency 1.5 --shape fenced
+    LLM_API_URL=http://127.0.0.1:8089/v1/chat/completions uvicorn src.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from benchmarks.dataset import reference_order
+
+SHAPES = ("json", "fenced", "text", "invalid", "truncated", "error")
+
+_item_re = re.compile(r"^ID: (\S+), Описание: (.*)$", re.MULTILINE)
+_query_re = re.compile(r"Описание (?:пользователя|ментора):\n(.*?)\n\nОписания", re.DOTALL)
+
+
+@dataclass
+class FakeLLMConfig:
+    """Поведение фейкового сервера."""
+
+    latency: float = 0.5  # секунды до первого байта ответа
+    jitter: float = 0.0  # случайная добавка к задержке, секунды
+    shape: str = "fenced"  # одна из SHAPES
+    noise: float = 0.0  # доля позиций, переставленных случайно
+    stream_chunk: int = 8  # символов в одном событии потокового ответа
+    stream_delay: float = 0.01  # пауза между событиями, секунды
+    seed: int = 0
+
+
+@dataclass
+class FakeLLMStats:
+    """Счетчики запросов к фейковому серверу."""
+
+    calls: int = 0
+    streamed_calls: int = 0
+    prompt_bytes: int = 0
+    completion_bytes: int = 0
+    items_ranked: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def snapshot(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("latencies")
+        return data
+
+
+def parse_prompt(prompt: str) -> Tuple[str, List[Dict[str, str]]]:
+    """Извлекает описание зрителя и кандидатов из промпта InterestRatingService."""
+    query = _query_re.search(prompt)
+    items = [{"id": item_id, "description": text} for item_id, text in _item_re.findall(prompt)]
+    return (query.group(1).strip() if query else ""), items
+
+
+def render_completion(ids: List[Any], shape: str) -> str:
+    """Текст ответа модели заданной формы."""
+    array = json.dumps(ids)
+    if shape == "json":
+        return array
+    if shape == "text":
+        return f"Вот отсортированный список: {array}"
+    if shape == "invalid":
+        return "К сожалению, я не могу отсортировать этот список."
+    if shape == "truncated":
+        return "```json\n" + array[: max(len(array) // 2, 1)]
+    return f"```json\n{array}\n```"
+
+
+def create_app(config: Optional[FakeLLMConfig] = None) -> FastAPI:
+    """Создает приложение фейкового сервера; статистика доступна в app.state.stats."""
+    config = config or FakeLLMConfig()
+    rng = random.Random(config.seed)
+    app = FastAPI()
+    app.state.config = config
+    app.state.stats = FakeLLMStats()
+
+    def rank(prompt: str) -> List[Any]:
+        query, items = parse_prompt(prompt)
+        ranked = reference_order(query, items)
+        for i in range(len(ranked)):
+            if rng.random() < config.noise:
+                j = rng.randrange(len(ranked))
+                ranked[i], ranked[j] = ranked[j], ranked[i]
+        app.state.stats.items_ranked += len(items)
+        return [int(item_id) if item_id.isdigit() else item_id for item_id in ranked]
+
+    async def completions(request: Request):
+        started = time.perf_counter()
+        body = await request.body()
+        payload = json.loads(body)
+        stats = app.state.stats
+        stats.calls += 1
+        stats.prompt_bytes += sum(
+            len(message.get("content", "").encode()) for message in payload.get("messages", [])
+        )
+
+        await asyncio.sleep(config.latency + rng.random() * config.jitter)
+        if config.shape == "error":
+            stats.latencies.append(time.perf_counter() - started)
+            return JSONResponse({"error": {"message": "fake upstream error"}}, status_code=500)
+
+        prompt = payload["messages"][-1]["content"]
+        content = render_completion(rank(prompt), config.shape)
+        stats.completion_bytes += len(content.encode())
+
+        if not payload.get("stream"):
+            stats.latencies.append(time.perf_counter() - started)
+            return JSONResponse(
+                {
+                    "id": "fake",
+                    "object": "chat.completion",
+                    "model": payload.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                }
+            )
+
+        stats.streamed_calls += 1
+
+        async def events():
+            for start in range(0, len(content), config.stream_chunk):
+                delta = {"choices": [{"index": 0, "delta": {"content": content[start:start + config.stream_chunk]}}]}
+                yield f"data: {json.dumps(delta, ensure_ascii=False)}\n\n"
+                await asyncio.sleep(config.stream_delay)
+            yield "data: [DONE]\n\n"
+            stats.latencies.append(time.perf_counter() - started)
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    # Путь прод-эндпоинта и стандартный путь OpenAI
+    app.add_api_route("/api/chat/completions", completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def get_stats():
+        return app.state.stats.snapshot()
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        app.state.stats = FakeLLMStats()
+        return {"ok": True}
+
+    return app
+
+
+class FakeLLMServer:
+    """Фейковый сервер в фоновом потоке (для запуска из бенчмарков)."""
+
+    def __init__(self, config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 8089):
+        self.app = create_app(config)
+        self.host = host
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1/chat/completions"
+
+    @property
+    def stats(self) -> FakeLLMStats:
+        return self.app.state.stats
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Общие параметры фейкового сервера для CLI бенчмарков."""
+    parser.add_argument("--latency", type=float, default=0.5, help="Задержка ответа LLM, секунды")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Случайная добавка к задержке, секунды")
+    parser.add_argument("--shape", choices=SHAPES, default="fenced", help="Форма ответа модели")
+    parser.add_argument("--noise", type=float, default=0.0, help="Доля случайно переставленных позиций")
+    parser.add_argument("--stream-chunk", type=int, default=8, help="Символов в событии потокового ответа")
+    parser.add_argument("--stream-delay", type=float, default=0.01, help="Пауза между событиями, секунды")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeLLMConfig:
+    return FakeLLMConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        shape=args.shape,
+        noise=args.noise,
+        stream_chunk=args.stream_chunk,
+        stream_delay=args.stream_delay,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-совместимый фейковый LLM-сервер")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
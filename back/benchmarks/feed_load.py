@@ -0,0 +1,178 @@
+"""
+Нагрузочный бенчмарк /feed/mentors и /feed/users.
+
+Регистрирует синтетических менторов и пользователей через API, затем
+запрашивает фиды от их имени с заданной конкурентностью и выводит
+p50/p95/p99 задержки, число вызовов LLM и байт промпта на запрос и долю
+попаданий в кеш ранжирований (по метрике feed_ranking_executions_total).
+
+Приложение должно быть запущено с LLM_API_URL, указывающим на фейковый
+сервер. С флагом --start-fake-llm сервер поднимается в этом же процессе:
+
+    python -m benchmarks.feed_load --start-fake-llm --latency 1.5 \\
+        --base-url http://localhost:8000 --mentors 200 --users 200 --requests 500
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.dataset import make_profiles
+from benchmarks.fake_llm import FakeLLMServer, add_config_arguments, config_from_args
+from benchmarks.report import format_table, latency_summary, parse_prometheus
+
+RANKING_EXECUTIONS = "feed_ranking_executions_total"
+
+
+async def seed(
+    client: httpx.AsyncClient, role: str, count: int, seed_value: int
+) -> List[str]:
+    """
+    Регистрирует count профилей роли (users или mentors) и заполняет описания.
+
+    Returns:
+        Токены доступа созданных профилей
+    """
+    tokens = []
+    prefix = uuid.uuid4().hex[:6]
+    for profile in make_profiles(count, seed=seed_value):
+        response = await client.post(f"/auth/{role}/signup", json={"name": f"bench{prefix}{profile.id}"[:20]})
+        response.raise_for_status()
+        token = response.json()["access_token"]
+        update = {"description": profile.description, "admission_type": profile.admission_type}
+        if role == "mentors":
+            update["university"] = profile.university
+        else:
+            update["target_universities"] = [profile.university]
+        response = await client.patch(
+            f"/auth/{role}/me", json=update, headers={"Authorization": f"Bearer {token}"}
+        )
+        response.raise_for_status()
+        tokens.append(token)
+    return tokens
+
+
+async def read_metrics(client: httpx.AsyncClient) -> Dict[str, float]:
+    try:
+        response = await client.get("/metrics")
+        return parse_prometheus(response.text)
+    except httpx.HTTPError:
+        return {}
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    viewers: List[Tuple[str, str]],
+    requests: int,
+    concurrency: int,
+    max_page: int,
+    page_size: int,
+    rng: random.Random,
+) -> Tuple[Dict[str, List[float]], int]:
+    """
+    Выполняет requests запросов к фидам не более чем concurrency одновременно.
+
+    Returns:
+        Задержки по эндпоинтам и число ошибочных ответов
+    """
+    plan = [(rng.choice(viewers), rng.randint(1, max_page)) for _ in range(requests)]
+    latencies: Dict[str, List[float]] = {"/feed/mentors": [], "/feed/users": []}
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(viewer: Tuple[str, str], page: int) -> None:
+        nonlocal errors
+        path, token = viewer
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.get(
+                    path,
+                    params={"page": page, "size": page_size},
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                response.raise_for_status()
+            except httpx.HTTPError:
+                errors += 1
+                return
+            latencies[path].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(viewer, page) for viewer, page in plan))
+    return latencies, errors
+
+
+async def run(args: argparse.Namespace, fake: Optional[FakeLLMServer]) -> None:
+    rng = random.Random(args.seed)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        print(f"Seeding {args.mentors} mentors and {args.users} users...")
+        mentor_tokens = await seed(client, "mentors", args.mentors, args.seed)
+        user_tokens = await seed(client, "users", args.users, args.seed + 1)
+
+        viewers = [("/feed/mentors", token) for token in rng.sample(user_tokens, min(args.viewers, len(user_tokens)))]
+        viewers += [("/feed/users", token) for token in rng.sample(mentor_tokens, min(args.viewers, len(mentor_tokens)))]
+
+        # Даем фоновому пересчету после регистрации завершиться
+        await asyncio.sleep(args.settle)
+        metrics_before = await read_metrics(client)
+        if fake is not None:
+            fake.app.state.stats = type(fake.stats)()
+
+        started = time.perf_counter()
+        latencies, errors = await drive(
+            client, viewers, args.requests, args.concurrency, args.max_page, args.size, rng
+        )
+        elapsed = time.perf_counter() - started
+        metrics_after = await read_metrics(client)
+
+    rows = []
+    for path, values in latencies.items():
+        rows.append({"endpoint": path, **latency_summary(values)})
+    print(format_table(rows))
+
+    completed = sum(len(values) for values in latencies.values())
+    print(f"\nrequests: {completed} ok, {errors} failed, {completed / elapsed:.1f} req/s")
+
+    if RANKING_EXECUTIONS in metrics_after:
+        executions = metrics_after[RANKING_EXECUTIONS] - metrics_before.get(RANKING_EXECUTIONS, 0.0)
+        hit_ratio = 1 - executions / completed if completed else 0.0
+        print(f"ranking cache hit ratio: {hit_ratio:.2%} ({executions:.0f} rankings computed)")
+
+    if fake is not None and completed:
+        stats = fake.stats
+        print(f"LLM calls per request: {stats.calls / completed:.3f}")
+        print(f"prompt bytes per request: {stats.prompt_bytes / completed:.0f}")
+        if stats.calls:
+            print(f"prompt bytes per LLM call: {stats.prompt_bytes / stats.calls:.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный бенчмарк фидов")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--mentors", type=int, default=100)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--viewers", type=int, default=20, help="Зрителей каждой роли, от имени которых идут запросы")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--max-page", type=int, default=3)
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--settle", type=float, default=2.0, help="Пауза после наполнения, секунды")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--start-fake-llm", action="store_true", help="Запустить фейковый LLM-сервер в этом процессе")
+    parser.add_argument("--fake-llm-port", type=int, default=8089)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    if not args.start_fake_llm:
+        asyncio.run(run(args, None))
+        return
+    with FakeLLMServer(config_from_args(args), port=args.fake_llm_port) as fake:
+        print(f"Fake LLM at {fake.url}")
+        asyncio.run(run(args, fake))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import math
+import re
+from typing import Dict, List, Sequence
+
+_metric_re = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{[^}]*\})?)\s+(\S+)$")
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """Перцентиль p (0-100) методом ближайшего ранга."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(p / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99 и среднее в миллисекундах."""
+    return {
+        "count": len(latencies),
+        "mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 50),
+        "p95_ms": 1000 * percentile(latencies, 95),
+        "p99_ms": 1000 * percentile(latencies, 99),
+    }
+
+
+def parse_prometheus(text: str) -> Dict[str, float]:
+    """Разбирает текстовый формат Prometheus в словарь «имя{метки}» -> значение."""
+    metrics = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        match = _metric_re.match(line.strip())
+        if match:
+            try:
+                metrics[match.group(1)] = float(match.group(2))
+            except ValueError:
+                continue
+    return metrics
+
+
+def format_table(rows: List[Dict[str, object]]) -> str:
+    """Выравнивает строки отчета в текстовую таблицу."""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+
+    def cell(value: object) -> str:
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    widths = {column: max(len(column), *(len(cell(row[column])) for row in rows)) for column in columns}
+    lines = ["  ".join(column.ljust(widths[column]) for column in columns)]
+    lines.append("  ".join("-" * widths[column] for column in columns))
+    for row in rows:
+        lines.append("  ".join(cell(row[column]).ljust(widths[column]) for column in columns))
+    return "\n".join(lines)
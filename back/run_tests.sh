@@ -6,6 +6,23 @@ pytest tests/unit/services/test_user_auth_service_mock.py \
        tests/unit/repository/test_user_repository_mock.py \
        tests/unit/routers/test_user_auth_router_mock.py \
        tests/unit/security/test_auth.py \
+       tests/unit/services/test_interest_rating.py \
+       tests/unit/routers/test_feed_router.py \
+       tests/unit/services/test_redis_service.py \
+       tests/unit/services/test_feed_service.py \
+       tests/unit/services/test_singleflight.py \
+       tests/unit/services/test_circuit_breaker.py \
+       tests/unit/services/test_feed_worker.py \
+       tests/unit/services/test_local_cache.py \
+       tests/unit/services/test_cache_codec.py \
+       tests/unit/repository/test_feed_ranking_repository.py \
+       tests/unit/repository/test_university_repository.py \
+       tests/unit/services/test_university_index.py \
+       tests/unit/services/test_principal_cache.py \
+       tests/unit/repository/test_search.py \
+       tests/unit/routers/test_search_router.py \
+       tests/unit/benchmarks/test_fake_llm.py \
+       tests/unit/security/test_password_hasher.py \
        --cov=src --cov-report=term --cov-report=html
 
 # Open coverage report if requested
@@ -6,6 +6,10 @@ SECRET_KEY = os.environ.get("JWT_SECRET_KEY", "your-secret-key-for-development")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Password hashing runs in a thread pool so bcrypt does not block the event loop
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', '12'))  # hashes with another cost are rehashed on login
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', '2'))  # bcrypt calls running at once per worker
+
 # Postgres
 POSTGRES_USER = os.environ.get('POSTGRES_USER', 'postgres')
 POSTGRES_PASSWORD = os.environ.get('POSTGRES_PASSWORD', 'postgres')
@@ -16,12 +20,80 @@ CONNECTION_STRING = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{
 
 # GEMINI API
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', 'sk-9c33e1ecb15640c8b060fe63eeaea71c')
+LLM_API_URL = os.environ.get('LLM_API_URL', 'https://chat.batsura.ru/api/chat/completions')  # any OpenAI-compatible endpoint
+LLM_MODEL = os.environ.get('LLM_MODEL', 'qodo/gemini-2.0-flash')
 
 # Redis
 REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
 REDIS_PORT = os.environ.get('REDIS_PORT', '6379')
 REDIS_CACHE_TTL = int(os.environ.get('REDIS_CACHE_TTL', '3600'))  # Time in seconds (1 hour default)
 
+# Cache value encoding: json | orjson | msgpack, compression: none | zlib | lz4 | zstd
+# (msgpack and zstd need the optional msgpack / zstandard packages)
+CACHE_SERIALIZER = os.environ.get('CACHE_SERIALIZER', 'orjson')
+CACHE_COMPRESSION = os.environ.get('CACHE_COMPRESSION', 'lz4')
+CACHE_COMPRESSION_THRESHOLD = int(os.environ.get('CACHE_COMPRESSION_THRESHOLD', '1024'))  # bytes
+
+# In-process (L1) cache in front of Redis, per uvicorn worker
+LOCAL_CACHE_ENABLED = os.environ.get('LOCAL_CACHE_ENABLED', 'true').lower() == 'true'
+LOCAL_CACHE_MAX_ENTRIES = int(os.environ.get('LOCAL_CACHE_MAX_ENTRIES', '1024'))
+LOCAL_CACHE_TTL = float(os.environ.get('LOCAL_CACHE_TTL', '30'))  # seconds
+
+# Authenticated principals (slim profile snapshots) cached in L1 and Redis
+PRINCIPAL_CACHE_ENABLED = os.environ.get('PRINCIPAL_CACHE_ENABLED', 'true').lower() == 'true'
+PRINCIPAL_CACHE_TTL = int(os.environ.get('PRINCIPAL_CACHE_TTL', '300'))  # seconds in Redis; L1 keeps at most LOCAL_CACHE_TTL
+
+# In-process prefix index of universities for autocomplete
+UNIVERSITY_INDEX_REFRESH_INTERVAL = float(os.environ.get('UNIVERSITY_INDEX_REFRESH_INTERVAL', '300'))  # seconds, reload even without change notifications
+CACHE_INVALIDATION_CHANNEL = os.environ.get('CACHE_INVALIDATION_CHANNEL', 'cache:invalidate')
+
+# LLM ranking HTTP client
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', '30'))  # seconds
+LLM_MAX_CONNECTIONS = int(os.environ.get('LLM_MAX_CONNECTIONS', '20'))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get('LLM_MAX_KEEPALIVE_CONNECTIONS', '10'))
+LLM_KEEPALIVE_EXPIRY = float(os.environ.get('LLM_KEEPALIVE_EXPIRY', '60'))  # seconds
+LLM_HTTP2 = os.environ.get('LLM_HTTP2', 'false').lower() == 'true'  # requires the h2 package
+
+# LLM ranking latency budget and circuit breaker
+LLM_RANKING_DEADLINE = float(os.environ.get('LLM_RANKING_DEADLINE', '8'))  # seconds
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('LLM_BREAKER_FAILURE_THRESHOLD', '5'))
+LLM_BREAKER_RECOVERY_TIMEOUT = float(os.environ.get('LLM_BREAKER_RECOVERY_TIMEOUT', '30'))  # seconds
+FEED_DEGRADED_CACHE_TTL = int(os.environ.get('FEED_DEGRADED_CACHE_TTL', '60'))  # TTL for rankings built by the fallback
+# Stale-while-revalidate: after the soft TTL a cached ranking is served and refreshed in the background
+FEED_RANKING_SOFT_TTL = float(os.environ.get('FEED_RANKING_SOFT_TTL', '600'))  # seconds, at most half of the hard TTL
+FEED_RANKING_STORE_ENABLED = os.environ.get('FEED_RANKING_STORE_ENABLED', 'true').lower() == 'true'  # durable copy in Postgres
+FEED_RANKING_EARLY_REFRESH_BETA = float(os.environ.get('FEED_RANKING_EARLY_REFRESH_BETA', '1.0'))  # 0 disables early refresh
+
+# Large candidate pools are split into chunks ranked in parallel
+LLM_CHUNK_TOKEN_BUDGET = int(os.environ.get('LLM_CHUNK_TOKEN_BUDGET', '6000'))  # approximate prompt tokens per chunk
+LLM_CHUNK_CONCURRENCY = int(os.environ.get('LLM_CHUNK_CONCURRENCY', '4'))  # max chunks per request, the rest is ranked locally
+
+# Return the first page of an uncached ranked feed while the LLM is still streaming
+FEED_STREAMING_RANKING = os.environ.get('FEED_STREAMING_RANKING', 'true').lower() == 'true'
+
+# Background precomputation of ranked feeds
+FEED_PRECOMPUTE_ENABLED = os.environ.get('FEED_PRECOMPUTE_ENABLED', 'true').lower() == 'true'
+FEED_PRECOMPUTE_CONCURRENCY = int(os.environ.get('FEED_PRECOMPUTE_CONCURRENCY', '4'))
+FEED_PRECOMPUTE_QUEUE_SIZE = int(os.environ.get('FEED_PRECOMPUTE_QUEUE_SIZE', '1000'))
+FEED_PRECOMPUTE_MAX_VIEWERS = int(os.environ.get('FEED_PRECOMPUTE_MAX_VIEWERS', '200'))  # per profile change
+FEED_PRECOMPUTE_ACTIVE_WINDOW = int(os.environ.get('FEED_PRECOMPUTE_ACTIVE_WINDOW', '86400'))  # seconds
+FEED_ACTIVE_VIEWERS_LIMIT = int(os.environ.get('FEED_ACTIVE_VIEWERS_LIMIT', '10000'))
+
+# Feed ranking
+FEED_ESTIMATED_TOTAL = os.environ.get('FEED_ESTIMATED_TOTAL', 'false').lower() == 'true'  # planner estimate for unfiltered unranked feed totals
+FEED_CANDIDATE_LIMIT = int(os.environ.get('FEED_CANDIDATE_LIMIT', '5000'))  # candidates loaded for one ranking
+FEED_RANKER = os.environ.get('FEED_RANKER', 'llm')  # llm | local | hybrid
+LOCAL_RANKER_DIM = int(os.environ.get('LOCAL_RANKER_DIM', '2048'))
+LOCAL_UNIVERSITY_MATCH_WEIGHT = float(os.environ.get('LOCAL_UNIVERSITY_MATCH_WEIGHT', '0.2'))
+LOCAL_ADMISSION_MATCH_WEIGHT = float(os.environ.get('LOCAL_ADMISSION_MATCH_WEIGHT', '0.1'))
+HYBRID_TOP_K = int(os.environ.get('HYBRID_TOP_K', '50'))  # candidates sent to the LLM
+HYBRID_STAGE_ONE_SCORER = os.environ.get('HYBRID_STAGE_ONE_SCORER', 'embedding')  # embedding | lexical
+
+# Single-flight for feed ranking
+FEED_SINGLEFLIGHT_DISTRIBUTED = os.environ.get('FEED_SINGLEFLIGHT_DISTRIBUTED', 'true').lower() == 'true'
+FEED_RANKING_LOCK_TIMEOUT = float(os.environ.get('FEED_RANKING_LOCK_TIMEOUT', '60'))  # seconds
+FEED_RANKING_LOCK_POLL_INTERVAL = float(os.environ.get('FEED_RANKING_LOCK_POLL_INTERVAL', '0.1'))  # seconds
+
 # Roles
 class Roles:
     ADMIN = "admin"
@@ -7,7 +7,15 @@ from sqlalchemy.schema import CreateSchema
 from sqlalchemy import text
 
 from src.config import CONNECTION_STRING
-from src.data.models import SCHEMA_NAME, Base
+from src.data.models import (
+    MENTOR_NAME_KEY,
+    MENTOR_SEARCH_DOCUMENT,
+    MENTOR_TITLE_KEY,
+    SCHEMA_NAME,
+    USER_NAME_KEY,
+    USER_SEARCH_DOCUMENT,
+    Base,
+)
 
 main_engine = create_async_engine(
     CONNECTION_STRING,
@@ -37,12 +45,49 @@ async def session_scope():
         await session.close()
 
 
+# create_all не добавляет колонки в существующие таблицы, поэтому новые
+# колонки и индексы существующих таблиц добавляются идемпотентно
+SCHEMA_UPGRADES = [
+    f"ALTER TABLE {SCHEMA_NAME}.mentors ADD COLUMN IF NOT EXISTS university_id INTEGER "
+    f"REFERENCES {SCHEMA_NAME}.universities (id)",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_mentors_university_id ON {SCHEMA_NAME}.mentors (university_id)",
+    f"ALTER TABLE {SCHEMA_NAME}.users ADD COLUMN IF NOT EXISTS target_university_ids INTEGER[]",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_users_target_university_ids ON {SCHEMA_NAME}.users "
+    f"USING gin (target_university_ids)",
+    f"ALTER TABLE {SCHEMA_NAME}.mentors ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({MENTOR_SEARCH_DOCUMENT}) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_mentors_search_vector ON {SCHEMA_NAME}.mentors USING gin (search_vector)",
+    f"ALTER TABLE {SCHEMA_NAME}.users ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({USER_SEARCH_DOCUMENT}) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_users_search_vector ON {SCHEMA_NAME}.users USING gin (search_vector)",
+    f"ALTER TABLE {SCHEMA_NAME}.mentors ADD COLUMN IF NOT EXISTS name_key varchar "
+    f"GENERATED ALWAYS AS ({MENTOR_NAME_KEY}) STORED",
+    f"ALTER TABLE {SCHEMA_NAME}.mentors ADD COLUMN IF NOT EXISTS title_key varchar "
+    f"GENERATED ALWAYS AS ({MENTOR_TITLE_KEY}) STORED",
+    f"ALTER TABLE {SCHEMA_NAME}.users ADD COLUMN IF NOT EXISTS name_key varchar "
+    f"GENERATED ALWAYS AS ({USER_NAME_KEY}) STORED",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_mentors_name_key_trgm ON {SCHEMA_NAME}.mentors "
+    f"USING gin (name_key gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_mentors_title_key_trgm ON {SCHEMA_NAME}.mentors "
+    f"USING gin (title_key gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_users_name_key_trgm ON {SCHEMA_NAME}.users "
+    f"USING gin (name_key gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_universities_normalized_name_trgm ON {SCHEMA_NAME}.universities "
+    f"USING gin (normalized_name gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS ix_prod_mentors_free_days ON {SCHEMA_NAME}.mentors USING gin (free_days)",
+]
+
+
 async def create_schema():
     """Create schema if not exists."""
     async with main_engine.begin() as connection:
         # await drop_all_tables()  # Временно раскомментировано для пересоздания схемы
         await connection.execute(CreateSchema(SCHEMA_NAME, if_not_exists=True))
+        # Классы операторов gin_trgm_ops нужны уже при create_all
+        await connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         await connection.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await connection.execute(text(statement))
         await connection.commit()
 
 
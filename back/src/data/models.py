@@ -6,16 +6,20 @@ from sqlalchemy import (
     ARRAY,
     Boolean,
     Column,
+    Computed,
     DateTime,
     Enum,
     Integer,
+    Index,
     MetaData,
     String,
     ForeignKey,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import ARRAY as PGArray, TSVECTOR, UUID
 from sqlalchemy.ext.asyncio import AsyncAttrs
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import declarative_base, deferred
+
+from src.utils.universities import translit_sql
 
 SCHEMA_NAME = "prod"
 METADATA = MetaData(
@@ -42,6 +46,46 @@ class DayOfWeek(str, PyEnum):
     SUNDAY = "Воскресенье"
 
 
+# Документы полнотекстового поиска (генерируемые колонки search_vector);
+# вес A — имя, B — должность и университет, C — описание
+MENTOR_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(university, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+USER_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('russian', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'C')"
+)
+
+# Транслитерированные ключи нечеткого поиска (генерируемые колонки *_key,
+# триграммные GIN-индексы); поисковый ввод нормализуется так же
+MENTOR_NAME_KEY = translit_sql("coalesce(name, '')")
+MENTOR_TITLE_KEY = translit_sql("coalesce(title, '')")
+USER_NAME_KEY = translit_sql("coalesce(name, '')")
+
+
+def trigram_index(name: str, column: str) -> Index:
+    """GIN-индекс pg_trgm для операторов %, <% и word_similarity"""
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+
+class University(Base):
+    """Canonical university referenced by mentors and users."""
+
+    __tablename__ = "universities"
+
+    id = cast(int, Column(Integer, primary_key=True, index=True))
+    name = cast(str, Column(String(100), nullable=False))
+    # Ключ после нормализации (см. src.utils.universities.normalize_university)
+    normalized_name = cast(str, Column(String(100), nullable=False, unique=True))
+
+    __table_args__ = (
+        trigram_index("ix_prod_universities_normalized_name_trgm", "normalized_name"),
+    )
+
+
 class User(Base):
     """User model for authentication and user management."""
 
@@ -63,9 +107,21 @@ class User(Base):
     target_universities = cast(
         list[str], Column(ARRAY(String), nullable=True, default=[])
     )
+    # PGArray: операторы @> и && для фильтрации по GIN-индексу
+    target_university_ids = cast(
+        list[int], Column(PGArray(Integer), nullable=True, default=[])
+    )
     description = cast(str, Column(String, nullable=True))
     admission_type = cast(str, Column(Enum(AdmissionType), nullable=True))
-    
+    # Не загружается вместе с профилем, используется только в условиях поиска
+    search_vector = deferred(Column(TSVECTOR, Computed(USER_SEARCH_DOCUMENT, persisted=True)))
+    name_key = deferred(Column(String, Computed(USER_NAME_KEY, persisted=True)))
+
+    __table_args__ = (
+        Index("ix_prod_users_target_university_ids", "target_university_ids", postgresql_using="gin"),
+        Index("ix_prod_users_search_vector", "search_vector", postgresql_using="gin"),
+        trigram_index("ix_prod_users_name_key_trgm", "name_key"),
+    )
 
 
 class Mentor(AsyncAttrs, Base):
@@ -88,10 +144,24 @@ class Mentor(AsyncAttrs, Base):
     avatar_uuid =  cast(str, Column(UUID(as_uuid=True), nullable=True))
     # Профессиональная информация
     university = cast(str, Column(String(100), nullable=True))
-    free_days = cast(list[str], Column(ARRAY(Enum(DayOfWeek)), nullable=True, default=[]))
+    university_id = cast(int, Column(Integer, ForeignKey(University.id), nullable=True))
+    # PGArray: операторы && и @> для фильтра доступности по GIN-индексу
+    free_days = cast(list[str], Column(PGArray(Enum(DayOfWeek)), nullable=True, default=[]))
     title = cast(str, Column(String(100), nullable=True))
     description = cast(str, Column(String(500), nullable=True))
     admission_type = cast(str, Column(Enum(AdmissionType), nullable=True))
+    # Не загружается вместе с профилем, используется только в условиях поиска
+    search_vector = deferred(Column(TSVECTOR, Computed(MENTOR_SEARCH_DOCUMENT, persisted=True)))
+    name_key = deferred(Column(String, Computed(MENTOR_NAME_KEY, persisted=True)))
+    title_key = deferred(Column(String, Computed(MENTOR_TITLE_KEY, persisted=True)))
+
+    __table_args__ = (
+        Index("ix_prod_mentors_university_id", "university_id"),
+        Index("ix_prod_mentors_free_days", "free_days", postgresql_using="gin"),
+        Index("ix_prod_mentors_search_vector", "search_vector", postgresql_using="gin"),
+        trigram_index("ix_prod_mentors_name_key_trgm", "name_key"),
+        trigram_index("ix_prod_mentors_title_key_trgm", "title_key"),
+    )
 
     def __repr__(self):
         return f"<Mentor(id={self.id}, email={self.email})>"
@@ -127,3 +197,22 @@ class Request(Base):
     updated_at = cast(
         datetime, Column(DateTime, default=datetime.now, onupdate=datetime.now)
     )
+
+
+class FeedRanking(Base):
+    """Durable copy of a cached feed ranking (read through from Redis)."""
+
+    __tablename__ = "feed_rankings"
+
+    # Тот же ключ, что и в Redis (пул, поколение, дайджест описания и фильтров)
+    cache_key = cast(str, Column(String(128), primary_key=True))
+    pool = cast(str, Column(String(20), nullable=False))
+    generation = cast(int, Column(Integer, nullable=False))
+    description_digest = cast(str, Column(String(32), nullable=False))
+    ranked_ids = cast(list[int], Column(ARRAY(Integer), nullable=False))
+    total = cast(int, Column(Integer, nullable=False))
+    computed_at = cast(datetime, Column(DateTime, default=datetime.now, nullable=False))
+
+    __table_args__ = (
+        Index("ix_feed_rankings_pool_generation", "pool", "generation"),
+    )
@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -8,9 +10,34 @@ from src.routers.feed_router import router as feed
 from src.routers.avatar_router import router as avatar
 from src.routers.metrics_router import router as metrics
 from src.routers.request_router import router as request_router
+from src.routers.search_router import router as search
+from src.config import FEED_PRECOMPUTE_ENABLED
+from src.services.feed_service import register_generation_seeds
+from src.services.feed_worker import feed_precompute_worker
+from src.services.interest_rating import llm_interest_service
+from src.services.redis_service import redis_service
+from src.security.password_hasher import password_hasher
 from src.setup import setup
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Инвалидация L1-кеша этого воркера по сообщениям других воркеров
+    redis_service.start_invalidation_listener()
+    # Поколения пулов переживают сброс Redis (см. feed_rankings)
+    register_generation_seeds(redis_service)
+    # Фоновый пересчет фидов после изменения профилей
+    if FEED_PRECOMPUTE_ENABLED:
+        feed_precompute_worker.start()
+    yield
+    await feed_precompute_worker.stop()
+    await redis_service.stop_invalidation_listener()
+    # Закрываем соединения пула HTTP-клиента ранжирования
+    await llm_interest_service.aclose()
+    password_hasher.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow CORS
 app.add_middleware(
@@ -30,6 +57,7 @@ setup()
 app.include_router(user_auth, prefix="/auth/users")
 app.include_router(mentor_auth, prefix="/auth/mentors")
 app.include_router(feed, prefix="/feed")
+app.include_router(search, prefix="/search")
 app.include_router(avatar, prefix="")
 app.include_router(metrics)
 app.include_router(request_router)
@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.data.base import session_scope
+from src.data.models import FeedRanking
+
+
+async def get_feed_ranking(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Получить сохраненное ранжирование по ключу кеша.
+
+    Returns:
+        Словарь с ids, total и computed_at (unix-время) или None
+    """
+    async with session_scope() as session:
+        result = await session.execute(
+            select(FeedRanking.ranked_ids, FeedRanking.total, FeedRanking.computed_at).where(
+                FeedRanking.cache_key == cache_key  # type: ignore
+            )
+        )
+        row = result.first()
+        if row is None:
+            return None
+        return {"ids": list(row.ranked_ids), "total": row.total, "computed_at": row.computed_at.timestamp()}
+
+
+async def save_feed_ranking(
+    cache_key: str,
+    pool: str,
+    generation: int,
+    description_digest: str,
+    ids: List[int],
+    total: int,
+) -> None:
+    """
+    Сохранить ранжирование (upsert по ключу кеша).
+
+    Ранжирования того же пула из других поколений больше не могут быть
+    прочитаны, поэтому удаляются в той же транзакции (в том числе более
+    новые — остатки счетчика, сброшенного до восстановления).
+    """
+    async with session_scope() as session:
+        values = {
+            "cache_key": cache_key,
+            "pool": pool,
+            "generation": generation,
+            "description_digest": description_digest,
+            "ranked_ids": ids,
+            "total": total,
+            "computed_at": datetime.now(),
+        }
+        stmt = insert(FeedRanking).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FeedRanking.cache_key],
+            set_={key: stmt.excluded[key] for key in ("ranked_ids", "total", "computed_at")},
+        )
+        await session.execute(stmt)
+        await session.execute(
+            delete(FeedRanking).where(
+                FeedRanking.pool == pool, FeedRanking.generation != generation  # type: ignore
+            )
+        )
+
+
+async def get_max_feed_ranking_generation(pool: str) -> int:
+    """Наибольший номер поколения среди сохраненных ранжирований пула (0, если их нет)."""
+    async with session_scope() as session:
+        result = await session.execute(
+            select(func.max(FeedRanking.generation)).where(FeedRanking.pool == pool)  # type: ignore
+        )
+        return result.scalar() or 0
@@ -1,7 +1,9 @@
-from sqlalchemy import select, update, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update
 from src.data.base import session_scope
-from src.data.models import Mentor
+from src.data.models import DayOfWeek, Mentor
+from src.repository.pagination import fetch_page
+from src.repository.search import full_text_search, fuzzy_search
+from src.repository.university_repository import normalize_university_fields, resolve_university_ids
 from sqlalchemy import insert
 import uuid
 from typing import Optional, Dict, Any
@@ -39,7 +41,7 @@ async def create_mentor(mentor: Mentor) -> Mentor:
     return await get_mentor_by_login(mentor.login)
 
 
-async def update_mentor_avatar(db: AsyncSession, mentor_id: int, avatar_uuid: Optional[uuid.UUID]) -> None:
+async def update_mentor_avatar(db: AsyncSession, mentor_id: int, avatar_uuid: Optional[uuid.UUID]) -> Optional[str]:
     """
     Обновляет UUID аватарки ментора
     
@@ -47,10 +49,29 @@ async def update_mentor_avatar(db: AsyncSession, mentor_id: int, avatar_uuid: Op
         db: Сессия базы данных
         mentor_id: ID ментора
         avatar_uuid: UUID аватарки или None для удаления
+
+    Returns:
+        Логин ментора или None, если ментора нет
     """
-    stmt = update(Mentor).where(Mentor.id == mentor_id).values(avatar_uuid=avatar_uuid)
-    await db.execute(stmt)
+    stmt = update(Mentor).where(Mentor.id == mentor_id).values(avatar_uuid=avatar_uuid).returning(Mentor.login)
+    result = await db.execute(stmt)
+    login = result.scalar()
     await db.commit()
+    return login
+
+
+async def update_mentor_password_hash(mentor_id: int, password_hash: str) -> None:
+    """
+    Сохраняет новый хеш пароля ментора (перехеширование при входе)
+
+    Args:
+        mentor_id: ID ментора
+        password_hash: Новый хеш пароля
+    """
+    async with session_scope() as session:
+        await session.execute(
+            update(Mentor).where(Mentor.id == mentor_id).values(password_hash=password_hash)
+        )
 
 
 async def update_mentor_profile(mentor_id: int, update_data: Dict[str, Any]) -> Mentor:
@@ -73,6 +94,9 @@ async def update_mentor_profile(mentor_id: int, update_data: Dict[str, Any]) ->
         if not mentor:
             return None
         
+        # Название университета приводится к каноническому и связывается со справочником
+        update_data = await normalize_university_fields(update_data)
+
         # Обновляем профиль
         stmt = update(Mentor).where(Mentor.id == mentor_id).values(**update_data)
         await session.execute(stmt)
@@ -93,24 +117,17 @@ async def get_mentor_by_id(mentor_id: int) -> Mentor:
         return result.scalars().first()
 
 
-async def get_mentors(page: int = 1, size: int = 10) -> tuple[list[Mentor], int]:
-    """Получить список менторов с пагинацией."""
+async def get_mentors(page: int = 1, size: int = 10, estimate_total: bool = False) -> tuple[list[Mentor], int]:
+    """
+    Получить список менторов с пагинацией.
+
+    Страница и общее количество читаются одним запросом; с estimate_total
+    количество берется из статистики планировщика (без подсчета строк).
+    """
     async with session_scope() as session:
-        # Базовый запрос
-        query = select(Mentor)
-        
-        # Считаем общее количество
-        count_result = await session.execute(select(func.count(Mentor.id)))
-        total = count_result.scalar() or 0
-        
-        # Применяем пагинацию
         skip = (page - 1) * size
-        query = query.offset(skip).limit(size)
-        
-        result = await session.execute(query)
-        mentors = result.scalars().all()
-        
-        return mentors, total
+        query = select(Mentor).offset(skip).limit(size)
+        return await fetch_page(session, query, Mentor, [], estimate=estimate_total, entities=True)
 
 
 async def update_mentor(mentor_id: int, update_data: MentorUpdateSchema) -> Mentor:
@@ -136,47 +153,168 @@ async def update_mentor(mentor_id: int, update_data: MentorUpdateSchema) -> Ment
         return result.scalars().first()
 
 
-async def get_filtered_mentors(
-    target_universities: list[str] = None,
-    admission_type: str = None,
-    page: int = 1,
-    size: int = 10,
-) -> tuple[list[Mentor], int]:
+# Поля ментора, нужные карточке фида (без хеша пароля и прочих колонок профиля)
+MENTOR_FEED_COLUMNS = (
+    Mentor.id,
+    Mentor.name,
+    Mentor.login,
+    Mentor.title,
+    Mentor.description,
+    Mentor.university,
+    Mentor.avatar_uuid,
+)
+
+
+async def search_mentors(
+    text: str,
+    size: int,
+    after: Optional[tuple[float, int]] = None,
+    free_days: Optional[list[str]] = None,
+    free_days_match: str = "any",
+) -> list[Any]:
     """
-    Получить список менторов с фильтрацией по целевым университетам,
-    типу поступления и опционально по тегу
-    
+    Полнотекстовый поиск менторов по имени, должности, университету и описанию.
+
+    Результаты можно ограничить свободными днями (см. availability_conditions).
+
+    Returns:
+        Строки MENTOR_FEED_COLUMNS с полями rank и headline (подсветка описания)
+    """
+    return await full_text_search(
+        Mentor,
+        MENTOR_FEED_COLUMNS,
+        Mentor.description,
+        text,
+        size,
+        after,
+        conditions=availability_conditions(free_days, free_days_match),
+    )
+
+
+async def autocomplete_mentors(text: str, size: int) -> list[Any]:
+    """
+    Подсказки менторов по имени и должности с учетом опечаток и транслитерации.
+
+    Returns:
+        Строки (id, name, login, title, university, score)
+    """
+    columns = (Mentor.id, Mentor.name, Mentor.login, Mentor.title, Mentor.university)
+    return await fuzzy_search(Mentor, columns, (Mentor.name_key, Mentor.title_key), text, size)
+
+
+async def get_mentor_feed_rows(mentor_ids: list[int]) -> list[Any]:
+    """Получить поля карточек фида для менторов из списка ID (порядок не гарантируется)."""
+    if not mentor_ids:
+        return []
+    async with session_scope() as session:
+        result = await session.execute(
+            select(*MENTOR_FEED_COLUMNS).where(Mentor.id.in_(mentor_ids))
+        )
+        return list(result.all())
+
+
+def availability_conditions(free_days: Optional[list[str]] = None, free_days_match: str = "any") -> list:
+    """
+    Условия фильтрации менторов по свободным дням недели.
+
+    Оба варианта обслуживаются GIN-индексом по free_days.
+
     Args:
+        free_days: Дни недели (значения или элементы DayOfWeek)
+        free_days_match: "any" — свободен хотя бы в один из дней (&&), "all" — во все дни (@>)
+    """
+    if not free_days:
+        return []
+    days = [DayOfWeek(day) for day in free_days]
+    if free_days_match == "all":
+        return [Mentor.free_days.contains(days)]
+    return [Mentor.free_days.overlap(days)]
+
+
+async def mentor_filter_conditions(
+    target_universities: Optional[list[str]] = None,
+    admission_type: Optional[str] = None,
+    free_days: Optional[list[str]] = None,
+    free_days_match: str = "any",
+) -> list:
+    """
+    Условия фильтрации менторов по профилю пользователя и свободным дням.
+
+    Названия университетов сопоставляются со справочником, фильтр идет по
+    индексу university_id; неизвестные названия не совпадают ни с кем.
+    """
+    conditions = []
+    if target_universities:
+        university_ids = await resolve_university_ids(target_universities)
+        conditions.append(Mentor.university_id.in_(university_ids))
+    if admission_type:
+        conditions.append(Mentor.admission_type == admission_type)
+    conditions.extend(availability_conditions(free_days, free_days_match))
+    return conditions
+
+
+async def get_mentors_page(
+    size: int,
+    after_id: Optional[int] = None,
+    offset: int = 0,
+    target_universities: Optional[list[str]] = None,
+    admission_type: Optional[str] = None,
+    estimate_total: bool = False,
+    free_days: Optional[list[str]] = None,
+    free_days_match: str = "any",
+) -> tuple[list[Any], int]:
+    """
+    Получить страницу карточек фида менторов в порядке id.
+
+    Загружаются только MENTOR_FEED_COLUMNS. Если передан after_id, страница начинается после этого id (keyset-пагинация
+    по первичному ключу), иначе пропускается offset записей.
+
+    Args:
+        size: Размер страницы
+        after_id: id последнего ментора предыдущей страницы
+        offset: Смещение, если after_id не передан
         target_universities: Список университетов для фильтрации
         admission_type: Тип поступления для фильтрации
-        page: Номер страницы для пагинации
-        size: Размер страницы для пагинации
-        
+        estimate_total: Оценивать общее количество по статистике, если фильтров нет
+        free_days: Дни недели для фильтрации по доступности
+        free_days_match: "any" или "all" (см. availability_conditions)
+
     Returns:
-        Кортеж из списка менторов и общего количества менторов
+        Кортеж из строк менторов и общего количества менторов с учетом фильтров
     """
+    conditions = await mentor_filter_conditions(target_universities, admission_type, free_days, free_days_match)
     async with session_scope() as session:
-        # Базовый запрос и условия фильтрации
-        conditions = []
-        if target_universities and len(target_universities) > 0:
-            conditions.append(Mentor.university.in_(target_universities))
-        if admission_type:
-            conditions.append(Mentor.admission_type == admission_type)
-            
-        # Создаем запрос с фильтрами
-        query = select(Mentor)
-        if conditions:
-            query = query.where(*conditions)
-            
-        # Считаем общее количество с учетом фильтров
-        count_result = await session.execute(select(func.count(Mentor.id)).where(*conditions) if conditions else select(func.count(Mentor.id)))
-        total = count_result.scalar() or 0
-        
-        # Применяем пагинацию
-        skip = (page - 1) * size
-        query = query.offset(skip).limit(size)
-        
-        result = await session.execute(query)
-        mentors = result.scalars().all()
-        
-        return mentors, total
+        query = select(*MENTOR_FEED_COLUMNS).where(*conditions)
+        if after_id is not None:
+            query = query.where(Mentor.id > after_id)
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(Mentor.id).limit(size)
+        return await fetch_page(session, query, Mentor, conditions, estimate=estimate_total)
+
+
+async def get_mentor_candidates(
+    limit: int,
+    target_universities: Optional[list[str]] = None,
+    admission_type: Optional[str] = None,
+    free_days: Optional[list[str]] = None,
+    free_days_match: str = "any",
+) -> list[Any]:
+    """
+    Получить кандидатов для ранжирования фида.
+
+    Загружаются только поля, нужные ранжировщику (id, description, university,
+    admission_type), без построения ORM-объектов.
+
+    Returns:
+        Строки кандидатов в порядке id, не более limit
+    """
+    conditions = await mentor_filter_conditions(target_universities, admission_type, free_days, free_days_match)
+    async with session_scope() as session:
+        result = await session.execute(
+            select(Mentor.id, Mentor.description, Mentor.university, Mentor.admission_type)
+            .where(*conditions)
+            .order_by(Mentor.id)
+            .limit(limit)
+        )
+        return list(result.all())
@@ -0,0 +1,70 @@
+from typing import Any, List, Tuple
+
+from sqlalchemy import BigInteger, case, cast, column, func, select, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+# Статистика планировщика: число строк таблицы по данным последнего ANALYZE
+_pg_class = table("pg_class", column("oid"), column("reltuples"))
+
+
+def total_count(model: Any, conditions: list, estimate: bool = False) -> Any:
+    """
+    Скалярный подзапрос с общим количеством строк модели с учетом условий.
+
+    Для списков без фильтров с estimate=True берется оценка из pg_class
+    (без сканирования таблицы); точный подсчет выполняется, только если
+    статистики еще нет.
+    """
+    exact = select(func.count()).select_from(model).where(*conditions).correlate(None).scalar_subquery()
+    if not estimate or conditions:
+        return exact
+    reltuples = (
+        select(
+            case(
+                (_pg_class.c.reltuples > 0, cast(_pg_class.c.reltuples, BigInteger)),
+                else_=None,
+            )
+        )
+        .where(_pg_class.c.oid == func.to_regclass(model.__table__.fullname))
+        .scalar_subquery()
+    )
+    # COALESCE вычисляет точный подсчет, только если оценки нет
+    return func.coalesce(reltuples, exact)
+
+
+async def fetch_page(
+    session: AsyncSession,
+    query: Select,
+    model: Any,
+    conditions: list,
+    estimate: bool = False,
+    entities: bool = False,
+) -> Tuple[List[Any], int]:
+    """
+    Выполнить запрос страницы вместе с подсчетом общего количества.
+
+    Общее количество добавляется к каждой строке страницы, поэтому обычно
+    нужен один запрос; отдельный подсчет выполняется, только если страница
+    пуста (например, запрошена страница за концом списка).
+
+    Args:
+        session: Сессия базы данных
+        query: Запрос страницы (с условиями, сортировкой и лимитом)
+        model: Модель, строки которой считаются
+        conditions: Условия фильтрации, те же, что в query
+        estimate: Разрешить оценку количества для списков без фильтров
+        entities: Вернуть ORM-объекты (первый элемент каждой строки)
+
+    Returns:
+        Кортеж из строк страницы и общего количества
+    """
+    result = await session.execute(query.add_columns(total_count(model, conditions, estimate).label("total_count")))
+    rows = list(result.all())
+    if not rows:
+        count_result = await session.execute(select(total_count(model, conditions, estimate)))
+        return [], count_result.scalar() or 0
+    total = rows[0].total_count
+    if entities:
+        return [row[0] for row in rows], total
+    return rows, total
@@ -0,0 +1,109 @@
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Float, and_, bindparam, func, literal, or_, select
+
+from src.data.base import session_scope
+from src.utils.universities import normalize_search_text
+
+SEARCH_CONFIG = "russian"
+
+# Границы подсветки: служебные символы, которых нет в тексте профилей;
+# в разметку они превращаются после экранирования (см. search_router)
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+HEADLINE_OPTIONS = (
+    f"StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, "
+    "MaxWords=35, MinWords=15, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+
+async def full_text_search(
+    model: Any,
+    columns: Sequence[Any],
+    headline_column: Any,
+    text: str,
+    size: int,
+    after: Optional[Tuple[float, int]] = None,
+    conditions: Sequence[Any] = (),
+) -> List[Any]:
+    """
+    Полнотекстовый поиск по генерируемой колонке search_vector модели.
+
+    Результаты упорядочены по релевантности (ts_rank_cd), при равной
+    релевантности — по id. Пагинация keyset по паре (rank, id).
+
+    Args:
+        model: Модель с колонкой search_vector
+        columns: Загружаемые колонки модели
+        headline_column: Колонка, фрагменты которой подсвечиваются
+        text: Поисковый запрос в синтаксисе websearch_to_tsquery
+        size: Размер страницы
+        after: Пара (rank, id) последнего результата предыдущей страницы
+        conditions: Дополнительные условия фильтрации
+
+    Returns:
+        Строки columns с дополнительными полями rank и headline, не более size
+    """
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    rank = func.ts_rank_cd(model.search_vector, query)
+    conditions = [model.search_vector.op("@@")(query), *conditions]
+    if after is not None:
+        after_rank = bindparam("after_rank", after[0], type_=Float)
+        conditions.append(or_(rank < after_rank, and_(rank == after_rank, model.id > after[1])))
+
+    # Фрагменты строятся только для строк страницы, а не для всех совпадений
+    page = (
+        select(*columns, rank.label("rank"))
+        .where(*conditions)
+        .order_by(rank.desc(), model.id)
+        .limit(size)
+        .subquery()
+    )
+    headline = func.ts_headline(
+        SEARCH_CONFIG, func.coalesce(page.c[headline_column.key], ""), query, HEADLINE_OPTIONS
+    )
+    async with session_scope() as session:
+        result = await session.execute(
+            select(page, headline.label("headline")).order_by(page.c.rank.desc(), page.c.id)
+        )
+        return list(result.all())
+
+
+async def fuzzy_search(
+    model: Any,
+    columns: Sequence[Any],
+    key_columns: Sequence[Any],
+    text: str,
+    size: int,
+) -> List[Any]:
+    """
+    Нечеткий поиск (pg_trgm) по транслитерированным ключевым колонкам.
+
+    Ввод нормализуется так же, как ключи (см. translit_sql), поэтому
+    «Иванов», «ivanov» и «Ивнаов» находят одну и ту же запись. Условие
+    word_similarity (оператор <%) обслуживается триграммным GIN-индексом.
+
+    Args:
+        model: Модель с ключевыми колонками
+        columns: Загружаемые колонки модели
+        key_columns: Ключевые колонки с триграммными индексами
+        text: Поисковый ввод (начало слова или слово с опечаткой)
+        size: Количество подсказок
+
+    Returns:
+        Строки columns с дополнительным полем score, по убыванию сходства
+    """
+    key = normalize_search_text(text)
+    if not key:
+        return []
+    query = literal(key)
+    scores = [func.word_similarity(query, column) for column in key_columns]
+    score = scores[0] if len(scores) == 1 else func.greatest(*scores)
+    async with session_scope() as session:
+        result = await session.execute(
+            select(*columns, score.label("score"))
+            .where(or_(*[query.op("<%")(column) for column in key_columns]))
+            .order_by(score.desc(), model.id)
+            .limit(size)
+        )
+        return list(result.all())
@@ -0,0 +1,145 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.data.base import session_scope
+from src.data.models import Mentor, University, User
+from src.repository.search import fuzzy_search
+from src.utils.universities import canonical_university_name, normalize_university
+
+# id университетов по нормализованному ключу; записи таблицы не меняются,
+# поэтому найденные id кешируются на все время жизни процесса
+_university_ids: Dict[str, int] = {}
+
+
+async def get_or_create_universities(names: List[str]) -> List[Tuple[int, str]]:
+    """
+    Найти или создать университеты по названиям.
+
+    Названия нормализуются, повторы (с учетом синонимов) схлопываются.
+
+    Returns:
+        Пары (id, каноническое название) в порядке первого упоминания
+    """
+    keys: Dict[str, str] = {}
+    for name in names:
+        key = normalize_university(name)
+        if key and key not in keys:
+            keys[key] = canonical_university_name(name)
+    if not keys:
+        return []
+
+    async with session_scope() as session:
+        await session.execute(
+            insert(University)
+            .values([{"name": name, "normalized_name": key} for key, name in keys.items()])
+            .on_conflict_do_nothing(index_elements=[University.normalized_name])
+        )
+        result = await session.execute(
+            select(University.id, University.name, University.normalized_name).where(
+                University.normalized_name.in_(list(keys))  # type: ignore
+            )
+        )
+        rows = {row.normalized_name: row for row in result.all()}
+
+    _university_ids.update({key: row.id for key, row in rows.items()})
+    return [(rows[key].id, rows[key].name) for key in keys if key in rows]
+
+
+async def resolve_university_ids(names: List[str]) -> List[int]:
+    """
+    Получить id известных университетов по названиям (для фильтрации).
+
+    Неизвестные названия пропускаются, новые университеты не создаются.
+    """
+    keys = list(dict.fromkeys(normalize_university(name) for name in names))
+    missing = [key for key in keys if key and key not in _university_ids]
+    if missing:
+        async with session_scope() as session:
+            result = await session.execute(
+                select(University.id, University.normalized_name).where(
+                    University.normalized_name.in_(missing)  # type: ignore
+                )
+            )
+            _university_ids.update({row.normalized_name: row.id for row in result.all()})
+    return [_university_ids[key] for key in keys if key in _university_ids]
+
+
+async def list_universities() -> List[Tuple[int, str, str]]:
+    """Все университеты справочника: (id, название, нормализованный ключ)."""
+    async with session_scope() as session:
+        result = await session.execute(
+            select(University.id, University.name, University.normalized_name).order_by(University.id)
+        )
+        return [(row.id, row.name, row.normalized_name) for row in result.all()]
+
+
+async def search_universities(text: str, size: int) -> List[Any]:
+    """
+    Нечеткий поиск университетов по нормализованному ключу (опечатки).
+
+    Returns:
+        Строки (id, name, score)
+    """
+    return await fuzzy_search(
+        University, (University.id, University.name), (University.normalized_name,), text, size
+    )
+
+
+async def normalize_university_fields(update_data: Dict[str, object]) -> Dict[str, object]:
+    """
+    Заменить названия университетов в обновлении профиля каноническими
+    и добавить их id (university_id ментора, target_university_ids пользователя).
+    """
+    update_data = dict(update_data)
+    if "university" in update_data:
+        university: Optional[str] = update_data["university"]  # type: ignore
+        universities = await get_or_create_universities([university] if university else [])
+        update_data["university_id"], update_data["university"] = universities[0] if universities else (None, None)
+    if "target_universities" in update_data:
+        universities = await get_or_create_universities(update_data["target_universities"] or [])  # type: ignore
+        update_data["target_university_ids"] = [university_id for university_id, _ in universities]
+        update_data["target_universities"] = [name for _, name in universities]
+    return update_data
+
+
+async def backfill_university_ids() -> None:
+    """Заполнить id университетов у профилей, сохраненных до появления справочника."""
+    async with session_scope() as session:
+        mentor_names = await session.execute(
+            select(Mentor.university)
+            .where(Mentor.university.isnot(None), Mentor.university_id.is_(None))  # type: ignore
+            .distinct()
+        )
+        mentor_names = [name for name, in mentor_names.all()]
+        users = await session.execute(
+            select(User.id, User.target_universities).where(
+                User.target_universities.isnot(None), User.target_university_ids.is_(None)  # type: ignore
+            )
+        )
+        users = list(users.all())
+
+    for name in mentor_names:
+        universities = await get_or_create_universities([name])
+        if not universities:
+            continue
+        university_id, canonical = universities[0]
+        async with session_scope() as session:
+            await session.execute(
+                update(Mentor)
+                .where(Mentor.university == name, Mentor.university_id.is_(None))  # type: ignore
+                .values(university_id=university_id, university=canonical)
+            )
+
+    for user_id, names in users:
+        universities = await get_or_create_universities(names)
+        async with session_scope() as session:
+            await session.execute(
+                update(User)
+                .where(User.id == user_id)  # type: ignore
+                .values(
+                    target_university_ids=[university_id for university_id, _ in universities],
+                    target_universities=[name for _, name in universities],
+                )
+            )
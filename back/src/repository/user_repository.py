@@ -1,6 +1,9 @@
-from sqlalchemy import select, update, func
+from sqlalchemy import false, select, update
 from src.data.base import session_scope
 from src.data.models import User
+from src.repository.pagination import fetch_page
+from src.repository.search import full_text_search, fuzzy_search
+from src.repository.university_repository import normalize_university_fields, resolve_university_ids
 from sqlalchemy import insert
 import uuid
 from typing import Optional, Dict, Any, List, Tuple
@@ -37,7 +40,7 @@ async def create_user(user_data: User) -> User:
         return await get_user_by_login(user_data.login)
 
 
-async def update_user_avatar(db: AsyncSession, user_id: int, avatar_uuid: Optional[uuid.UUID]) -> None:
+async def update_user_avatar(db: AsyncSession, user_id: int, avatar_uuid: Optional[uuid.UUID]) -> Optional[str]:
     """
     Обновляет UUID аватарки пользователя
     
@@ -45,10 +48,29 @@ async def update_user_avatar(db: AsyncSession, user_id: int, avatar_uuid: Option
         db: Сессия базы данных
         user_id: ID пользователя
         avatar_uuid: UUID аватарки или None для удаления
+
+    Returns:
+        Логин пользователя или None, если пользователя нет
     """
-    stmt = update(User).where(User.id == user_id).values(avatar_uuid=avatar_uuid) # type: ignore
-    await db.execute(stmt)
+    stmt = update(User).where(User.id == user_id).values(avatar_uuid=avatar_uuid).returning(User.login) # type: ignore
+    result = await db.execute(stmt)
+    login = result.scalar()
     await db.commit()
+    return login
+
+
+async def update_user_password_hash(user_id: int, password_hash: str) -> None:
+    """
+    Сохраняет новый хеш пароля пользователя (перехеширование при входе)
+
+    Args:
+        user_id: ID пользователя
+        password_hash: Новый хеш пароля
+    """
+    async with session_scope() as session:
+        await session.execute(
+            update(User).where(User.id == user_id).values(password_hash=password_hash)  # type: ignore
+        )
 
 
 async def update_user_profile(user_id: int, update_data: Dict[str, Any]) -> User:
@@ -71,6 +93,9 @@ async def update_user_profile(user_id: int, update_data: Dict[str, Any]) -> User
         if not user:
             return None # type: ignore
         
+        # Названия университетов приводятся к каноническим и связываются со справочником
+        update_data = await normalize_university_fields(update_data)
+
         # Обновляем профиль
         stmt = update(User).where(User.id == user_id).values(**update_data) # type: ignore
         await session.execute(stmt)
@@ -81,67 +106,153 @@ async def update_user_profile(user_id: int, update_data: Dict[str, Any]) -> User
         return result.scalars().first()
 
 
-async def get_users(page: int = 1, size: int = 10) -> Tuple[List[User], int]:
-    """Получить список пользователей с пагинацией."""
+async def get_users_by_ids(user_ids: List[int]) -> List[User]:
+    """Получить пользователей по списку ID (порядок не гарантируется)."""
+    if not user_ids:
+        return []
+    async with session_scope() as session:
+        result = await session.execute(
+            select(User).where(User.id.in_(user_ids)) # type: ignore
+        )
+        return list(result.scalars().all())
+
+
+async def get_users(page: int = 1, size: int = 10, estimate_total: bool = False) -> Tuple[List[User], int]:
+    """
+    Получить список пользователей с пагинацией.
+
+    Страница и общее количество читаются одним запросом; с estimate_total
+    количество берется из статистики планировщика (без подсчета строк).
+    """
     async with session_scope() as session:
-        # Базовый запрос
-        query = select(User)
-        
-        # Считаем общее количество
-        count_result = await session.execute(select(func.count(User.id))) # type: ignore
-        total = count_result.scalar() or 0
-        
-        # Применяем пагинацию
         skip = (page - 1) * size
-        query = query.offset(skip).limit(size)
-        
-        result = await session.execute(query)
-        users = list(result.scalars().all())
-        
-        return users, total
+        query = select(User).offset(skip).limit(size)
+        return await fetch_page(session, query, User, [], estimate=estimate_total, entities=True)
+
+
+# Поля пользователя, нужные карточке фида (без хеша пароля и прочих колонок профиля)
+USER_FEED_COLUMNS = (
+    User.id,
+    User.name,
+    User.login,
+    User.description,
+    User.target_universities,
+    User.admission_type,
+    User.avatar_uuid,
+)
+
+
+async def search_users(
+    text: str, size: int, after: Optional[Tuple[float, int]] = None
+) -> List[Any]:
+    """
+    Полнотекстовый поиск пользователей по имени и описанию.
+
+    Returns:
+        Строки USER_FEED_COLUMNS с полями rank и headline (подсветка описания)
+    """
+    return await full_text_search(User, USER_FEED_COLUMNS, User.description, text, size, after)
 
 
-async def get_filtered_users(
+async def autocomplete_users(text: str, size: int) -> List[Any]:
+    """
+    Подсказки пользователей по имени с учетом опечаток и транслитерации.
+
+    Returns:
+        Строки (id, name, login, score)
+    """
+    return await fuzzy_search(User, (User.id, User.name, User.login), (User.name_key,), text, size)
+
+
+async def get_user_feed_rows(user_ids: List[int]) -> List[Any]:
+    """Получить поля карточек фида для пользователей из списка ID (порядок не гарантируется)."""
+    if not user_ids:
+        return []
+    async with session_scope() as session:
+        result = await session.execute(
+            select(*USER_FEED_COLUMNS).where(User.id.in_(user_ids))  # type: ignore
+        )
+        return list(result.all())
+
+
+async def user_filter_conditions(
     university: Optional[str] = None,
     admission_type: Optional[str] = None,
-    page: int = 1,
-    size: int = 10,
-) -> Tuple[List[User], int]:
+) -> list:
     """
-    Получить список пользователей с фильтрацией по университету
-    и типу поступления
-    
+    Условия фильтрации пользователей по профилю ментора.
+
+    Университет сопоставляется со справочником, фильтр идет по GIN-индексу
+    target_university_ids; неизвестное название не совпадает ни с кем.
+    """
+    conditions = []
+    if university:
+        university_ids = await resolve_university_ids([university])
+        if university_ids:
+            conditions.append(User.target_university_ids.contains(university_ids))  # type: ignore
+        else:
+            conditions.append(false())
+    if admission_type:
+        conditions.append(User.admission_type == admission_type)  # type: ignore
+    return conditions
+
+
+async def get_users_page(
+    size: int,
+    after_id: Optional[int] = None,
+    offset: int = 0,
+    university: Optional[str] = None,
+    admission_type: Optional[str] = None,
+    estimate_total: bool = False,
+) -> Tuple[List[Any], int]:
+    """
+    Получить страницу карточек фида пользователей в порядке id.
+
+    Загружаются только USER_FEED_COLUMNS. Если передан after_id, страница начинается после этого id (keyset-пагинация
+    по первичному ключу), иначе пропускается offset записей.
+
     Args:
+        size: Размер страницы
+        after_id: id последнего пользователя предыдущей страницы
+        offset: Смещение, если after_id не передан
         university: Университет для фильтрации
         admission_type: Тип поступления для фильтрации
-        page: Номер страницы для пагинации
-        size: Размер страницы для пагинации
-        
+        estimate_total: Оценивать общее количество по статистике, если фильтров нет
+
     Returns:
-        Кортеж из списка пользователей и общего количества пользователей
+        Кортеж из строк пользователей и общего количества пользователей с учетом фильтров
     """
+    conditions = await user_filter_conditions(university, admission_type)
     async with session_scope() as session:
-        # Базовый запрос и условия фильтрации
-        conditions = []
-        if university:
-            conditions.append(User.target_universities.any(university))  # type: ignore
-        if admission_type:
-            conditions.append(User.admission_type == admission_type)  # type: ignore
-            
-        # Создаем запрос с фильтрами
-        query = select(User)
-        if conditions:
-            query = query.where(*conditions)
-            
-        # Считаем общее количество с учетом фильтров
-        count_result = await session.execute(select(func.count(User.id)).where(*conditions) if conditions else select(func.count(User.id))) # type: ignore
-        total = count_result.scalar() or 0
-        
-        # Применяем пагинацию
-        skip = (page - 1) * size
-        query = query.offset(skip).limit(size)
-        
-        result = await session.execute(query)
-        users = list(result.scalars().all())
-        
-        return users, total
+        query = select(*USER_FEED_COLUMNS).where(*conditions)
+        if after_id is not None:
+            query = query.where(User.id > after_id)  # type: ignore
+        elif offset:
+            query = query.offset(offset)
+        query = query.order_by(User.id).limit(size)  # type: ignore
+        return await fetch_page(session, query, User, conditions, estimate=estimate_total)
+
+
+async def get_user_candidates(
+    limit: int,
+    university: Optional[str] = None,
+    admission_type: Optional[str] = None,
+) -> List[Any]:
+    """
+    Получить кандидатов для ранжирования фида.
+
+    Загружаются только поля, нужные ранжировщику (id, description,
+    target_universities, admission_type), без построения ORM-объектов.
+
+    Returns:
+        Строки кандидатов в порядке id, не более limit
+    """
+    conditions = await user_filter_conditions(university, admission_type)
+    async with session_scope() as session:
+        result = await session.execute(
+            select(User.id, User.description, User.target_universities, User.admission_type)  # type: ignore
+            .where(*conditions)
+            .order_by(User.id)  # type: ignore
+            .limit(limit)
+        )
+        return list(result.all())
@@ -1,12 +1,12 @@
 import os
 import uuid
-from typing import Optional
+from typing import Optional, Union
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from fastapi.responses import FileResponse
 
-from src.schemas.schemas import MentorDisplay, UserDisplay
-from src.security.oauth2 import get_current_mentor, get_current_user
+from src.data.models import Mentor, User
+from src.security.auth import get_optional_current_principal
 from src.services.avatar_service import (
     delete_avatar,
     get_avatar_path,
@@ -19,11 +19,10 @@ router = APIRouter(tags=["Images"])
 @router.post("/me/avatar", status_code=status.HTTP_201_CREATED)
 async def upload_avatar(
     file: UploadFile = File(...),
-    current_user: Optional[UserDisplay] = Depends(get_current_user),
-    current_mentor: Optional[MentorDisplay] = Depends(get_current_mentor),
+    principal: Optional[Union[User, Mentor]] = Depends(get_optional_current_principal),
 ):
     """Загрузка аватарки текущим пользователем или ментором"""
-    if not current_user and not current_mentor:
+    if not principal:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Авторизуйтесь для загрузки аватарки",
@@ -35,10 +34,10 @@ async def upload_avatar(
     # Определяем, кто загружает аватарку (пользователь или ментор)
     user_id = None
     mentor_id = None
-    if current_user:
-        user_id = current_user.id
+    if isinstance(principal, User):
+        user_id = principal.id
     else:
-        mentor_id = current_mentor.id # type: ignore
+        mentor_id = principal.id
     
     # Сохраняем аватарку и обновляем avatar_uuid в базе данных
     avatar_uuid, _ = await save_avatar(file, avatar_uuid, user_id, mentor_id)
@@ -62,11 +61,10 @@ async def get_avatar(avatar_uuid: uuid.UUID):
 
 @router.delete("/me/avatar")
 async def remove_avatar(
-    current_user: Optional[UserDisplay] = Depends(get_current_user),
-    current_mentor: Optional[MentorDisplay] = Depends(get_current_mentor),
+    principal: Optional[Union[User, Mentor]] = Depends(get_optional_current_principal),
 ):
     """Удаление аватарки текущим пользователем или ментором"""
-    if not current_user and not current_mentor:
+    if not principal:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Авторизуйтесь для удаления аватарки",
@@ -75,14 +73,12 @@ async def remove_avatar(
     # Определяем, кто удаляет аватарку (пользователь или ментор)
     user_id = None
     mentor_id = None
-    avatar_uuid = None
+    avatar_uuid = principal.avatar_uuid
     
-    if current_user:
-        user_id = current_user.id
-        avatar_uuid = current_user.avatar_uuid
+    if isinstance(principal, User):
+        user_id = principal.id
     else:
-        mentor_id = current_mentor.id # type: ignore
-        avatar_uuid = current_mentor.avatar_uuid # type: ignore
+        mentor_id = principal.id
     
     # Проверяем, есть ли аватарка для удаления
     if not avatar_uuid:
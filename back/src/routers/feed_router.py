@@ -1,33 +1,45 @@
 from math import ceil
-from typing import Dict, Optional
+from typing import Any, Dict, List, Literal, Optional, Tuple
 from urllib.parse import urljoin
 
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 
-from src.data.models import Mentor, User
-from src.repository.mentor_repository import get_filtered_mentors, get_mentors
-from src.repository.user_repository import get_filtered_users, get_users
+from src.config import FEED_ESTIMATED_TOTAL
+from src.data.models import DayOfWeek, Mentor, User
+from src.repository.mentor_repository import get_mentor_feed_rows, get_mentors_page
+from src.repository.user_repository import get_user_feed_rows, get_users_page
 from src.schemas.schemas import FeedResponse, MentorFeedResponse, UserFeedResponse
 from src.security.auth import (
     get_optional_current_mentor,
     get_optional_current_user,
 )
-from src.services.interest_rating import InterestRatingService
-from src.services.redis_service import RedisService, get_redis_service
+from src.services.feed_service import (
+    availability_filters,
+    decode_cursor,
+    encode_cursor,
+    get_mentor_ranking,
+    get_user_ranking,
+    mentor_feed_preferences,
+    user_feed_preferences,
+)
+from src.services.redis_service import (
+    MENTORS_POOL,
+    USERS_POOL,
+    RedisService,
+    get_redis_service,
+)
 
 router = APIRouter(
     tags=["feed"],
     responses={404: {"description": "Not found"}},
 )
 
-interest_service = InterestRatingService()
 
-
-def prepare_mentor_data(mentor: Mentor, base_url: str) -> Dict:
-    """Подготовка данных ментора для кеширования"""
+def prepare_mentor_data(mentor: Any, avatar_base: str) -> Dict:
+    """Подготовка данных карточки ментора (ORM-объект или строка MENTOR_FEED_COLUMNS)"""
     avatar_url = None
     if mentor.avatar_uuid is not None:
-        avatar_url = urljoin(base_url, f"img/{mentor.avatar_uuid}")
+        avatar_url = f"{avatar_base}{mentor.avatar_uuid}"
 
     return {
         "id": mentor.id,
@@ -40,11 +52,11 @@ def prepare_mentor_data(mentor: Mentor, base_url: str) -> Dict:
     }
 
 
-def prepare_user_data(user: User, base_url: str) -> Dict:
-    """Подготовка данных пользователя для кеширования"""
+def prepare_user_data(user: Any, avatar_base: str) -> Dict:
+    """Подготовка данных карточки пользователя (ORM-объект или строка USER_FEED_COLUMNS)"""
     avatar_url = None
     if user.avatar_uuid is not None:
-        avatar_url = urljoin(base_url, f"img/{user.avatar_uuid}")
+        avatar_url = f"{avatar_base}{user.avatar_uuid}"
 
     admission_type = user.admission_type.value if user.admission_type else None
 
@@ -59,6 +71,27 @@ def prepare_user_data(user: User, base_url: str) -> Dict:
     }
 
 
+def resolve_position(cursor: Optional[str], page: int, size: int) -> Tuple[int, int, Optional[int]]:
+    """
+    Позиция страницы в фиде по курсору или номеру страницы.
+
+    Returns:
+        Номер страницы, смещение и id последнего элемента предыдущей страницы
+        (для keyset-пагинации нефильтрованного по интересам фида)
+    """
+    if not cursor:
+        return page, (page - 1) * size, None
+    try:
+        position = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    page = position.get("page", page)
+    return page, position.get("offset", (page - 1) * size), position.get("after")
+
+
 @router.get("/mentors", response_model=FeedResponse)
 async def get_mentors_feed(
     request: Request,
@@ -68,13 +101,18 @@ async def get_mentors_feed(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Number of items per page"),
     prompt: Optional[str] = Query(None, description="Custom prompt for AI to determine order instead of user profile"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page (overrides page)"),
+    free_days: Optional[List[DayOfWeek]] = Query(None, description="Only mentors free on these days (repeat the parameter)"),
+    free_days_match: Literal["any", "all"] = Query("any", description="Free on any of free_days or on all of them"),
 ):
     """
     Fetch feed of mentors with pagination.
     If filtered=true, returns mentors that match the current user's profile.
     If filtered=false, returns all mentors.
+    free_days restricts the feed to mentors available on those weekdays in either case.
     Mentors are sorted by interest relevance if user is authenticated.
     If prompt is provided, it will be used instead of user profile for determining order.
+    Pass next_cursor from the response as cursor to fetch the next page.
     """
     if page < 1:
         page = 1
@@ -83,98 +121,66 @@ async def get_mentors_feed(
     elif size > 100:
         size = 100
 
-    items = []
-    total = 0
-
-    # Получаем список менторов
-    if filtered and current_user:
-        target_universities = current_user.target_universities if current_user else []
-        admission_type_value = ""
-
-        if current_user and current_user.admission_type:
-            admission_type_value = current_user.admission_type.value
-
-        mentors, total = await get_filtered_mentors(
-            target_universities=target_universities,
-            admission_type=admission_type_value,
-            page=1,
-            size=1000,
-        )
-    else:
-        mentors, total = await get_mentors(page=1, size=1000)
+    # Базовый URL аватарок вычисляется один раз на запрос
+    avatar_base = urljoin(str(request.base_url), "img/")
+    page, offset, after_id = resolve_position(cursor, page, size)
+    next_cursor = None
 
-    # Подготавливаем данные менторов
-    mentor_list = []
-    mentor_data_list = []
-    base_url = str(request.base_url)
-
-    for mentor in mentors:
-        mentor_data = prepare_mentor_data(mentor, base_url)
-        mentor_data_list.append(mentor_data)
-        mentor_list.append(MentorFeedResponse(**mentor_data))
+    # Параметры профиля пользователя: используются для фильтрации и локальной оценки
+    preferences = mentor_feed_preferences(current_user)
+    filters = preferences if filtered else None
+    availability = availability_filters(free_days, free_days_match)
+    if availability:
+        filters = {**(filters or {}), **availability}
 
     # Determine which description to use for ranking (prompt or user description)
     description_for_ranking = prompt if prompt else (current_user.description if current_user else None)
-    
-    # Проверяем кеш, если есть описание для ранжирования
-    if description_for_ranking:
-        cache_key = redis_service.generate_feed_cache_key(
-            description_for_ranking,
-            mentor_data_list,
-            filtered,
-            page,
-            size,
-        )
-        cached_response = await redis_service.get_cache(cache_key)
-        if cached_response:
-            return FeedResponse(**cached_response)
 
-    if description_for_ranking:
-        mentors_for_ranking = [
-            {"id": m.id, "description": m.description or ""} for m in mentor_list
-        ]
+    if current_user and not prompt:
+        # Недавно активные зрители получают фоновый пересчет фида в первую очередь
+        await redis_service.touch_viewer(USERS_POOL, current_user.id)
 
-        ranked_mentor_ids = await interest_service.get_ranked_mentors(
-            mentors=mentors_for_ranking, user_description=description_for_ranking
+    if description_for_ranking:
+        # Ранжированный список кешируется целиком, страницы нарезаются из него
+        ranking = await get_mentor_ranking(
+            redis_service, filters, description_for_ranking, preferences, min_ids=offset + size
         )
-
-        mentor_dict = {m.id: m for m in mentor_list}
-
-        sorted_mentors = []
-        for mentor_id in ranked_mentor_ids:
-            if mentor_id in mentor_dict:
-                sorted_mentors.append(mentor_dict[mentor_id])
-
-        remaining_mentors = [m for m in mentor_list if m.id not in ranked_mentor_ids]
-        sorted_mentors.extend(remaining_mentors)
-
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        items = sorted_mentors[start_idx:end_idx]
+        page_ids = ranking["ids"][offset:offset + size]
+        total = ranking["total"]
+        mentor_dict = {mentor.id: mentor for mentor in await get_mentor_feed_rows(page_ids)}
+        if offset + size < total:
+            next_cursor = encode_cursor({"page": page + 1, "offset": offset + size})
     else:
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        items = mentor_list[start_idx:end_idx]
+        # Страница читается из базы в порядке id, следующая продолжается после ее последнего id
+        filters = filters or {}
+        mentors, total = await get_mentors_page(
+            size,
+            after_id=after_id,
+            offset=offset,
+            target_universities=filters.get("target_universities"),
+            admission_type=filters.get("admission_type"),
+            estimate_total=FEED_ESTIMATED_TOTAL,
+            free_days=filters.get("free_days"),
+            free_days_match=filters.get("free_days_match", "any"),
+        )
+        page_ids = [mentor.id for mentor in mentors]
+        mentor_dict = {mentor.id: mentor for mentor in mentors}
+        if page_ids and offset + size < total:
+            next_cursor = encode_cursor({"page": page + 1, "after": page_ids[-1]})
+
+    # Собираем ответ только для менторов текущей страницы
+    items = [
+        MentorFeedResponse(**prepare_mentor_data(mentor_dict[mentor_id], avatar_base))
+        for mentor_id in page_ids
+        if mentor_id in mentor_dict
+    ]
 
     total_pages = ceil(total / size) if total > 0 else 1
 
-    response = FeedResponse(
-        items=items, total=total, page=page, size=size, pages=total_pages
+    return FeedResponse(
+        items=items, total=total, page=page, size=size, pages=total_pages, next_cursor=next_cursor
     )
 
-    # Сохраняем результат в кеш, если есть описание для ранжирования
-    if description_for_ranking:
-        cache_key = redis_service.generate_feed_cache_key(
-            description_for_ranking,
-            mentor_data_list,
-            filtered,
-            page,
-            size,
-        )
-        await redis_service.set_cache(cache_key, response.dict())
-
-    return response
-
 
 @router.get("/users", response_model=FeedResponse)
 async def get_users_feed(
@@ -185,12 +191,14 @@ async def get_users_feed(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, le=100, description="Number of items per page"),
     prompt: Optional[str] = Query(None, description="Custom prompt for AI to determine order instead of mentor profile"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page (overrides page)"),
 ):
     """
     Fetch feed of users with pagination.
     If filtered=true, returns users that match the current mentor's profile.
     If filtered=false, returns all users.
     If prompt is provided, it will be used instead of mentor profile for determining order.
+    Pass next_cursor from the response as cursor to fetch the next page.
     """
     if page < 1:
         page = 1
@@ -199,94 +207,57 @@ async def get_users_feed(
     elif size > 100:
         size = 100
 
-    items = []
-    total = 0
+    # Базовый URL аватарок вычисляется один раз на запрос
+    avatar_base = urljoin(str(request.base_url), "img/")
+    page, offset, after_id = resolve_position(cursor, page, size)
+    next_cursor = None
 
-    # Получаем список пользователей
-    if filtered and current_mentor:
-        university = current_mentor.university
-        admission_type_value = ""
-
-        if current_mentor and current_mentor.admission_type:
-            admission_type_value = current_mentor.admission_type.value
-
-        users, total = await get_filtered_users(
-            university=university,
-            admission_type=admission_type_value,
-            page=1,
-            size=1000,
-        )
-    else:
-        users, total = await get_users(page=1, size=1000)
-
-    # Подготавливаем данные пользователей
-    user_list = []
-    user_data_list = []
-    base_url = str(request.base_url)
-
-    for user in users:
-        user_data = prepare_user_data(user, base_url)
-        user_data_list.append(user_data)
-        user_list.append(UserFeedResponse(**user_data))
+    # Параметры профиля ментора: используются для фильтрации и локальной оценки
+    preferences = user_feed_preferences(current_mentor)
+    filters = preferences if filtered else None
 
     # Determine which description to use for ranking (prompt or mentor description)
     description_for_ranking = prompt if prompt else (current_mentor.description if current_mentor else None)
-    
-    # Проверяем кеш, если есть описание для ранжирования
-    if description_for_ranking:
-        cache_key = redis_service.generate_feed_cache_key(
-            description_for_ranking,
-            user_data_list,
-            filtered,
-            page,
-            size,
-        )
-        cached_response = await redis_service.get_cache(cache_key)
-        if cached_response:
-            return FeedResponse(**cached_response)
 
-    if description_for_ranking:
-        users_for_ranking = [
-            {"id": u.id, "description": u.description or ""} for u in user_list
-        ]
+    if current_mentor and not prompt:
+        # Недавно активные зрители получают фоновый пересчет фида в первую очередь
+        await redis_service.touch_viewer(MENTORS_POOL, current_mentor.id)
 
-        ranked_user_ids = await interest_service.get_ranked_users(
-            users=users_for_ranking, mentor_description=description_for_ranking
+    if description_for_ranking:
+        # Ранжированный список кешируется целиком, страницы нарезаются из него
+        ranking = await get_user_ranking(
+            redis_service, filters, description_for_ranking, preferences, min_ids=offset + size
         )
-
-        user_dict = {u.id: u for u in user_list}
-
-        sorted_users = []
-        for user_id in ranked_user_ids:
-            if user_id in user_dict:
-                sorted_users.append(user_dict[user_id])
-
-        remaining_users = [u for u in user_list if u.id not in ranked_user_ids]
-        sorted_users.extend(remaining_users)
-
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        items = sorted_users[start_idx:end_idx]
+        page_ids = ranking["ids"][offset:offset + size]
+        total = ranking["total"]
+        user_dict = {user.id: user for user in await get_user_feed_rows(page_ids)}
+        if offset + size < total:
+            next_cursor = encode_cursor({"page": page + 1, "offset": offset + size})
     else:
-        start_idx = (page - 1) * size
-        end_idx = start_idx + size
-        items = user_list[start_idx:end_idx]
+        # Страница читается из базы в порядке id, следующая продолжается после ее последнего id
+        filters = filters or {}
+        users, total = await get_users_page(
+            size,
+            after_id=after_id,
+            offset=offset,
+            university=filters.get("university"),
+            admission_type=filters.get("admission_type"),
+            estimate_total=FEED_ESTIMATED_TOTAL,
+        )
+        page_ids = [user.id for user in users]
+        user_dict = {user.id: user for user in users}
+        if page_ids and offset + size < total:
+            next_cursor = encode_cursor({"page": page + 1, "after": page_ids[-1]})
+
+    # Собираем ответ только для пользователей текущей страницы
+    items = [
+        UserFeedResponse(**prepare_user_data(user_dict[user_id], avatar_base))
+        for user_id in page_ids
+        if user_id in user_dict
+    ]
 
     total_pages = ceil(total / size) if total > 0 else 1
 
-    response = FeedResponse(
-        items=items, total=total, page=page, size=size, pages=total_pages
+    return FeedResponse(
+        items=items, total=total, page=page, size=size, pages=total_pages, next_cursor=next_cursor
     )
-
-    # Сохраняем результат в кеш, если есть описание для ранжирования
-    if description_for_ranking:
-        cache_key = redis_service.generate_feed_cache_key(
-            description_for_ranking,
-            user_data_list,
-            filtered,
-            page,
-            size,
-        )
-        await redis_service.set_cache(cache_key, response.dict())
-
-    return response
@@ -1,7 +1,16 @@
+import os
+
 from fastapi import APIRouter, Response
 
 from src.repository.mentor_repository import get_mentors
 from src.repository.user_repository import get_users
+from src.services.interest_rating import llm_interest_service
+from src.services.feed_service import refresh_stats
+from src.services.feed_worker import feed_precompute_worker
+from src.services.principal_cache import principal_cache_stats
+from src.security.password_hasher import password_hasher
+from src.services.redis_service import redis_service
+from src.services.singleflight import ranking_singleflight
 # from src.repository.request_repository import get_requests_stats
 # from src.repository.match_repository import get_matches_stats
 # from src.repository.session_repository import get_sessions_stats
@@ -34,7 +43,8 @@ async def get_business_metrics():
     Служебный endpoint для prometheus, используется для получения метрик в формате OpenMetrics.
     Работает только изнутри.
     """
-    # Получаем данные из репозиториев
+    # Получаем данные из репозиториев (точное количество: оценка планировщика
+    # устаревает до ANALYZE)
     _, total_mentors = await get_mentors(page=1, size=1)
     _, total_students = await get_users(page=1, size=1)
 
@@ -65,7 +75,150 @@ async def get_business_metrics():
         "# HELP successful_matches Количество успешных пар ментор-ученик",
         "# TYPE successful_matches counter",
         f"successful_matches {metrics.successful_matches}",
-        
+    ]
+
+    # Метрики пула HTTP-соединений к API ранжирования
+    pool_stats = llm_interest_service.pool_stats()
+    prometheus_metrics += [
+        "# HELP llm_http_pool_max_connections Максимальный размер пула соединений к LLM API",
+        "# TYPE llm_http_pool_max_connections gauge",
+        f"llm_http_pool_max_connections {pool_stats['max_connections']}",
+        "# HELP llm_http_pool_open_connections Открытые соединения к LLM API",
+        "# TYPE llm_http_pool_open_connections gauge",
+        f"llm_http_pool_open_connections {pool_stats['open_connections']}",
+        "# HELP llm_http_pool_idle_connections Простаивающие keep-alive соединения к LLM API",
+        "# TYPE llm_http_pool_idle_connections gauge",
+        f"llm_http_pool_idle_connections {pool_stats['idle_connections']}",
+        "# HELP llm_requests_in_flight Запросы к LLM API в процессе выполнения",
+        "# TYPE llm_requests_in_flight gauge",
+        f"llm_requests_in_flight {pool_stats['requests_in_flight']}",
+        "# HELP llm_requests_total Количество запросов к LLM API",
+        "# TYPE llm_requests_total counter",
+        f"llm_requests_total {pool_stats['requests_total']}",
+        "# HELP llm_request_errors_total Количество неуспешных запросов к LLM API",
+        "# TYPE llm_request_errors_total counter",
+        f"llm_request_errors_total {pool_stats['errors_total']}",
+    ]
+
+    # Предохранитель и запасное ранжирование
+    breaker_stats = llm_interest_service.breaker.stats()
+    prometheus_metrics += [
+        "# HELP llm_circuit_breaker_state Состояние предохранителя LLM (0 - замкнут, 1 - полуоткрыт, 2 - разомкнут)",
+        "# TYPE llm_circuit_breaker_state gauge",
+        f"llm_circuit_breaker_state {breaker_stats['state']}",
+        "# HELP llm_circuit_breaker_opens_total Количество размыканий предохранителя LLM",
+        "# TYPE llm_circuit_breaker_opens_total counter",
+        f"llm_circuit_breaker_opens_total {breaker_stats['opens_total']}",
+        "# HELP llm_ranking_fallbacks_total Ранжирования, выполненные локально вместо LLM",
+        "# TYPE llm_ranking_fallbacks_total counter",
+    ]
+    prometheus_metrics += [
+        f'llm_ranking_fallbacks_total{{reason="{reason}"}} {count}'
+        for reason, count in llm_interest_service.fallbacks.items()
+    ]
+
+    # Объединение одновременных запросов ранжирования
+    singleflight_stats = ranking_singleflight.stats()
+    prometheus_metrics += [
+        "# HELP feed_ranking_in_flight Ранжирования фида в процессе выполнения",
+        "# TYPE feed_ranking_in_flight gauge",
+        f"feed_ranking_in_flight {singleflight_stats['in_flight']}",
+        "# HELP feed_ranking_executions_total Количество выполненных ранжирований фида",
+        "# TYPE feed_ranking_executions_total counter",
+        f"feed_ranking_executions_total {singleflight_stats['executions_total']}",
+        "# HELP feed_ranking_coalesced_total Запросы, получившие результат чужого ранжирования",
+        "# TYPE feed_ranking_coalesced_total counter",
+        f"feed_ranking_coalesced_total {singleflight_stats['coalesced_total']}",
+    ]
+
+    # Метрики фонового пересчета фидов
+    worker_stats = feed_precompute_worker.stats()
+    prometheus_metrics += [
+        "# HELP feed_precompute_queued Фиды в очереди на фоновый пересчет",
+        "# TYPE feed_precompute_queued gauge",
+        f"feed_precompute_queued {worker_stats['queued']}",
+        "# HELP feed_precompute_processed_total Фиды, пересчитанные в фоне",
+        "# TYPE feed_precompute_processed_total counter",
+        f"feed_precompute_processed_total {worker_stats['processed_total']}",
+        "# HELP feed_precompute_failed_total Ошибки фонового пересчета фидов",
+        "# TYPE feed_precompute_failed_total counter",
+        f"feed_precompute_failed_total {worker_stats['failed_total']}",
+        "# HELP feed_precompute_dropped_total Задачи пересчета, отброшенные из-за переполнения очереди",
+        "# TYPE feed_precompute_dropped_total counter",
+        f"feed_precompute_dropped_total {worker_stats['dropped_total']}",
+    ]
+
+    # Метрики stale-while-revalidate для кеша ранжирований
+    prometheus_metrics += [
+        "# HELP feed_ranking_stale_served_total Устаревшие ранжирования, отданные из кеша до обновления",
+        "# TYPE feed_ranking_stale_served_total counter",
+        f"feed_ranking_stale_served_total {refresh_stats['stale_served_total']}",
+        "# HELP feed_ranking_refreshes_total Фоновые обновления устаревших ранжирований",
+        "# TYPE feed_ranking_refreshes_total counter",
+        f"feed_ranking_refreshes_total {refresh_stats['refreshes_total']}",
+        "# HELP feed_ranking_refresh_failed_total Ошибки фонового обновления ранжирований",
+        "# TYPE feed_ranking_refresh_failed_total counter",
+        f"feed_ranking_refresh_failed_total {refresh_stats['refresh_failed_total']}",
+    ]
+
+    # Метрики L1-кеша; у каждого воркера uvicorn свои, поэтому с меткой pid
+    cache_stats = redis_service.local_cache_stats()
+    worker = f'worker="{os.getpid()}"'
+    prometheus_metrics += [
+        "# HELP local_cache_entries Записи в L1-кеше воркера",
+        "# TYPE local_cache_entries gauge",
+        f"local_cache_entries{{{worker}}} {cache_stats['entries']}",
+        "# HELP local_cache_hits_total Попадания в L1-кеш воркера",
+        "# TYPE local_cache_hits_total counter",
+        f"local_cache_hits_total{{{worker}}} {cache_stats['hits']}",
+        "# HELP local_cache_misses_total Промахи L1-кеша воркера",
+        "# TYPE local_cache_misses_total counter",
+        f"local_cache_misses_total{{{worker}}} {cache_stats['misses']}",
+        "# HELP local_cache_evictions_total Записи, вытесненные из L1-кеша по размеру",
+        "# TYPE local_cache_evictions_total counter",
+        f"local_cache_evictions_total{{{worker}}} {cache_stats['evictions']}",
+        "# HELP local_cache_invalidations_total Инвалидации L1-кеша воркера",
+        "# TYPE local_cache_invalidations_total counter",
+        f"local_cache_invalidations_total{{{worker}}} {cache_stats['invalidations']}",
+    ]
+
+    # Кеш снимков профиля для авторизации; счетчики тоже у каждого воркера свои
+    prometheus_metrics += [
+        "# HELP principal_cache_hits_total Запросы, авторизованные по снимку профиля из кеша",
+        "# TYPE principal_cache_hits_total counter",
+        f"principal_cache_hits_total{{{worker}}} {principal_cache_stats['hits_total']}",
+        "# HELP principal_cache_misses_total Запросы, для авторизации которых профиль читался из базы",
+        "# TYPE principal_cache_misses_total counter",
+        f"principal_cache_misses_total{{{worker}}} {principal_cache_stats['misses_total']}",
+        "# HELP principal_cache_invalidations_total Удаления снимков профиля из кеша",
+        "# TYPE principal_cache_invalidations_total counter",
+        f"principal_cache_invalidations_total{{{worker}}} {principal_cache_stats['invalidations_total']}",
+    ]
+
+    # Пул потоков bcrypt: время ожидания в очереди показывает нехватку PASSWORD_HASH_CONCURRENCY
+    hasher_stats = password_hasher.stats()
+    operations_count = sum(hasher_stats["operations"].values())
+    prometheus_metrics += [
+        "# HELP password_hash_operations_total Вычисления bcrypt (хеширование и проверка паролей)",
+        "# TYPE password_hash_operations_total counter",
+        *[
+            f'password_hash_operations_total{{{worker},operation="{operation}"}} {count}'
+            for operation, count in hasher_stats["operations"].items()
+        ],
+        "# HELP password_hash_queue_wait_seconds Ожидание свободного потока пула bcrypt",
+        "# TYPE password_hash_queue_wait_seconds summary",
+        f"password_hash_queue_wait_seconds_sum{{{worker}}} {hasher_stats['queue_wait_seconds']:.6f}",
+        f"password_hash_queue_wait_seconds_count{{{worker}}} {operations_count}",
+        "# HELP password_hash_duration_seconds Время вычисления bcrypt",
+        "# TYPE password_hash_duration_seconds summary",
+        f"password_hash_duration_seconds_sum{{{worker}}} {hasher_stats['hash_seconds']:.6f}",
+        f"password_hash_duration_seconds_count{{{worker}}} {operations_count}",
+        "# HELP password_rehashes_total Хеши, пересчитанные при входе из-за устаревшей стоимости",
+        "# TYPE password_rehashes_total counter",
+        f"password_rehashes_total{{{worker}}} {hasher_stats['rehashes']}",
+        "# HELP password_hash_in_flight Вычисления bcrypt в очереди и в работе",
+        "# TYPE password_hash_in_flight gauge",
+        f"password_hash_in_flight{{{worker}}} {hasher_stats['in_flight']}",
     ]
 
     # Возвращаем метрики в формате Prometheus
@@ -16,19 +16,16 @@ from src.schemas.request_schemas import (
     RequestResponseWithSender,
 )
 from src.schemas.schemas import MentorFeedResponse, UserFeedResponse
-from src.security.auth import get_optional_current_mentor, get_optional_current_user
+from src.security.auth import get_optional_current_principal
 from src.utils.constants import AVATAR_URL
 
 
 async def get_current_user_or_mentor(
-    user: User = Depends(get_optional_current_user),
-    mentor: Mentor = Depends(get_optional_current_mentor)
+    principal: Optional[Union[User, Mentor]] = Depends(get_optional_current_principal),
 ) -> Union[User, Mentor]:
     """Получить текущего пользователя или ментора."""
-    if user:
-        return user
-    if mentor:
-        return mentor
+    if principal:
+        return principal
     raise HTTPException(
         status_code=401,
         detail="Требуется аутентификация"
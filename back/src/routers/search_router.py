@@ -0,0 +1,156 @@
+import html
+from typing import Any, List, Literal, Optional, Tuple
+from urllib.parse import urljoin
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+
+from src.data.models import DayOfWeek
+from src.repository.mentor_repository import autocomplete_mentors, search_mentors
+from src.repository.search import HIGHLIGHT_START, HIGHLIGHT_STOP
+from src.repository.university_repository import search_universities
+from src.repository.user_repository import autocomplete_users, search_users
+from src.routers.feed_router import prepare_mentor_data, prepare_user_data
+from src.schemas.schemas import (
+    AutocompleteResponse,
+    MentorSearchHit,
+    MentorSuggestion,
+    SearchResponse,
+    UniversitySuggestion,
+    UserSearchHit,
+    UserSuggestion,
+)
+from src.services.feed_service import decode_cursor, encode_cursor
+from src.services.university_index import university_index
+
+router = APIRouter(
+    tags=["search"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def render_headline(headline: Optional[str]) -> Optional[str]:
+    """Экранирует фрагмент профиля и размечает совпадения тегом <mark>"""
+    if not headline:
+        return None
+    return (
+        html.escape(headline)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+def resolve_after(cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    """Пара (rank, id) последнего результата предыдущей страницы по курсору"""
+    if not cursor:
+        return None
+    try:
+        position = decode_cursor(cursor, float_keys=("rank",))
+        return float(position["rank"]), position["after"]
+    except (ValueError, KeyError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+
+def next_cursor(rows: list, size: int) -> Optional[str]:
+    # Запрашивается size + 1 строк: лишняя строка означает, что есть следующая страница
+    if len(rows) <= size:
+        return None
+    last = rows[size - 1]
+    return encode_cursor({"rank": last.rank, "after": last.id})
+
+
+def search_fields(row: Any) -> dict:
+    return {"rank": row.rank, "headline": render_headline(row.headline)}
+
+
+@router.get("/mentors", response_model=SearchResponse)
+async def search_mentors_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Search query (websearch syntax: words, \"phrases\", -exclusions, or)"),
+    size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page"),
+    free_days: Optional[List[DayOfWeek]] = Query(None, description="Only mentors free on these days (repeat the parameter)"),
+    free_days_match: Literal["any", "all"] = Query("any", description="Free on any of free_days or on all of them"),
+):
+    """
+    Full-text search of mentors by name, title, university and description.
+    Results are ordered by relevance; matches in the description are highlighted with <mark>.
+    free_days restricts the results to mentors available on those weekdays.
+    Pass next_cursor from the response as cursor to fetch the next page.
+    """
+    avatar_base = urljoin(str(request.base_url), "img/")
+    rows = await search_mentors(q, size + 1, resolve_after(cursor), free_days, free_days_match)
+    items = [
+        MentorSearchHit(**prepare_mentor_data(row, avatar_base), **search_fields(row))
+        for row in rows[:size]
+    ]
+    return SearchResponse(items=items, size=size, next_cursor=next_cursor(rows, size))
+
+
+@router.get("/users", response_model=SearchResponse)
+async def search_users_endpoint(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Search query (websearch syntax: words, \"phrases\", -exclusions, or)"),
+    size: int = Query(10, ge=1, le=100, description="Number of items per page"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor of the previous page"),
+):
+    """
+    Full-text search of users by name and description.
+    Results are ordered by relevance; matches in the description are highlighted with <mark>.
+    Pass next_cursor from the response as cursor to fetch the next page.
+    """
+    avatar_base = urljoin(str(request.base_url), "img/")
+    rows = await search_users(q, size + 1, resolve_after(cursor))
+    items = [
+        UserSearchHit(**prepare_user_data(row, avatar_base), **search_fields(row))
+        for row in rows[:size]
+    ]
+    return SearchResponse(items=items, size=size, next_cursor=next_cursor(rows, size))
+
+
+@router.get("/autocomplete/universities", response_model=AutocompleteResponse)
+async def autocomplete_universities_endpoint(
+    q: str = Query(..., min_length=1, max_length=100, description="Beginning of a university name, Cyrillic or Latin"),
+    size: int = Query(10, ge=1, le=50, description="Number of suggestions"),
+):
+    """
+    University suggestions for each keystroke.
+    Answered from the in-process prefix index; misspelled input with no prefix
+    matches falls back to trigram similarity in the database.
+    """
+    suggestions = await university_index.search(q, size)
+    if not suggestions and len(q.strip()) >= 3:
+        rows = await search_universities(q, size)
+        suggestions = [(row.id, row.name) for row in rows]
+    return AutocompleteResponse(
+        items=[UniversitySuggestion(id=university_id, name=name) for university_id, name in suggestions]
+    )
+
+
+@router.get("/autocomplete/mentors", response_model=AutocompleteResponse)
+async def autocomplete_mentors_endpoint(
+    q: str = Query(..., min_length=2, max_length=100, description="Mentor name or title, typos and transliteration allowed"),
+    size: int = Query(10, ge=1, le=50, description="Number of suggestions"),
+):
+    """Mentor suggestions by name and title, ordered by trigram similarity."""
+    rows = await autocomplete_mentors(q, size)
+    return AutocompleteResponse(
+        items=[
+            MentorSuggestion(id=row.id, name=row.name, login=row.login, title=row.title, university=row.university)
+            for row in rows
+        ]
+    )
+
+
+@router.get("/autocomplete/users", response_model=AutocompleteResponse)
+async def autocomplete_users_endpoint(
+    q: str = Query(..., min_length=2, max_length=100, description="User name, typos and transliteration allowed"),
+    size: int = Query(10, ge=1, le=50, description="Number of suggestions"),
+):
+    """User suggestions by name, ordered by trigram similarity."""
+    rows = await autocomplete_users(q, size)
+    return AutocompleteResponse(
+        items=[UserSuggestion(id=row.id, name=row.name, login=row.login) for row in rows]
+    )
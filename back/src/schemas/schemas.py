@@ -357,7 +357,61 @@ class FeedResponse(BaseModel):
     page: int
     size: int
     pages: int
+    next_cursor: Optional[str] = None
 
     class Config:
         """Pydantic config."""
         from_attributes = True
+
+
+class MentorSearchHit(MentorFeedResponse):
+    """Schema for mentor in search results."""
+
+    rank: float
+    headline: Optional[str] = None
+
+
+class UserSearchHit(UserFeedResponse):
+    """Schema for user in search results."""
+
+    rank: float
+    headline: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    """Schema for keyset-paginated search results."""
+
+    items: List[Union[MentorSearchHit, UserSearchHit]]
+    size: int
+    next_cursor: Optional[str] = None
+
+
+class UniversitySuggestion(BaseModel):
+    """Schema for university autocomplete suggestion."""
+
+    id: int
+    name: str
+
+
+class MentorSuggestion(BaseModel):
+    """Schema for mentor autocomplete suggestion."""
+
+    id: int
+    name: Optional[str] = None
+    login: str
+    title: Optional[str] = None
+    university: Optional[str] = None
+
+
+class UserSuggestion(BaseModel):
+    """Schema for user autocomplete suggestion."""
+
+    id: int
+    name: str
+    login: str
+
+
+class AutocompleteResponse(BaseModel):
+    """Schema for autocomplete suggestions, best match first."""
+
+    items: List[Union[UniversitySuggestion, MentorSuggestion, UserSuggestion]]
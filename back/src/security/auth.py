@@ -1,28 +1,35 @@
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple, Union
 
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
 
 from src.config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY, Roles
 from src.data.models import Mentor, User
 from src.repository.mentor_repository import get_mentor_by_login
 from src.repository.user_repository import get_user_by_login
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.security.password_hasher import password_hasher
+from src.services.principal_cache import get_principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/users/signin")
 oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/users/signin", auto_error=False)
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def hash_password(password: str) -> str:
+    """Хеш пароля, вычисленный в пуле потоков (не блокирует event loop)"""
+    return await password_hasher.hash(password)
+
 
+async def check_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Проверка пароля в пуле потоков.
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    Returns:
+        Признак совпадения и новый хеш, если стоимость сохраненного хеша
+        отличается от PASSWORD_BCRYPT_ROUNDS (его нужно сохранить), иначе None
+    """
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
 def create_access_token(
@@ -108,6 +115,13 @@ async def get_current_mentor(token: str = Depends(oauth2_scheme)) -> Mentor:
 
 
 async def get_optional_current_user(token: str = Depends(oauth2_scheme_optional)) -> Optional[User]:
+    """
+    Текущий пользователь или None.
+
+    Обычно возвращается объект из снимка кеша (см. principal_cache) с полями
+    id, login, name, is_active, description, target_universities,
+    admission_type и avatar_uuid — без запроса к базе.
+    """
     if not token:
         return None
     
@@ -119,7 +133,7 @@ async def get_optional_current_user(token: str = Depends(oauth2_scheme_optional)
         if login is None or role != Roles.USER:
             return None
             
-        user = await get_user_by_login(login)
+        user = await get_principal(Roles.USER, login)
         if user is None or not user.is_active:
             return None
             
@@ -129,6 +143,13 @@ async def get_optional_current_user(token: str = Depends(oauth2_scheme_optional)
 
 
 async def get_optional_current_mentor(token: str = Depends(oauth2_scheme_optional)) -> Optional[Mentor]:
+    """
+    Текущий ментор или None.
+
+    Обычно возвращается объект из снимка кеша (см. principal_cache) с полями
+    id, login, name, is_active, description, university, admission_type
+    и avatar_uuid — без запроса к базе.
+    """
     if not token:
         return None
     
@@ -140,10 +161,37 @@ async def get_optional_current_mentor(token: str = Depends(oauth2_scheme_optiona
         if login is None or role != Roles.MENTOR:
             return None
             
-        mentor = await get_mentor_by_login(login)
+        mentor = await get_principal(Roles.MENTOR, login)
         if mentor is None or not mentor.is_active:
             return None
             
         return mentor
     except (jwt.PyJWTError, HTTPException):
         return None
+
+
+async def get_optional_current_principal(
+    token: str = Depends(oauth2_scheme_optional),
+) -> Optional[Union[User, Mentor]]:
+    """
+    Текущий пользователь или ментор (по роли из токена) или None.
+
+    Для маршрутов, доступных обеим ролям: токен декодируется один раз,
+    профиль ищется только для роли из токена (см. principal_cache).
+    """
+    if not token:
+        return None
+
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    login = payload.get("sub")
+    role = payload.get("role")
+    if login is None or role not in (Roles.USER, Roles.MENTOR):
+        return None
+
+    principal = await get_principal(role, login)
+    if principal is None or not principal.is_active:
+        return None
+    return principal
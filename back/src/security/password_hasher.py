@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from src.config import PASSWORD_BCRYPT_ROUNDS, PASSWORD_HASH_CONCURRENCY
+
+
+class PasswordHasher:
+    """
+    Хеширование и проверка паролей bcrypt вне event loop.
+
+    Вызовы bcrypt выполняются в пуле из concurrency потоков (bcrypt отпускает
+    GIL), поэтому вход и регистрация не останавливают остальные запросы
+    воркера. Запросы сверх лимита ждут в очереди пула.
+    """
+
+    def __init__(self, rounds: int = PASSWORD_BCRYPT_ROUNDS, concurrency: int = PASSWORD_HASH_CONCURRENCY):
+        # rounds задает и желаемую стоимость: хеши с другой помечаются как требующие обновления
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.concurrency = concurrency
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        # Счетчики для метрик (обновляются из потоков пула)
+        self.operations = {"hash": 0, "verify": 0}
+        self.rehashes = 0
+        self.queue_wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.in_flight = 0
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        submitted = time.perf_counter()
+
+        def call() -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.operations[operation] += 1
+                    self.queue_wait_seconds += started - submitted
+                    self.hash_seconds += finished - started
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        """Хеш пароля с текущей стоимостью"""
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """
+        Проверить пароль и, если стоимость хеша устарела, вычислить новый.
+
+        Returns:
+            Признак совпадения и новый хеш (None, если обновлять не нужно)
+        """
+        valid, new_hash = await self._run("verify", self.context.verify_and_update, password, password_hash)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashes += 1
+        return valid, new_hash
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики для метрик"""
+        with self._lock:
+            return {
+                "operations": dict(self.operations),
+                "rehashes": self.rehashes,
+                "queue_wait_seconds": self.queue_wait_seconds,
+                "hash_seconds": self.hash_seconds,
+                "in_flight": self.in_flight,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
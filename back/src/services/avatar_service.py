@@ -8,6 +8,8 @@ from typing import Optional, Tuple
 from src.data.base import session_scope
 from src.repository.user_repository import update_user_avatar
 from src.repository.mentor_repository import update_mentor_avatar
+from src.config import Roles
+from src.services.principal_cache import invalidate_principal
 
 
 # Директория для хранения аватарок
@@ -82,9 +84,16 @@ async def save_avatar(
     # Обновляем ссылку на аватарку в БД
     async with session_scope() as db:
         if user_id:
-            await update_user_avatar(db, user_id, avatar_uuid)
+            login = await update_user_avatar(db, user_id, avatar_uuid)
         elif mentor_id:
-            await update_mentor_avatar(db, mentor_id, avatar_uuid)
+            login = await update_mentor_avatar(db, mentor_id, avatar_uuid)
+
+    # Ранжирования хранят только id, а аватарки читаются с каждой страницей,
+    # поэтому поколение пула не меняется; обновляется только снимок профиля
+    if user_id:
+        await invalidate_principal(Roles.USER, login)
+    elif mentor_id:
+        await invalidate_principal(Roles.MENTOR, login)
     
     return avatar_uuid, extension
 
@@ -114,6 +123,11 @@ async def delete_avatar(
         async with session_scope() as db:
             # Обновляем ссылку на аватарку в БД (устанавливаем None)
             if user_id:
-                await update_user_avatar(db, user_id, None)
+                login = await update_user_avatar(db, user_id, None)
             elif mentor_id:
-                await update_mentor_avatar(db, mentor_id, None) 
\ No newline at end of file
+                login = await update_mentor_avatar(db, mentor_id, None)
+
+        if user_id:
+            await invalidate_principal(Roles.USER, login)
+        elif mentor_id:
+            await invalidate_principal(Roles.MENTOR, login)
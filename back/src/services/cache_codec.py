@@ -0,0 +1,119 @@
+import json
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+try:
+    import zstandard as zstd
+except ImportError:  # pragma: no cover
+    try:
+        from backports import zstd
+    except ImportError:
+        zstd = None
+
+
+# Значение в кеше: MAGIC, версия формата, id сериализатора, id сжатия, данные.
+# 0xC1 не встречается ни в начале JSON, ни в msgpack, поэтому старые значения
+# (JSON-текст без заголовка) отличаются от новых по первому байту.
+MAGIC = 0xC1
+FORMAT_VERSION = 1
+HEADER_SIZE = 4
+
+Serializer = Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+Compressor = Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+
+
+def _json_dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+SERIALIZERS: Dict[str, Tuple[int, Optional[Serializer]]] = {
+    "json": (1, (_json_dumps, json.loads)),
+    "orjson": (2, (orjson.dumps, orjson.loads) if orjson else None),
+    "msgpack": (
+        3,
+        (
+            lambda value: msgpack.packb(value, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+        ) if msgpack else None,
+    ),
+}
+
+COMPRESSORS: Dict[str, Tuple[int, Optional[Compressor]]] = {
+    "none": (0, (bytes, bytes)),
+    "zlib": (1, (zlib.compress, zlib.decompress)),
+    "lz4": (2, (lz4_frame.compress, lz4_frame.decompress) if lz4_frame else None),
+    "zstd": (3, (zstd.compress, zstd.decompress) if zstd else None),
+}
+
+_serializers_by_id = {code: impl for code, impl in SERIALIZERS.values()}
+_compressors_by_id = {code: impl for code, impl in COMPRESSORS.values()}
+
+
+class CodecError(ValueError):
+    """Значение в кеше не удалось декодировать"""
+
+
+class CacheCodec:
+    """
+    Кодек значений кеша: сериализация и сжатие с версионированным заголовком.
+
+    Сжимаются только данные длиннее compression_threshold байт. Декодирование
+    определяет формат по заголовку, поэтому значения, записанные с другими
+    настройками (или старые JSON-значения без заголовка), читаются корректно.
+    """
+
+    def __init__(self, serializer: str = "json", compression: str = "none", compression_threshold: int = 1024):
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer: {serializer}")
+        if compression not in COMPRESSORS:
+            raise ValueError(f"Unknown cache compression: {compression}")
+        self.serializer_id, serializer_impl = SERIALIZERS[serializer]
+        self.compression_id, compressor_impl = COMPRESSORS[compression]
+        if serializer_impl is None:
+            raise ValueError(f"Cache serializer {serializer} is not installed")
+        if compressor_impl is None:
+            raise ValueError(f"Cache compression {compression} is not installed")
+        self._dumps, _ = serializer_impl
+        self._compress, _ = compressor_impl
+        self.compression_threshold = compression_threshold
+        self.name = f"{serializer}+{compression}"
+
+    def encode(self, value: Any) -> bytes:
+        data = self._dumps(value)
+        compression_id = 0
+        if self.compression_id and len(data) > self.compression_threshold:
+            data = self._compress(data)
+            compression_id = self.compression_id
+        return bytes((MAGIC, FORMAT_VERSION, self.serializer_id, compression_id)) + data
+
+    @staticmethod
+    def decode(data: bytes) -> Any:
+        if isinstance(data, str):
+            data = data.encode()
+        if not data or data[0] != MAGIC:
+            # Значение в старом формате (JSON-текст)
+            return json.loads(data)
+        if len(data) < HEADER_SIZE or data[1] != FORMAT_VERSION:
+            raise CodecError("Unsupported cache value header")
+        serializer = _serializers_by_id.get(data[2])
+        compressor = _compressors_by_id.get(data[3])
+        if serializer is None or compressor is None:
+            raise CodecError("Cache value codec is not available")
+        _, loads = serializer
+        _, decompress = compressor
+        return loads(decompress(data[HEADER_SIZE:]))
@@ -0,0 +1,72 @@
+import time
+from typing import Callable, Dict
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для вызовов внешнего API.
+
+    После failure_threshold подряд неудачных вызовов размыкается и перестает
+    пропускать запросы. Через recovery_timeout секунд пропускает один пробный
+    запрос: при успехе замыкается, при неудаче снова размыкается.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int,
+        recovery_timeout: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+        # Счетчики для метрик
+        self.opens_total = 0
+
+    def allow_request(self) -> bool:
+        """Можно ли сейчас обращаться к API."""
+        if self.state == self.OPEN and self._clock() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            # В полуоткрытом состоянии пропускаем только один пробный запрос
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        """Учитывает успешный вызов."""
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        """Учитывает неудачный вызов (ошибку или превышение дедлайна)."""
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opens_total += 1
+            self.state = self.OPEN
+            self.opened_at = self._clock()
+
+    def stats(self) -> Dict[str, int]:
+        """Состояние для экспорта в метрики (0 - замкнут, 1 - полуоткрыт, 2 - разомкнут)."""
+        return {
+            "state": {self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[self.state],
+            "consecutive_failures": self.consecutive_failures,
+            "opens_total": self.opens_total,
+        }
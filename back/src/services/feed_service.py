@@ -0,0 +1,578 @@
+import asyncio
+import base64
+import json
+import logging
+import math
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.data.models import DayOfWeek, Mentor, User
+from src.repository.feed_ranking_repository import (
+    get_feed_ranking,
+    get_max_feed_ranking_generation,
+    save_feed_ranking,
+)
+from src.repository.mentor_repository import get_mentor_candidates
+from src.repository.user_repository import get_user_candidates
+from src.config import (
+    FEED_CANDIDATE_LIMIT,
+    FEED_DEGRADED_CACHE_TTL,
+    FEED_RANKING_EARLY_REFRESH_BETA,
+    FEED_RANKING_LOCK_TIMEOUT,
+    FEED_RANKING_SOFT_TTL,
+    FEED_RANKING_STORE_ENABLED,
+    FEED_STREAMING_RANKING,
+    REDIS_CACHE_TTL,
+)
+from src.services.interest_rating import (
+    get_interest_service,
+    merge_ranked_ids,
+    ranking_degraded,
+)
+from src.services.redis_service import MENTORS_POOL, USERS_POOL, RedisService
+from src.services.singleflight import ranking_singleflight
+
+logger = logging.getLogger(__name__)
+
+interest_service = get_interest_service()
+
+
+def encode_cursor(position: Dict[str, Any]) -> str:
+    """Кодирует позицию в фиде в непрозрачный курсор."""
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, float_keys: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    """
+    Декодирует курсор, выданный encode_cursor.
+
+    Args:
+        cursor: Курсор
+        float_keys: Ключи, значения которых могут быть дробными (например, релевантность)
+
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict) or not all(
+        isinstance(value, (int, float) if key in float_keys else int) and value >= 0
+        for key, value in position.items()
+    ):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+def mentor_feed_preferences(user: Optional[User]) -> Optional[Dict[str, Any]]:
+    """Параметры профиля пользователя для фильтрации и локальной оценки менторов."""
+    if user is None:
+        return None
+    return {
+        "target_universities": sorted(user.target_universities or []),
+        "admission_type": user.admission_type.value if user.admission_type else "",
+    }
+
+
+def user_feed_preferences(mentor: Optional[Mentor]) -> Optional[Dict[str, Any]]:
+    """Параметры профиля ментора для фильтрации и локальной оценки пользователей."""
+    if mentor is None:
+        return None
+    return {
+        "university": mentor.university,
+        "admission_type": mentor.admission_type.value if mentor.admission_type else "",
+    }
+
+
+# Ключи фильтра доступности менторов в словаре фильтров фида
+AVAILABILITY_FILTER_KEYS = ("free_days", "free_days_match")
+
+# Поля профиля, от которых зависят ранжирование и фильтры фида; изменение
+# остальных (пароль, контакты, аватарка) не делает ранжирования неактуальными
+MENTOR_RANKING_FIELDS = frozenset({"description", "university", "admission_type", "free_days"})
+USER_RANKING_FIELDS = frozenset({"description", "target_universities", "admission_type"})
+
+
+def availability_filters(
+    free_days: Optional[List[DayOfWeek]], free_days_match: str = "any"
+) -> Optional[Dict[str, Any]]:
+    """
+    Фильтр доступности менторов для словаря фильтров фида.
+
+    Дни приводятся к порядку недели, чтобы один и тот же набор дней давал
+    один ключ кеша ранжирования.
+    """
+    if not free_days:
+        return None
+    days = [day.value for day in DayOfWeek if day in free_days]
+    return {"free_days": days, "free_days_match": free_days_match}
+
+
+def ranking_scope(
+    filters: Optional[Dict[str, Any]], preferences: Optional[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """
+    Часть ключа кеша, зависящая от зрителя.
+
+    Фильтры профиля совпадают с параметрами профиля, поэтому в ключ попадают
+    параметры профиля (они влияют на локальную оценку), признак фильтрации
+    по профилю и фильтр доступности, если он задан.
+    """
+    availability = {key: filters[key] for key in AVAILABILITY_FILTER_KEYS if filters and key in filters}
+    if not preferences:
+        return availability or None
+    profile_filtered = filters is not None and any(key not in AVAILABILITY_FILTER_KEYS for key in filters)
+    return {"filtered": profile_filtered, **preferences, **availability}
+
+
+class RankingProgress:
+    """
+    Частично готовое потоковое ранжирование.
+
+    Пока ранжировщик присылает id, запросы могут забрать уже известный
+    префикс списка; после завершения доступен полный результат.
+    """
+
+    def __init__(self):
+        self.ids: List[Any] = []
+        self.total: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def consume(self, total: int, stream: AsyncIterator[Any]) -> List[Any]:
+        """Читает поток id ранжировщика, оповещая ожидающих о каждом новом id."""
+        self.total = total
+        async for item_id in stream:
+            self.ids.append(item_id)
+            self._notify()
+        return self.ids
+
+    def finish(self, task: "asyncio.Future") -> None:
+        """Фиксирует итог фонового ранжирования (колбэк завершения задачи)."""
+        if task.cancelled():
+            self.error = asyncio.CancelledError()
+        elif task.exception() is not None:
+            self.error = task.exception()
+        else:
+            self.result = task.result()
+        self.done = True
+        self._notify()
+
+    async def wait(self, count: int) -> Dict[str, Any]:
+        """
+        Ждет, пока станут известны первые count id или ранжирование завершится.
+
+        Returns:
+            Полный результат или префикс ранжированного списка с общим количеством
+        """
+        while not self.done and (self.total is None or len(self.ids) < count):
+            await self._changed.wait()
+        if self.error is not None:
+            raise self.error
+        if self.result is not None:
+            return self.result
+        return {"ids": list(self.ids), "total": self.total}
+
+
+# Потоковые ранжирования, идущие в этом процессе, по ключу кеша
+_ranking_streams: Dict[str, RankingProgress] = {}
+
+
+async def load_mentor_candidates(
+    filters: Optional[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Загружает кандидатов-менторов в виде словарей для ранжировщика.
+
+    Загружается не более FEED_CANDIDATE_LIMIT кандидатов и только нужные поля,
+    поэтому общее количество в ранжированном фиде равно числу кандидатов.
+
+    Args:
+        filters: Параметры фильтрации (target_universities, admission_type,
+            free_days, free_days_match) или None
+
+    Returns:
+        Список кандидатов и их количество
+    """
+    filters = filters or {}
+    mentors = await get_mentor_candidates(
+        FEED_CANDIDATE_LIMIT,
+        target_universities=filters.get("target_universities"),
+        admission_type=filters.get("admission_type"),
+        free_days=filters.get("free_days"),
+        free_days_match=filters.get("free_days_match", "any"),
+    )
+
+    mentors_for_ranking = [
+        {
+            "id": mentor.id,
+            "description": mentor.description or "",
+            "university": mentor.university,
+            "admission_type": mentor.admission_type.value if mentor.admission_type else None,
+        }
+        for mentor in mentors
+    ]
+    return mentors_for_ranking, len(mentors_for_ranking)
+
+
+async def load_user_candidates(
+    filters: Optional[Dict[str, Any]],
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Загружает кандидатов-пользователей в виде словарей для ранжировщика.
+
+    Загружается не более FEED_CANDIDATE_LIMIT кандидатов и только нужные поля,
+    поэтому общее количество в ранжированном фиде равно числу кандидатов.
+
+    Args:
+        filters: Параметры фильтрации (university, admission_type) или None
+
+    Returns:
+        Список кандидатов и их количество
+    """
+    filters = filters or {}
+    users = await get_user_candidates(
+        FEED_CANDIDATE_LIMIT,
+        university=filters.get("university"),
+        admission_type=filters.get("admission_type"),
+    )
+
+    users_for_ranking = [
+        {
+            "id": user.id,
+            "description": user.description or "",
+            "target_universities": user.target_universities or [],
+            "admission_type": user.admission_type.value if user.admission_type else None,
+        }
+        for user in users
+    ]
+    return users_for_ranking, len(users_for_ranking)
+
+
+async def compute_mentor_ranking(
+    filters: Optional[Dict[str, Any]],
+    description: str,
+    preferences: Optional[Dict[str, Any]] = None,
+    progress: Optional[RankingProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Загружает кандидатов-менторов и ранжирует их по описанию.
+
+    Args:
+        filters: Параметры фильтрации (target_universities, admission_type) или None
+        description: Описание пользователя или пользовательский промпт
+        preferences: Параметры профиля пользователя для локальной оценки
+        progress: Если передан, ранжирование читается потоком и публикуется в него
+
+    Returns:
+        Словарь с ранжированным списком id (ids) и общим количеством менторов (total)
+    """
+    mentors_for_ranking, total = await load_mentor_candidates(filters)
+    if progress is None:
+        ranked_ids = await interest_service.get_ranked_mentors(
+            mentors=mentors_for_ranking, user_description=description, preferences=preferences
+        )
+    else:
+        ranked_ids = await progress.consume(
+            total,
+            interest_service.stream_ranked_mentors(
+                mentors=mentors_for_ranking, user_description=description, preferences=preferences
+            ),
+        )
+    ids = merge_ranked_ids(ranked_ids, [mentor["id"] for mentor in mentors_for_ranking])
+    return {"ids": ids, "total": total}
+
+
+async def compute_user_ranking(
+    filters: Optional[Dict[str, Any]],
+    description: str,
+    preferences: Optional[Dict[str, Any]] = None,
+    progress: Optional[RankingProgress] = None,
+) -> Dict[str, Any]:
+    """
+    Загружает кандидатов-пользователей и ранжирует их по описанию.
+
+    Args:
+        filters: Параметры фильтрации (university, admission_type) или None
+        description: Описание ментора или пользовательский промпт
+        preferences: Параметры профиля ментора для локальной оценки
+        progress: Если передан, ранжирование читается потоком и публикуется в него
+
+    Returns:
+        Словарь с ранжированным списком id (ids) и общим количеством пользователей (total)
+    """
+    users_for_ranking, total = await load_user_candidates(filters)
+    if progress is None:
+        ranked_ids = await interest_service.get_ranked_users(
+            users=users_for_ranking, mentor_description=description, preferences=preferences
+        )
+    else:
+        ranked_ids = await progress.consume(
+            total,
+            interest_service.stream_ranked_users(
+                users=users_for_ranking, mentor_description=description, preferences=preferences
+            ),
+        )
+    ids = merge_ranked_ids(ranked_ids, [user["id"] for user in users_for_ranking])
+    return {"ids": ids, "total": total}
+
+
+def is_stale(
+    ranking: Dict[str, Any],
+    now: Optional[float] = None,
+    beta: float = FEED_RANKING_EARLY_REFRESH_BETA,
+    rand: Callable[[], float] = random.random,
+) -> bool:
+    """
+    Проверяет, пора ли обновлять закешированное ранжирование.
+
+    Кроме истечения мягкого TTL, обновление с небольшой вероятностью
+    запускается заранее (алгоритм XFetch): чем дольше ранжирование
+    вычислялось и чем ближе срок, тем выше вероятность.
+    """
+    fresh_until = ranking.get("fresh_until")
+    if fresh_until is None:
+        return False
+    now = time.time() if now is None else now
+    compute_time = ranking.get("compute_time") or 0
+    if beta > 0 and compute_time > 0:
+        now -= compute_time * beta * math.log(1.0 - rand())
+    return now >= fresh_until
+
+
+# Фоновые обновления устаревших ранжирований в этом процессе, по ключу кеша
+_refreshes: Dict[str, asyncio.Future] = {}
+
+# Счетчики stale-while-revalidate для метрик
+refresh_stats = {"stale_served_total": 0, "refreshes_total": 0, "refresh_failed_total": 0}
+
+
+async def _refresh(
+    redis_service: RedisService,
+    cache_key: str,
+    compute_and_cache: Callable[[], Awaitable[Dict[str, Any]]],
+) -> None:
+    # Обновляет только процесс, взявший блокировку; остальные продолжают
+    # отдавать устаревшее значение
+    lock = await redis_service.acquire_lock(f"refresh:{cache_key}", FEED_RANKING_LOCK_TIMEOUT)
+    if lock is None:
+        return
+    try:
+        # Другой процесс мог обновить ключ, пока мы ждали блокировку
+        current = await redis_service.get_cache(cache_key)
+        if current is not None and not is_stale(current, beta=0):
+            return
+        refresh_stats["refreshes_total"] += 1
+        await compute_and_cache()
+        # Устаревшая копия могла остаться в L1-кешах других воркеров
+        await redis_service.publish_invalidation(cache_key)
+    except Exception:
+        refresh_stats["refresh_failed_total"] += 1
+        logger.exception("Failed to refresh feed ranking %s", cache_key)
+    finally:
+        await redis_service.release_lock(lock)
+
+
+def _schedule_refresh(
+    redis_service: RedisService,
+    cache_key: str,
+    compute_and_cache: Callable[[], Awaitable[Dict[str, Any]]],
+) -> None:
+    if cache_key in _refreshes:
+        return
+    task = asyncio.ensure_future(_refresh(redis_service, cache_key, compute_and_cache))
+    _refreshes[cache_key] = task
+    task.add_done_callback(lambda _: _refreshes.pop(cache_key, None))
+
+
+def register_generation_seeds(redis_service: RedisService) -> None:
+    """
+    Восстанавливать поколения пулов фида по ранжированиям в Postgres.
+
+    Без этого после сброса Redis счетчик начался бы с нуля: сохраненные
+    ранжирования перестали бы находиться, а после новых увеличений счетчика
+    старые ранжирования снова совпали бы с текущим поколением.
+    """
+    if not FEED_RANKING_STORE_ENABLED:
+        return
+    for pool in (MENTORS_POOL, USERS_POOL):
+        redis_service.generation_seeds[pool] = lambda pool=pool: get_max_feed_ranking_generation(pool)
+
+
+async def load_stored_ranking(cache_key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Читает ранжирование из Postgres (если Redis его потерял).
+
+    Ранжирования старше жесткого TTL (REDIS_CACHE_TTL) не возвращаются.
+    Ошибки базы не должны ломать фид, поэтому в этом случае возвращается None.
+
+    Returns:
+        Ранжирование и оставшийся срок его жизни в секундах или None
+    """
+    if not FEED_RANKING_STORE_ENABLED:
+        return None
+    try:
+        stored = await get_feed_ranking(cache_key)
+    except Exception:
+        logger.exception("Failed to read stored feed ranking %s", cache_key)
+        return None
+    if stored is None:
+        return None
+    computed_at = stored.pop("computed_at")
+    remaining = int(computed_at + REDIS_CACHE_TTL - time.time())
+    if remaining <= 0:
+        return None
+    stored["fresh_until"] = computed_at + min(FEED_RANKING_SOFT_TTL, REDIS_CACHE_TTL / 2)
+    return stored, remaining
+
+
+async def store_ranking(
+    cache_key: str, pool: str, generation: int, description: str, ranking: Dict[str, Any]
+) -> None:
+    """Сохраняет ранжирование в Postgres; ошибки только логируются."""
+    if not FEED_RANKING_STORE_ENABLED:
+        return
+    try:
+        await save_feed_ranking(
+            cache_key,
+            pool,
+            generation,
+            RedisService.description_digest(description),
+            ranking["ids"],
+            ranking["total"],
+        )
+    except Exception:
+        logger.exception("Failed to store feed ranking %s", cache_key)
+
+
+async def _get_ranking(
+    redis_service: RedisService,
+    cache_key: str,
+    compute: Callable[[Optional[RankingProgress]], Awaitable[Dict[str, Any]]],
+    min_ids: Optional[int],
+    pool: str,
+    generation: int,
+    description: str,
+) -> Dict[str, Any]:
+    async def compute_and_cache(progress: Optional[RankingProgress] = None) -> Dict[str, Any]:
+        ranking_degraded.set(False)
+        started = time.monotonic()
+        ranking = await compute(progress)
+        # Запасное ранжирование кешируем ненадолго, чтобы быстрее вернуться к LLM
+        ttl = FEED_DEGRADED_CACHE_TTL if ranking_degraded.get() else REDIS_CACHE_TTL
+        # Мягкий TTL не больше половины жесткого, чтобы у обновления было окно
+        ranking["fresh_until"] = time.time() + min(FEED_RANKING_SOFT_TTL, ttl / 2)
+        ranking["compute_time"] = round(time.monotonic() - started, 3)
+        if ranking_degraded.get():
+            await redis_service.set_cache(cache_key, ranking, FEED_DEGRADED_CACHE_TTL)
+        else:
+            await redis_service.set_cache(cache_key, ranking)
+            # Запасные ранжирования в Postgres не попадают
+            await store_ranking(cache_key, pool, generation, description, ranking)
+        return ranking
+
+    ranking = await redis_service.get_cache(cache_key)
+    if ranking is None:
+        # Redis мог потерять ключ (перезапуск, вытеснение): читаем из Postgres
+        stored = await load_stored_ranking(cache_key)
+        if stored is not None:
+            # Срок жизни в Redis отсчитывается от вычисления, а не от чтения
+            ranking, ttl = stored
+            await redis_service.set_cache(cache_key, ranking, ttl)
+    if ranking is not None:
+        # Устаревшее значение отдаем сразу, а обновляем в фоне
+        if is_stale(ranking):
+            refresh_stats["stale_served_total"] += 1
+            _schedule_refresh(redis_service, cache_key, compute_and_cache)
+        return ranking
+
+    if not min_ids or not FEED_STREAMING_RANKING:
+        return await ranking_singleflight.do(cache_key, compute_and_cache)
+
+    # Ранжирование идет в фоне и дописывается в кеш целиком, а запрос
+    # возвращается, как только известны первые min_ids id
+    progress = _ranking_streams.get(cache_key)
+    if progress is None:
+        progress = RankingProgress()
+        _ranking_streams[cache_key] = progress
+        task = asyncio.ensure_future(
+            ranking_singleflight.do(cache_key, lambda: compute_and_cache(progress))
+        )
+
+        def on_done(task: asyncio.Future, progress: RankingProgress = progress) -> None:
+            _ranking_streams.pop(cache_key, None)
+            progress.finish(task)
+
+        task.add_done_callback(on_done)
+    return await progress.wait(min_ids)
+
+
+async def get_mentor_ranking(
+    redis_service: RedisService,
+    filters: Optional[Dict[str, Any]],
+    description: str,
+    preferences: Optional[Dict[str, Any]] = None,
+    min_ids: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Возвращает ранжированный список менторов из кеша или вычисляет его.
+
+    Одновременные запросы с одинаковым ключом объединяются: ранжирование
+    выполняется один раз, остальные запросы ждут его результата. Если
+    передан min_ids, ранжирование читается потоком и результат может
+    содержать только первые min_ids (или больше) id; полный список
+    дописывается в кеш в фоне.
+    """
+    generation = await redis_service.get_generation(MENTORS_POOL)
+    cache_key = redis_service.generate_ranking_cache_key(
+        MENTORS_POOL, generation, description, ranking_scope(filters, preferences)
+    )
+    return await _get_ranking(
+        redis_service,
+        cache_key,
+        lambda progress: compute_mentor_ranking(filters, description, preferences, progress),
+        min_ids,
+        MENTORS_POOL,
+        generation,
+        description,
+    )
+
+
+async def get_user_ranking(
+    redis_service: RedisService,
+    filters: Optional[Dict[str, Any]],
+    description: str,
+    preferences: Optional[Dict[str, Any]] = None,
+    min_ids: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Возвращает ранжированный список пользователей из кеша или вычисляет его.
+
+    Одновременные запросы с одинаковым ключом объединяются: ранжирование
+    выполняется один раз, остальные запросы ждут его результата. Если
+    передан min_ids, ранжирование читается потоком и результат может
+    содержать только первые min_ids (или больше) id; полный список
+    дописывается в кеш в фоне.
+    """
+    generation = await redis_service.get_generation(USERS_POOL)
+    cache_key = redis_service.generate_ranking_cache_key(
+        USERS_POOL, generation, description, ranking_scope(filters, preferences)
+    )
+    return await _get_ranking(
+        redis_service,
+        cache_key,
+        lambda progress: compute_user_ranking(filters, description, preferences, progress),
+        min_ids,
+        USERS_POOL,
+        generation,
+        description,
+    )
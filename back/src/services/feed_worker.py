@@ -0,0 +1,170 @@
+import asyncio
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config import (
+    FEED_PRECOMPUTE_ACTIVE_WINDOW,
+    FEED_PRECOMPUTE_CONCURRENCY,
+    FEED_PRECOMPUTE_MAX_VIEWERS,
+    FEED_PRECOMPUTE_QUEUE_SIZE,
+)
+from src.repository.mentor_repository import get_mentor_by_id
+from src.repository.user_repository import get_users_by_ids
+from src.services.feed_service import (
+    get_mentor_ranking,
+    get_user_ranking,
+    mentor_feed_preferences,
+    user_feed_preferences,
+)
+from src.services.redis_service import MENTORS_POOL, USERS_POOL, RedisService, redis_service
+
+logger = logging.getLogger(__name__)
+
+
+class FeedPrecomputeWorker:
+    """
+    Фоновый пересчет ранжированных фидов после изменения профилей.
+
+    Регистрация или изменение профиля сбрасывает кеш ранжирований своего пула
+    (через поколение), поэтому фиды недавно активных зрителей противоположной
+    стороны пересчитываются заранее, а не на первом запросе. Задачи лежат в
+    очереди с приоритетом по времени последней активности зрителя (самые
+    свежие первыми) и выполняются не более чем concurrency одновременно.
+
+    Прогревается фильтрованный фид по описанию профиля — вариант по умолчанию
+    в feed_router. Пересчет идет через get_*_ranking, поэтому уже
+    закешированные фиды не пересчитываются, а совпадающие с запросами
+    вычисления объединяются.
+    """
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        concurrency: int = FEED_PRECOMPUTE_CONCURRENCY,
+        queue_size: int = FEED_PRECOMPUTE_QUEUE_SIZE,
+        max_viewers: int = FEED_PRECOMPUTE_MAX_VIEWERS,
+        active_window: int = FEED_PRECOMPUTE_ACTIVE_WINDOW,
+    ):
+        self.redis_service = redis_service
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_viewers = max_viewers
+        self.active_window = active_window
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._pending: Set[Tuple[str, int]] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+
+        # Счетчики для метрик
+        self.processed_total = 0
+        self.failed_total = 0
+        self.dropped_total = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        """Запускает обработчики очереди (вызывается при старте приложения)."""
+        if self.running:
+            return
+        self._queue = asyncio.PriorityQueue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Останавливает обработчики, невыполненные задачи отбрасываются."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._pending.clear()
+
+    def enqueue(self, pool: str, viewer_id: int, last_active: float) -> bool:
+        """
+        Ставит пересчет фида зрителя в очередь.
+
+        Args:
+            pool: Пул зрителя (USERS_POOL смотрит менторов, MENTORS_POOL — пользователей)
+            viewer_id: ID зрителя
+            last_active: Время последней активности зрителя (приоритет)
+
+        Returns:
+            True, если задача поставлена в очередь
+        """
+        if self._queue is None or (pool, viewer_id) in self._pending:
+            return False
+        try:
+            self._queue.put_nowait((-last_active, next(self._sequence), pool, viewer_id))
+        except asyncio.QueueFull:
+            self.dropped_total += 1
+            return False
+        self._pending.add((pool, viewer_id))
+        return True
+
+    async def notify_user_changed(self, user_id: int) -> None:
+        """Пользователь зарегистрировался или изменил профиль."""
+        await self._notify(USERS_POOL, user_id, viewers_pool=MENTORS_POOL)
+
+    async def notify_mentor_changed(self, mentor_id: int) -> None:
+        """Ментор зарегистрировался или изменил профиль."""
+        await self._notify(MENTORS_POOL, mentor_id, viewers_pool=USERS_POOL)
+
+    async def _notify(self, pool: str, changed_id: int, viewers_pool: str) -> None:
+        if not self.running:
+            return
+        now = time.time()
+        # Описание самого зрителя могло измениться — его фид считаем первым
+        self.enqueue(pool, changed_id, now)
+        viewers = await self.redis_service.get_active_viewers(
+            viewers_pool, now - self.active_window, self.max_viewers
+        )
+        for viewer_id, last_active in viewers:
+            self.enqueue(viewers_pool, viewer_id, last_active)
+
+    async def _run(self) -> None:
+        while True:
+            _, _, pool, viewer_id = await self._queue.get()
+            self._pending.discard((pool, viewer_id))
+            try:
+                await self.refresh(pool, viewer_id)
+                self.processed_total += 1
+            except Exception:
+                self.failed_total += 1
+                logger.exception("Failed to precompute feed for %s %s", pool, viewer_id)
+            finally:
+                self._queue.task_done()
+
+    async def refresh(self, pool: str, viewer_id: int) -> None:
+        """Пересчитывает и кеширует фид одного зрителя."""
+        if pool == USERS_POOL:
+            users = await get_users_by_ids([viewer_id])
+            if not users or not users[0].description:
+                return
+            preferences = mentor_feed_preferences(users[0])
+            await get_mentor_ranking(
+                self.redis_service, preferences, users[0].description, preferences
+            )
+        else:
+            mentor = await get_mentor_by_id(viewer_id)
+            if mentor is None or not mentor.description:
+                return
+            preferences = user_feed_preferences(mentor)
+            await get_user_ranking(
+                self.redis_service, preferences, mentor.description, preferences
+            )
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики для экспорта в метрики."""
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "processed_total": self.processed_total,
+            "failed_total": self.failed_total,
+            "dropped_total": self.dropped_total,
+        }
+
+
+# Singleton instance
+feed_precompute_worker = FeedPrecomputeWorker(redis_service)
@@ -1,30 +1,504 @@
 import os
+import re
 import json
+import asyncio
+import math
+import zlib
+import logging
+import importlib.util
 import httpx
-from typing import List, Dict, Any
+import numpy as np
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Callable, Awaitable, AsyncIterator, Tuple
+
+from src.config import (
+    FEED_RANKER,
+    HYBRID_STAGE_ONE_SCORER,
+    HYBRID_TOP_K,
+    LLM_BREAKER_FAILURE_THRESHOLD,
+    LLM_BREAKER_RECOVERY_TIMEOUT,
+    LLM_CHUNK_CONCURRENCY,
+    LLM_CHUNK_TOKEN_BUDGET,
+    LLM_HTTP2,
+    LLM_API_URL,
+    LLM_KEEPALIVE_EXPIRY,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_MODEL,
+    LLM_RANKING_DEADLINE,
+    LLM_TIMEOUT,
+    LOCAL_ADMISSION_MATCH_WEIGHT,
+    LOCAL_RANKER_DIM,
+    LOCAL_UNIVERSITY_MATCH_WEIGHT,
+)
+from src.services.circuit_breaker import CircuitBreaker
+
+
+logger = logging.getLogger(__name__)
+
+# Выставляется, если ранжирование в текущем контексте выполнено запасным способом
+ranking_degraded: ContextVar[bool] = ContextVar("ranking_degraded", default=False)
+
+
+class IncrementalIdParser:
+    """
+    Потоковый разбор JSON-массива id из ответа модели.
+
+    Куски текста подаются по мере поступления, id возвращаются, как только
+    они полностью прочитаны (за ними следует разделитель). Markdown-ограждение
+    и текст до открывающей скобки игнорируются.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self._token: List[str] = []
+
+    def _flush(self) -> List[str]:
+        if not self._token:
+            return []
+        token = "".join(self._token)
+        self._token = []
+        return [token]
+
+    def feed(self, chunk: str) -> List[str]:
+        """Принимает очередной кусок ответа и возвращает полностью прочитанные id."""
+        ids: List[str] = []
+        for char in chunk:
+            if self.finished:
+                break
+            if not self.started:
+                self.started = char == "["
+                continue
+            if char == "]":
+                ids.extend(self._flush())
+                self.finished = True
+            elif char.isalnum() or char in "-_":
+                self._token.append(char)
+            else:
+                # Запятая, кавычки и пробелы завершают текущий id
+                ids.extend(self._flush())
+        return ids
+
+    def close(self) -> List[str]:
+        """Возвращает последний id, если ответ оборвался без закрывающей скобки."""
+        return [] if self.finished else self._flush()
+
 
 class InterestRatingService:
     """Сервис для ранжирования менторов и пользователей по интересности на основе их описаний."""
     
-    def __init__(self):
+    def __init__(self, fallback: Optional["LocalInterestRatingService"] = None):
         # Получаем API ключ из переменной окружения или используем значение по умолчанию
         self.api_key = os.getenv("GEMINI_API_KEY", "sk-9c33e1ecb15640c8b060fe63eeaea71c")
-        self.api_url = "https://chat.batsura.ru/api/chat/completions"
-        
-    async def get_ranked_mentors(self, mentors: List[Dict[str, Any]], user_description: str) -> List[str]:
+        self.api_url = LLM_API_URL
+        self.model = LLM_MODEL
+
+        # Один долгоживущий клиент с пулом соединений на весь процесс
+        self.limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        )
+        self.http2 = LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        if LLM_HTTP2 and not self.http2:
+            logger.warning("LLM_HTTP2 is enabled but the h2 package is not installed, using HTTP/1.1")
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+        # Бюджет времени на ранжирование и предохранитель от недоступного API
+        self.deadline = LLM_RANKING_DEADLINE
+        self.breaker = CircuitBreaker(LLM_BREAKER_FAILURE_THRESHOLD, LLM_BREAKER_RECOVERY_TIMEOUT)
+        self.fallback = fallback
+
+        # Большие пулы кандидатов ранжируются частями параллельно
+        self.chunk_token_budget = LLM_CHUNK_TOKEN_BUDGET
+        self.chunk_concurrency = LLM_CHUNK_CONCURRENCY
+
+        # Счетчики для метрик
+        self.requests_total = 0
+        self.requests_in_flight = 0
+        self.errors_total = 0
+        self.fallbacks = {"circuit_open": 0, "timeout": 0, "error": 0, "invalid_response": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP-клиент к API ранжирования, создается при первом обращении."""
+        if self._client is None or self._client.is_closed:
+            self._transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=LLM_TIMEOUT,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.api_key}"
+                },
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Закрывает HTTP-клиент и все соединения пула (вызывается при остановке приложения)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._transport = None
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Состояние пула соединений и счетчики запросов для экспорта в метрики."""
+        # httpx не предоставляет публичного API для пула, поэтому читаем его аккуратно
+        pool = getattr(self._transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for connection in connections if connection.is_idle())
+        return {
+            "max_connections": self.limits.max_connections or 0,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "requests_total": self.requests_total,
+            "requests_in_flight": self.requests_in_flight,
+            "errors_total": self.errors_total,
+        }
+
+    async def _complete(self, system_prompt: str, prompt: str) -> str:
+        """Отправляет запрос к API и возвращает текст ответа модели."""
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        try:
+            response = await self.client.post(
+                self.api_url,
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7
+                }
+            )
+
+            # Проверяем успешность запроса
+            response.raise_for_status()
+            data = response.json()
+
+            # Извлекаем результат
+            return data["choices"][0]["message"]["content"]
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.requests_in_flight -= 1
+
+    async def _stream_completion(self, system_prompt: str, prompt: str) -> AsyncIterator[str]:
+        """Отправляет потоковый запрос к API и возвращает куски текста ответа по мере поступления."""
+        self.requests_total += 1
+        self.requests_in_flight += 1
+        try:
+            async with self.client.stream(
+                "POST",
+                self.api_url,
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.7,
+                    "stream": True,
+                },
+            ) as response:
+                response.raise_for_status()
+
+                # Ответ приходит в формате server-sent events, как у OpenAI
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json.loads(data).get("choices") or [{}]
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        except Exception:
+            self.errors_total += 1
+            raise
+        finally:
+            self.requests_in_flight -= 1
+
+    @staticmethod
+    def _parse_ranked_ids(result_text: str) -> Optional[List[Any]]:
+        """Извлекает список id из ответа модели."""
+        # Пытаемся распарсить JSON
+        result_text = result_text.replace("```json", "").replace("```", "")
+        try:
+            ranked_ids = json.loads(result_text)
+            # Проверяем, что результат - список
+            if isinstance(ranked_ids, list):
+                return ranked_ids
+        except (json.JSONDecodeError, ValueError):
+            # Если не удалось распарсить JSON, ищем что-то похожее на список ID в тексте
+            matches = re.findall(r'\[(.*?)\]', result_text)
+            if matches:
+                # Берем первое совпадение и разбиваем по запятой
+                items = matches[0].split(',')
+                # Очищаем элементы от лишних символов
+                cleaned_ids = [item.strip(' "\'\t\n') for item in items]
+                # Возвращаем только непустые элементы
+                return [item for item in cleaned_ids if item]
+        return None
+
+    async def _fallback_rank(
+        self,
+        method: str,
+        items: List[Dict[str, Any]],
+        description: str,
+        preferences: Optional[Dict[str, Any]],
+    ) -> List[Any]:
+        """Детерминированное локальное ранжирование вместо LLM (или исходный порядок)."""
+        ranking_degraded.set(True)
+        if self.fallback is None:
+            return [item["id"] for item in items]
+        return await getattr(self.fallback, method)(items, description, preferences)
+
+    async def _rank(
+        self,
+        system_prompt: str,
+        prompt: str,
+        fallback: Callable[[], Awaitable[List[Any]]],
+    ) -> List[Any]:
         """
-        Сортирует менторов по убыванию их интересности для пользователя.
-        
-        Args:
-            mentors: Список словарей с информацией о менторах, каждый словарь содержит id и description
-            user_description: Описание пользователя
-            
+        Ранжирование через LLM с дедлайном и предохранителем.
+
+        При разомкнутом предохранителе, превышении дедлайна, ошибке или
+        неразборчивом ответе используется fallback.
+        """
+        if not self.breaker.allow_request():
+            self.fallbacks["circuit_open"] += 1
+            return await fallback()
+
+        try:
+            result_text = await asyncio.wait_for(self._complete(system_prompt, prompt), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            logger.warning("LLM ranking exceeded the %.1fs deadline", self.deadline)
+            self.breaker.record_failure()
+            self.fallbacks["timeout"] += 1
+            return await fallback()
+        except Exception as e:
+            # В случае ошибки логируем ее и ранжируем локально
+            logger.warning("Error ranking with LLM: %s", e)
+            self.breaker.record_failure()
+            self.fallbacks["error"] += 1
+            return await fallback()
+
+        self.breaker.record_success()
+        ranked_ids = self._parse_ranked_ids(result_text)
+        if ranked_ids is None:
+            self.fallbacks["invalid_response"] += 1
+            return await fallback()
+        return ranked_ids
+
+    async def _stream_rank(
+        self,
+        system_prompt: str,
+        prompt: str,
+        items: List[Dict[str, Any]],
+        fallback: Callable[[], Awaitable[List[Any]]],
+    ) -> AsyncIterator[Any]:
+        """
+        Потоковое ранжирование через LLM с дедлайном и предохранителем.
+
+        id кандидатов возвращаются по мере разбора ответа, неизвестные id и
+        повторы отбрасываются. Если ответ прервался ошибкой или дедлайном,
+        оставшиеся кандидаты возвращаются в порядке fallback.
+        """
+        known = {str(item["id"]): item["id"] for item in items}
+        emitted = set()
+
+        if not self.breaker.allow_request():
+            self.fallbacks["circuit_open"] += 1
+        else:
+            parser = IncrementalIdParser()
+            stream = self._stream_completion(system_prompt, prompt)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.deadline
+            failure = None
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        chunk = await asyncio.wait_for(stream.__anext__(), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    for raw_id in parser.feed(chunk):
+                        item_id = known.get(raw_id)
+                        if item_id is not None and item_id not in emitted:
+                            emitted.add(item_id)
+                            yield item_id
+                for raw_id in parser.close():
+                    item_id = known.get(raw_id)
+                    if item_id is not None and item_id not in emitted:
+                        emitted.add(item_id)
+                        yield item_id
+            except asyncio.TimeoutError:
+                logger.warning("LLM ranking stream exceeded the %.1fs deadline", self.deadline)
+                failure = "timeout"
+            except Exception as e:
+                logger.warning("Error streaming ranking from LLM: %s", e)
+                failure = "error"
+            finally:
+                await stream.aclose()
+
+            if failure is not None:
+                self.breaker.record_failure()
+                self.fallbacks[failure] += 1
+            else:
+                self.breaker.record_success()
+                if not parser.started:
+                    self.fallbacks["invalid_response"] += 1
+                elif len(emitted) == len(known):
+                    return
+                else:
+                    # Модель перечислила не всех: остальные идут следом в исходном порядке
+                    for item in items:
+                        if item["id"] not in emitted:
+                            yield item["id"]
+                    return
+
+        for item_id in await fallback():
+            if item_id not in emitted:
+                emitted.add(item_id)
+                yield item_id
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Грубая оценка числа токенов (около трех символов на токен для русского текста)."""
+        return len(text) // 3 + 1
+
+    def _chunk_budget(self, description: str) -> int:
+        """Бюджет токенов на описания кандидатов одной части (с запасом на инструкцию и описание зрителя)."""
+        return max(self.chunk_token_budget - self.estimate_tokens(description) - 200, 1)
+
+    def _item_tokens(self, item: Dict[str, Any]) -> int:
+        return self.estimate_tokens(f"ID: {item['id']}, Описание: {item['description'] or 'Нет описания'}")
+
+    def _chunk(self, items: List[Dict[str, Any]], description: str) -> List[List[Dict[str, Any]]]:
+        """
+        Делит кандидатов на части, каждая из которых укладывается в бюджет токенов.
+
+        Кандидаты раскладываются по частям через одного (i-й в часть i % n),
+        поэтому каждая часть — сопоставимая выборка пула, даже если пул уже
+        упорядочен (как голова гибридного ранжирования).
+        """
+        budget = self._chunk_budget(description)
+        sizes = [self._item_tokens(item) for item in items]
+        count = max(math.ceil(sum(sizes) / budget), 1)
+        while count < len(items) and any(
+            sum(sizes[i::count]) > budget for i in range(count)
+        ):
+            count += 1
+        return [items[i::count] for i in range(count)]
+
+    async def _limit_pool(
+        self,
+        items: List[Dict[str, Any]],
+        description: str,
+        fallback_method: str,
+        preferences: Optional[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], List[Any]]:
+        """
+        Отбирает голову пула, которая помещается в chunk_concurrency частей.
+
+        Кандидаты предварительно упорядочиваются локальным ранжированием
+        (как в гибридном ранжировании), поэтому в LLM уходят лучшие из них.
+
         Returns:
-            Список id менторов, отсортированный по убыванию интересности
+            Кандидаты для LLM и id остальных кандидатов в локальном порядке
         """
-        if not mentors or not user_description:
-            return [mentor["id"] for mentor in mentors]  # Возвращаем оригинальный порядок, если нет данных
-            
+        ids = [item["id"] for item in items]
+        if self.fallback is not None:
+            ids = merge_ranked_ids(await getattr(self.fallback, fallback_method)(items, description, preferences), ids)
+        by_id = {item["id"]: item for item in items}
+        ordered = [by_id[item_id] for item_id in ids]
+
+        capacity = self._chunk_budget(description) * self.chunk_concurrency
+        size = 0
+        tokens = 0
+        for item in ordered:
+            tokens += self._item_tokens(item)
+            if tokens > capacity:
+                break
+            size += 1
+        size = max(size, min(self.chunk_concurrency, len(ordered)))
+        # Раскладка через одного может потребовать больше частей, чем оценка по сумме
+        while size > self.chunk_concurrency and len(self._chunk(ordered[:size], description)) > self.chunk_concurrency:
+            size -= max(size // 10, 1)
+        return ordered[:size], ids[size:]
+
+    async def _rank_chunks(
+        self,
+        items: List[Dict[str, Any]],
+        chunks: List[List[Dict[str, Any]]],
+        build_prompt: Callable[[List[Dict[str, Any]], str], Tuple[str, str]],
+        description: str,
+        fallback_method: str,
+        preferences: Optional[Dict[str, Any]],
+    ) -> List[Any]:
+        """
+        Ранжирует части пула параллельно и сливает результаты.
+
+        Частей не больше chunk_concurrency, поэтому все они отправляются
+        одновременно, а общее время ограничено одним дедлайном, как у
+        одиночного запроса. Не уложившиеся в пул кандидаты ранжируются
+        локально и идут следом; части, не успевшие к дедлайну, получают
+        запасной порядок.
+        """
+        tail: List[Any] = []
+        if len(chunks) > self.chunk_concurrency:
+            head, tail = await self._limit_pool(items, description, fallback_method, preferences)
+            chunks = self._chunk(head, description)
+
+        async def rank_chunk(chunk: List[Dict[str, Any]]) -> Tuple[List[Any], bool]:
+            # Задача работает в копии контекста: признак деградации возвращается явно
+            ranking_degraded.set(False)
+            system_prompt, prompt = build_prompt(chunk, description)
+            ranked_ids = await self._rank(
+                system_prompt,
+                prompt,
+                lambda: self._fallback_rank(fallback_method, chunk, description, preferences),
+            )
+            return merge_ranked_ids(ranked_ids, [item["id"] for item in chunk]), ranking_degraded.get()
+
+        tasks = [asyncio.ensure_future(rank_chunk(chunk)) for chunk in chunks]
+        pending = set(tasks)
+        try:
+            _, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        rankings = []
+        degraded = False
+        for chunk, task in zip(chunks, tasks):
+            if task.cancelled():
+                logger.warning("LLM chunk ranking exceeded the %.1fs deadline", self.deadline)
+                self.breaker.record_failure()
+                self.fallbacks["timeout"] += 1
+                ranked_ids = await self._fallback_rank(fallback_method, chunk, description, preferences)
+                rankings.append(merge_ranked_ids(ranked_ids, [item["id"] for item in chunk]))
+                continue
+            ranked_ids, chunk_degraded = task.result()
+            rankings.append(ranked_ids)
+            degraded = degraded or chunk_degraded
+        if degraded:
+            ranking_degraded.set(True)
+        return merge_chunk_rankings(rankings) + tail
+
+    @staticmethod
+    def _mentors_prompt(mentors: List[Dict[str, Any]], user_description: str) -> Tuple[str, str]:
+        """Системный и пользовательский промпты для ранжирования менторов."""
         # Формируем описания менторов для промпта
         mentors_descriptions = "\n".join([
             f"ID: {mentor['id']}, Описание: {mentor['description'] or 'Нет описания'}" 
@@ -41,68 +515,119 @@ class InterestRatingService:
 Описания менторов:
 {mentors_descriptions}
 """
+        return (
+            "Ты помогаешь сортировать менторов по их интересности для пользователя на основе описаний.",
+            prompt,
+        )
+
+    @staticmethod
+    def _users_prompt(users: List[Dict[str, Any]], mentor_description: str) -> Tuple[str, str]:
+        """Системный и пользовательский промпты для ранжирования пользователей."""
+        users_descriptions = "\n".join([
+            f"ID: {user['id']}, Описание: {user['description'] or 'Нет описания'}" 
+            for user in users
+        ])
         
-        try:
-            # Отправляем запрос к API
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.api_url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.api_key}"
-                    },
-                    json={
-                        "model": "qodo/gemini-2.0-flash",
-                        "messages": [
-                            {"role": "system", "content": "Ты помогаешь сортировать менторов по их интересности для пользователя на основе описаний."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7
-                    }
-                )
-                
-                # Проверяем успешность запроса
-                response.raise_for_status()
-                data = response.json()
-                
-                # Извлекаем результат
-                result_text = data["choices"][0]["message"]["content"]
-                
-                # Пытаемся распарсить JSON
-                result_text = result_text.replace("```json", "").replace("```", "")
-                try:
-                    ranked_ids = json.loads(result_text)
-                    # Проверяем, что результат - список
-                    if isinstance(ranked_ids, list):
-                        return ranked_ids
-                except (json.JSONDecodeError, ValueError):
-                    # Если не удалось распарсить JSON, пытаемся извлечь ID другими способами
-                    import re
-                    # Ищем что-то похожее на список ID в тексте
-                    matches = re.findall(r'\[(.*?)\]', result_text)
-                    if matches:
-                        # Берем первое совпадение и разбиваем по запятой
-                        items = matches[0].split(',')
-                        # Очищаем элементы от лишних символов
-                        cleaned_ids = [item.strip(' "\'\t\n') for item in items]
-                        # Возвращаем только непустые элементы
-                        return [item for item in cleaned_ids if item]
+        prompt = f"""
+Ответь в формате массива json, содержашего только id. Отсортируй пользователей по убыванию их интересности для ментора. 
+
+Описание ментора:
+{mentor_description}
+
+Описания пользователей:
+{users_descriptions}
+"""
+        return (
+            "Ты помогаешь сортировать пользователей по их интересности для ментора на основе описаний.",
+            prompt,
+        )
+
+    async def get_ranked_mentors(
+        self,
+        mentors: List[Dict[str, Any]],
+        user_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """
+        Сортирует менторов по убыванию их интересности для пользователя.
+        
+        Args:
+            mentors: Список словарей с информацией о менторах, каждый словарь содержит id и description
+            user_description: Описание пользователя
+            preferences: Параметры профиля пользователя (в промпт не передаются)
             
-            # Если не удалось получить ранжированный список, возвращаем исходный порядок
-            return [mentor["id"] for mentor in mentors]
-                
-        except Exception as e:
-            # В случае ошибки логируем ее и возвращаем исходный порядок
-            print(f"Error ranking mentors: {str(e)}")
-            return [mentor["id"] for mentor in mentors]
+        Returns:
+            Список id менторов, отсортированный по убыванию интересности
+        """
+        if not mentors or not user_description:
+            return [mentor["id"] for mentor in mentors]  # Возвращаем оригинальный порядок, если нет данных
             
-    async def get_ranked_users(self, users: List[Dict[str, Any]], mentor_description: str) -> List[str]:
+        chunks = self._chunk(mentors, user_description)
+        if len(chunks) > 1:
+            return await self._rank_chunks(
+                mentors, chunks, self._mentors_prompt, user_description, "get_ranked_mentors", preferences
+            )
+
+        system_prompt, prompt = self._mentors_prompt(mentors, user_description)
+        return await self._rank(
+            system_prompt,
+            prompt,
+            lambda: self._fallback_rank("get_ranked_mentors", mentors, user_description, preferences),
+        )
+
+    async def stream_ranked_mentors(
+        self,
+        mentors: List[Dict[str, Any]],
+        user_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Потоковый вариант get_ranked_mentors: id менторов возвращаются по мере ответа модели.
+
+        Args:
+            mentors: Список словарей с информацией о менторах, каждый словарь содержит id и description
+            user_description: Описание пользователя
+            preferences: Параметры профиля пользователя (в промпт не передаются)
+
+        Returns:
+            Асинхронный итератор по id всех менторов в порядке убывания интересности
+        """
+        if not mentors or not user_description:
+            for mentor in mentors:
+                yield mentor["id"]
+            return
+
+        chunks = self._chunk(mentors, user_description)
+        if len(chunks) > 1:
+            # Порядок известен только после слияния всех частей
+            for mentor_id in await self._rank_chunks(
+                mentors, chunks, self._mentors_prompt, user_description, "get_ranked_mentors", preferences
+            ):
+                yield mentor_id
+            return
+
+        system_prompt, prompt = self._mentors_prompt(mentors, user_description)
+        async for mentor_id in self._stream_rank(
+            system_prompt,
+            prompt,
+            mentors,
+            lambda: self._fallback_rank("get_ranked_mentors", mentors, user_description, preferences),
+        ):
+            yield mentor_id
+            
+    async def get_ranked_users(
+        self,
+        users: List[Dict[str, Any]],
+        mentor_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
         """
         Сортирует пользователей по убыванию их интересности для ментора.
         
         Args:
             users: Список словарей с информацией о пользователях, каждый словарь содержит id и description
             mentor_description: Описание ментора
+            preferences: Параметры профиля ментора (в промпт не передаются)
             
         Returns:
             Список id пользователей, отсортированный по убыванию интересности
@@ -111,58 +636,494 @@ class InterestRatingService:
         if not users or not mentor_description:
             return [user["id"] for user in users]
             
-        users_descriptions = "\n".join([
-            f"ID: {user['id']}, Описание: {user['description'] or 'Нет описания'}" 
-            for user in users
-        ])
-        
-        prompt = f"""
-Ответь в формате массива json, содержашего только id. Отсортируй пользователей по убыванию их интересности для ментора. 
+        chunks = self._chunk(users, mentor_description)
+        if len(chunks) > 1:
+            return await self._rank_chunks(
+                users, chunks, self._users_prompt, mentor_description, "get_ranked_users", preferences
+            )
 
-Описание ментора:
-{mentor_description}
+        system_prompt, prompt = self._users_prompt(users, mentor_description)
+        return await self._rank(
+            system_prompt,
+            prompt,
+            lambda: self._fallback_rank("get_ranked_users", users, mentor_description, preferences),
+        )
 
-Описания пользователей:
-{users_descriptions}
-"""
-        
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.api_url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {self.api_key}"
-                    },
-                    json={
-                        "model": "qodo/gemini-2.0-flash",
-                        "messages": [
-                            {"role": "system", "content": "Ты помогаешь сортировать пользователей по их интересности для ментора на основе описаний."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "temperature": 0.7
-                    }
-                )
-                
-                response.raise_for_status()
-                data = response.json()
-                result_text = data["choices"][0]["message"]["content"]
-                result_text = result_text.replace("```json", "").replace("```", "")
-
-                try:
-                    ranked_ids = json.loads(result_text)
-                    if isinstance(ranked_ids, list):
-                        return ranked_ids
-                except (json.JSONDecodeError, ValueError):
-                    import re
-                    matches = re.findall(r'\[(.*?)\]', result_text)
-                    if matches:
-                        items = matches[0].split(',')
-                        cleaned_ids = [item.strip(' "\'\t\n') for item in items]
-                        return [item for item in cleaned_ids if item]
-            
+    async def stream_ranked_users(
+        self,
+        users: List[Dict[str, Any]],
+        mentor_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Потоковый вариант get_ranked_users: id пользователей возвращаются по мере ответа модели.
+
+        Args:
+            users: Список словарей с информацией о пользователях, каждый словарь содержит id и description
+            mentor_description: Описание ментора
+            preferences: Параметры профиля ментора (в промпт не передаются)
+
+        Returns:
+            Асинхронный итератор по id всех пользователей в порядке убывания интересности
+        """
+        if not users or not mentor_description:
+            for user in users:
+                yield user["id"]
+            return
+
+        chunks = self._chunk(users, mentor_description)
+        if len(chunks) > 1:
+            # Порядок известен только после слияния всех частей
+            for user_id in await self._rank_chunks(
+                users, chunks, self._users_prompt, mentor_description, "get_ranked_users", preferences
+            ):
+                yield user_id
+            return
+
+        system_prompt, prompt = self._users_prompt(users, mentor_description)
+        async for user_id in self._stream_rank(
+            system_prompt,
+            prompt,
+            users,
+            lambda: self._fallback_rank("get_ranked_users", users, mentor_description, preferences),
+        ):
+            yield user_id
+
+
+class HashedNgramVectorizer:
+    """Векторизация текста хешированными словами и символьными n-граммами."""
+
+    _token_re = re.compile(r"\w+", re.UNICODE)
+
+    def __init__(self, dim: int = LOCAL_RANKER_DIM, ngram: int = 3):
+        self.dim = dim
+        self.ngram = ngram
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        for token in self._token_re.findall(text.lower()):
+            features.append(f"w:{token}")
+            padded = f"<{token}>"
+            for i in range(max(len(padded) - self.ngram + 1, 1)):
+                features.append(f"c:{padded[i:i + self.ngram]}")
+        return features
+
+    def transform(self, text: Optional[str]) -> np.ndarray:
+        """
+        Строит L2-нормированный вектор описания.
+
+        Используется crc32, а не встроенный hash(), чтобы векторы совпадали
+        во всех процессах независимо от PYTHONHASHSEED.
+        """
+        counts: Dict[int, float] = {}
+        for feature in self._features(text or ""):
+            h = zlib.crc32(feature.encode())
+            index = h % self.dim
+            sign = 1.0 if (h >> 31) & 1 == 0 else -1.0
+            counts[index] = counts.get(index, 0.0) + sign
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for index, value in counts.items():
+            # Сублинейное масштабирование частоты, как в TF-IDF
+            vector[index] = math.copysign(1.0 + math.log(abs(value)), value) if value else 0.0
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class DescriptionVectorIndex:
+    """Хранилище предвычисленных векторов описаний в одной NumPy-матрице."""
+
+    def __init__(self, vectorizer: HashedNgramVectorizer, capacity: int = 256):
+        self.vectorizer = vectorizer
+        self._matrix = np.zeros((capacity, vectorizer.dim), dtype=np.float32)
+        self._rows: Dict[Any, int] = {}
+        self._descriptions: Dict[Any, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def upsert(self, item_id: Any, description: Optional[str]) -> None:
+        """Пересчитывает вектор элемента, если его описание изменилось."""
+        description = description or ""
+        if item_id in self._rows and self._descriptions[item_id] == description:
+            return
+
+        row = self._rows.get(item_id)
+        if row is None:
+            row = len(self._rows)
+            if row >= self._matrix.shape[0]:
+                grown = np.zeros((self._matrix.shape[0] * 2, self.vectorizer.dim), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._rows[item_id] = row
+
+        self._matrix[row] = self.vectorizer.transform(description)
+        self._descriptions[item_id] = description
+
+    def scores(self, items: List[Dict[str, Any]], query: str) -> np.ndarray:
+        """
+        Косинусная близость описаний элементов к запросу.
+
+        Векторы считаются только для новых элементов и элементов с изменившимся
+        описанием, остальные берутся из матрицы.
+        """
+        for item in items:
+            self.upsert(item["id"], item.get("description"))
+
+        rows = np.fromiter((self._rows[item["id"]] for item in items), dtype=np.int64, count=len(items))
+        return self._matrix[rows] @ self.vectorizer.transform(query)
+
+
+def lexical_overlap_scores(items: List[Dict[str, Any]], query: str) -> np.ndarray:
+    """Доля общих слов описания и запроса (коэффициент Оцаи)."""
+    token_re = HashedNgramVectorizer._token_re
+    query_tokens = set(token_re.findall(query.lower()))
+    scores = np.zeros(len(items), dtype=np.float32)
+    if not query_tokens:
+        return scores
+
+    for i, item in enumerate(items):
+        tokens = set(token_re.findall((item.get("description") or "").lower()))
+        if tokens:
+            scores[i] = len(tokens & query_tokens) / math.sqrt(len(tokens) * len(query_tokens))
+    return scores
+
+
+def profile_match_bonus(items: List[Dict[str, Any]], preferences: Dict[str, Any]) -> np.ndarray:
+    """
+    Бонус за совпадение университета и типа поступления с профилем зрителя.
+
+    Для менторов сравнивается university с target_universities пользователя,
+    для пользователей - target_universities с university ментора.
+    """
+    target_universities = set(preferences.get("target_universities") or [])
+    university = preferences.get("university")
+    admission_type = preferences.get("admission_type")
+
+    bonus = np.zeros(len(items), dtype=np.float32)
+    for i, item in enumerate(items):
+        if item.get("university") and item["university"] in target_universities:
+            bonus[i] += LOCAL_UNIVERSITY_MATCH_WEIGHT
+        if university and university in (item.get("target_universities") or []):
+            bonus[i] += LOCAL_UNIVERSITY_MATCH_WEIGHT
+        if admission_type and item.get("admission_type") == admission_type:
+            bonus[i] += LOCAL_ADMISSION_MATCH_WEIGHT
+    return bonus
+
+
+class LocalInterestRatingService:
+    """
+    Локальное ранжирование по близости описаний и совпадению профиля.
+
+    Работает за миллисекунды и не обращается к внешнему API. Интерфейс совпадает
+    с InterestRatingService, поэтому роутеры могут использовать любой из них.
+    """
+
+    def __init__(self, dim: int = LOCAL_RANKER_DIM, scorer: str = "embedding"):
+        vectorizer = HashedNgramVectorizer(dim=dim)
+        self.mentor_index = DescriptionVectorIndex(vectorizer)
+        self.user_index = DescriptionVectorIndex(vectorizer)
+        self.scorer = scorer
+
+    def update_mentor(self, mentor_id: int, description: Optional[str]) -> None:
+        """Пересчитывает вектор ментора после изменения описания."""
+        self.mentor_index.upsert(mentor_id, description)
+
+    def update_user(self, user_id: int, description: Optional[str]) -> None:
+        """Пересчитывает вектор пользователя после изменения описания."""
+        self.user_index.upsert(user_id, description)
+
+    def rank(
+        self,
+        index: DescriptionVectorIndex,
+        items: List[Dict[str, Any]],
+        query: str,
+        preferences: Optional[Dict[str, Any]] = None,
+        scorer: Optional[str] = None,
+    ) -> List[Any]:
+        """
+        Сортирует элементы по убыванию локальной оценки.
+
+        Args:
+            index: Индекс векторов (менторов или пользователей)
+            items: Кандидаты, каждый словарь содержит id и description
+            query: Описание зрителя или пользовательский промпт
+            preferences: Параметры профиля зрителя для бонуса за совпадение
+            scorer: embedding (косинусная близость векторов) или lexical (пересечение слов)
+
+        Returns:
+            Список id, отсортированный по убыванию оценки
+        """
+        if not items:
+            return []
+
+        if (scorer or self.scorer) == "lexical":
+            scores = lexical_overlap_scores(items, query)
+        else:
+            scores = index.scores(items, query)
+        if preferences:
+            scores = scores + profile_match_bonus(items, preferences)
+
+        # Устойчивая сортировка сохраняет исходный порядок при равных оценках
+        order = np.argsort(-scores, kind="stable")
+        return [items[i]["id"] for i in order]
+
+    async def get_ranked_mentors(
+        self,
+        mentors: List[Dict[str, Any]],
+        user_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        """
+        Сортирует менторов по убыванию их близости к описанию пользователя.
+
+        Args:
+            mentors: Список словарей с информацией о менторах, каждый словарь содержит id и description
+            user_description: Описание пользователя
+            preferences: Целевые университеты и тип поступления пользователя
+
+        Returns:
+            Список id менторов, отсортированный по убыванию интересности
+        """
+        if not mentors or not user_description:
+            return [mentor["id"] for mentor in mentors]
+        return self.rank(self.mentor_index, mentors, user_description, preferences)
+
+    async def get_ranked_users(
+        self,
+        users: List[Dict[str, Any]],
+        mentor_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        """
+        Сортирует пользователей по убыванию их близости к описанию ментора.
+
+        Args:
+            users: Список словарей с информацией о пользователях, каждый словарь содержит id и description
+            mentor_description: Описание ментора
+            preferences: Университет и тип поступления ментора
+
+        Returns:
+            Список id пользователей, отсортированный по убыванию интересности
+        """
+        if not users or not mentor_description:
             return [user["id"] for user in users]
-                
-        except Exception as e:
-            print(f"Error ranking users: {str(e)}")
-            return [user["id"] for user in users] 
\ No newline at end of file
+        return self.rank(self.user_index, users, mentor_description, preferences)
+
+    async def stream_ranked_mentors(
+        self,
+        mentors: List[Dict[str, Any]],
+        user_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """Потоковый интерфейс InterestRatingService: локальный порядок готов сразу целиком."""
+        for mentor_id in await self.get_ranked_mentors(mentors, user_description, preferences):
+            yield mentor_id
+
+    async def stream_ranked_users(
+        self,
+        users: List[Dict[str, Any]],
+        mentor_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """Потоковый интерфейс InterestRatingService: локальный порядок готов сразу целиком."""
+        for user_id in await self.get_ranked_users(users, mentor_description, preferences):
+            yield user_id
+
+
+def merge_ranked_ids(ranked_ids: List[Any], candidate_ids: List[Any]) -> List[Any]:
+    """
+    Приводит ответ ранжировщика к полному списку id кандидатов.
+
+    Неизвестные id отбрасываются, а кандидаты, которых нет в ответе,
+    добавляются в конец в исходном порядке.
+    """
+    known = {str(candidate_id): candidate_id for candidate_id in candidate_ids}
+    result = []
+    seen = set()
+    for ranked_id in ranked_ids:
+        candidate_id = known.get(str(ranked_id))
+        if candidate_id is not None and candidate_id not in seen:
+            seen.add(candidate_id)
+            result.append(candidate_id)
+    result.extend(candidate_id for candidate_id in candidate_ids if candidate_id not in seen)
+    return result
+
+
+def merge_chunk_rankings(rankings: List[List[Any]]) -> List[Any]:
+    """
+    Сливает ранжирования частей пула в одно.
+
+    Части — сопоставимые выборки кандидатов, поэтому элементы упорядочиваются
+    по относительному месту в своей части (середина интервала места, чтобы
+    части разного размера сравнивались честно); при равенстве раньше идет
+    элемент из части с меньшим номером.
+    """
+    positioned = [
+        ((position + 0.5) / len(ranking), chunk_index, item_id)
+        for chunk_index, ranking in enumerate(rankings)
+        for position, item_id in enumerate(ranking)
+    ]
+    positioned.sort(key=lambda entry: entry[:2])
+    return [item_id for _, _, item_id in positioned]
+
+
+class HybridInterestRatingService:
+    """
+    Двухэтапное ранжирование.
+
+    Сначала все кандидаты локально оцениваются LocalInterestRatingService,
+    затем только top_k лучших переранжируются LLM. Остальные кандидаты
+    идут следом в локальном порядке, поэтому размер промпта не зависит
+    от размера пула.
+    """
+
+    def __init__(
+        self,
+        local: LocalInterestRatingService,
+        llm: InterestRatingService,
+        top_k: int = HYBRID_TOP_K,
+        scorer: str = HYBRID_STAGE_ONE_SCORER,
+    ):
+        self.local = local
+        self.llm = llm
+        self.top_k = top_k
+        self.scorer = scorer
+
+    async def _rerank(self, items, local_order, rerank) -> List[Any]:
+        head, tail = local_order[:self.top_k], local_order[self.top_k:]
+        by_id = {item["id"]: item for item in items}
+        reranked = merge_ranked_ids(await rerank([by_id[item_id] for item_id in head]), head)
+        return reranked + tail
+
+    async def _stream_rerank(self, items, local_order, stream) -> AsyncIterator[Any]:
+        head, tail = local_order[:self.top_k], local_order[self.top_k:]
+        by_id = {item["id"]: item for item in items}
+        emitted = set()
+        async for item_id in stream([by_id[item_id] for item_id in head]):
+            if item_id in by_id and item_id not in emitted:
+                emitted.add(item_id)
+                yield item_id
+        for item_id in head + tail:
+            if item_id not in emitted:
+                yield item_id
+
+    async def get_ranked_mentors(
+        self,
+        mentors: List[Dict[str, Any]],
+        user_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        """
+        Сортирует менторов: локальный отбор top_k и переранжирование LLM.
+
+        Args:
+            mentors: Список словарей с информацией о менторах, каждый словарь содержит id и description
+            user_description: Описание пользователя
+            preferences: Целевые университеты и тип поступления пользователя
+
+        Returns:
+            Список id менторов, отсортированный по убыванию интересности
+        """
+        if not mentors or not user_description:
+            return [mentor["id"] for mentor in mentors]
+
+        local_order = self.local.rank(
+            self.local.mentor_index, mentors, user_description, preferences, self.scorer
+        )
+        return await self._rerank(
+            mentors,
+            local_order,
+            lambda head: self.llm.get_ranked_mentors(head, user_description, preferences),
+        )
+
+    async def get_ranked_users(
+        self,
+        users: List[Dict[str, Any]],
+        mentor_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> List[Any]:
+        """
+        Сортирует пользователей: локальный отбор top_k и переранжирование LLM.
+
+        Args:
+            users: Список словарей с информацией о пользователях, каждый словарь содержит id и description
+            mentor_description: Описание ментора
+            preferences: Университет и тип поступления ментора
+
+        Returns:
+            Список id пользователей, отсортированный по убыванию интересности
+        """
+        if not users or not mentor_description:
+            return [user["id"] for user in users]
+
+        local_order = self.local.rank(
+            self.local.user_index, users, mentor_description, preferences, self.scorer
+        )
+        return await self._rerank(
+            users,
+            local_order,
+            lambda head: self.llm.get_ranked_users(head, mentor_description, preferences),
+        )
+
+    async def stream_ranked_mentors(
+        self,
+        mentors: List[Dict[str, Any]],
+        user_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """Потоковый вариант get_ranked_mentors: top_k приходят из потока LLM, остальные следом."""
+        if not mentors or not user_description:
+            for mentor in mentors:
+                yield mentor["id"]
+            return
+
+        local_order = self.local.rank(
+            self.local.mentor_index, mentors, user_description, preferences, self.scorer
+        )
+        async for mentor_id in self._stream_rerank(
+            mentors,
+            local_order,
+            lambda head: self.llm.stream_ranked_mentors(head, user_description, preferences),
+        ):
+            yield mentor_id
+
+    async def stream_ranked_users(
+        self,
+        users: List[Dict[str, Any]],
+        mentor_description: str,
+        preferences: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[Any]:
+        """Потоковый вариант get_ranked_users: top_k приходят из потока LLM, остальные следом."""
+        if not users or not mentor_description:
+            for user in users:
+                yield user["id"]
+            return
+
+        local_order = self.local.rank(
+            self.local.user_index, users, mentor_description, preferences, self.scorer
+        )
+        async for user_id in self._stream_rerank(
+            users,
+            local_order,
+            lambda head: self.llm.stream_ranked_users(head, mentor_description, preferences),
+        ):
+            yield user_id
+
+
+# Singleton instances
+local_interest_service = LocalInterestRatingService()
+llm_interest_service = InterestRatingService(fallback=local_interest_service)
+hybrid_interest_service = HybridInterestRatingService(local_interest_service, llm_interest_service)
+
+
+def get_interest_service(name: str = FEED_RANKER):
+    """Возвращает ранжировщик фида, выбранный в конфигурации (FEED_RANKER)."""
+    if name == "local":
+        return local_interest_service
+    if name == "hybrid":
+        return hybrid_interest_service
+    return llm_interest_service
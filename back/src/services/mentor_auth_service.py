@@ -1,4 +1,5 @@
 from datetime import timedelta
+import logging
 import re
 from transliterate import translit
 
@@ -9,13 +10,21 @@ from src.config import Roles
 from src.data.models import Mentor
 import src.repository.mentor_repository as mentor_repo
 from src.schemas.schemas import MentorCreationSchema, MentorUpdateSchema
+from src.services.feed_service import MENTOR_RANKING_FIELDS
+from src.services.feed_worker import feed_precompute_worker
+from src.services.interest_rating import local_interest_service
+from src.services.principal_cache import invalidate_principal
+from src.services.redis_service import MENTORS_POOL, redis_service
+from src.services.university_index import university_index
 from src.security.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    check_password,
     create_access_token,
-    get_password_hash,
-    verify_password,
+    hash_password,
 )
 
+logger = logging.getLogger(__name__)
+
 
 async def generate_unique_login(name: str) -> str:
     """
@@ -59,7 +68,7 @@ async def register_mentor(user_data: MentorCreationSchema):
     login = await generate_unique_login(user_data.name)
 
     # Создаем хеш пароля
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
 
     # Создаем нового ментора
     new_mentor = Mentor(
@@ -69,7 +78,9 @@ async def register_mentor(user_data: MentorCreationSchema):
     )
 
     try:
-        await mentor_repo.create_mentor(new_mentor)
+        created_mentor = await mentor_repo.create_mentor(new_mentor)
+        await redis_service.bump_generation(MENTORS_POOL)
+        await feed_precompute_worker.notify_mentor_changed(created_mentor.id)
         
         # Генерируем JWT токен
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -87,12 +98,20 @@ async def register_mentor(user_data: MentorCreationSchema):
 async def authenticate_mentor(login: str, password: str) -> tuple[Mentor, str]:
     entity = await mentor_repo.get_mentor_by_login(login)
     # Verify user exists and password is correct
-    if not entity or not verify_password(password, entity.password_hash):
+    valid, new_hash = await check_password(password, entity.password_hash) if entity else (False, None)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect login or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash is not None:
+        # Хеш с устаревшей стоимостью (PASSWORD_BCRYPT_ROUNDS) пересохраняется;
+        # ошибка записи не должна мешать входу
+        try:
+            await mentor_repo.update_mentor_password_hash(entity.id, new_hash)
+        except Exception:
+            logger.exception("Failed to rehash password for mentor %s", entity.id)
 
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -124,7 +143,7 @@ async def update_mentor_profile_service(
 
     # Если передан пароль, хэшируем его
     if "password" in update_dict:
-        update_dict["password_hash"] = get_password_hash(update_dict.pop("password"))
+        update_dict["password_hash"] = await hash_password(update_dict.pop("password"))
     
     # Убеждаемся, что поле login не может быть изменено
     if "login" in update_dict:
@@ -150,6 +169,26 @@ async def update_mentor_profile_service(
                 detail="Ментор не найден",
             )
 
+        # Кешированные ранжирования пула становятся неактуальными, только
+        # если изменились поля, по которым ранжируется и фильтруется фид
+        if MENTOR_RANKING_FIELDS.intersection(update_dict):
+            await redis_service.bump_generation(MENTORS_POOL)
+        # Снимок профиля для авторизации обновляется при любом изменении
+        await invalidate_principal(Roles.MENTOR, updated_mentor.login)
+
+        # В справочник могли добавиться университеты: перестраиваем индекс автодополнения
+        if "university" in update_dict:
+            await university_index.invalidate()
+
+        # Пересчитываем вектор описания для локального ранжирования фида
+        if "description" in update_dict:
+            local_interest_service.update_mentor(mentor_id, update_dict["description"])
+
+        # Заранее пересчитываем фиды, затронутые изменением профиля (смена
+        # пароля или контактов ранжирование не меняет)
+        if MENTOR_RANKING_FIELDS.intersection(update_dict):
+            await feed_precompute_worker.notify_mentor_changed(mentor_id)
+
         return updated_mentor
     except IntegrityError as e:
         # Обрабатываем другие возможные ошибки целостности данных
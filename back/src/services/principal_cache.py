@@ -0,0 +1,91 @@
+import uuid
+from typing import Any, Dict, Optional, Union
+
+from src.config import PRINCIPAL_CACHE_ENABLED, PRINCIPAL_CACHE_TTL, Roles
+from src.data.models import AdmissionType, Mentor, User
+from src.repository.mentor_repository import get_mentor_by_login
+from src.repository.user_repository import get_user_by_login
+from src.services.redis_service import redis_service
+
+# Поля снимка: все, что нужно зависимостям авторизации и фиду
+PRINCIPAL_FIELDS = {
+    Roles.USER: ("id", "login", "name", "is_active", "description", "target_universities", "admission_type", "avatar_uuid"),
+    Roles.MENTOR: ("id", "login", "name", "is_active", "description", "university", "admission_type", "avatar_uuid"),
+}
+_models = {Roles.USER: User, Roles.MENTOR: Mentor}
+_loaders = {Roles.USER: get_user_by_login, Roles.MENTOR: get_mentor_by_login}
+
+# Счетчики для метрик
+principal_cache_stats = {"hits_total": 0, "misses_total": 0, "invalidations_total": 0}
+
+
+def principal_key(role: str, login: str) -> str:
+    return f"principal:{role}:{login}"
+
+
+def principal_snapshot(role: str, entity: Any) -> Dict[str, Any]:
+    """Снимок профиля для кеша (только сериализуемые значения)"""
+    snapshot = {field: getattr(entity, field) for field in PRINCIPAL_FIELDS[role]}
+    if snapshot["admission_type"] is not None:
+        snapshot["admission_type"] = AdmissionType(snapshot["admission_type"]).value
+    if snapshot["avatar_uuid"] is not None:
+        snapshot["avatar_uuid"] = str(snapshot["avatar_uuid"])
+    return snapshot
+
+
+def principal_from_snapshot(role: str, snapshot: Dict[str, Any]) -> Union[User, Mentor]:
+    """
+    Несохраненный объект модели из снимка.
+
+    Заполнены только поля PRINCIPAL_FIELDS, остальные равны None; объект
+    не привязан к сессии и не обращается к базе.
+    """
+    values = dict(snapshot)
+    if values["admission_type"] is not None:
+        values["admission_type"] = AdmissionType(values["admission_type"])
+    if values["avatar_uuid"] is not None:
+        values["avatar_uuid"] = uuid.UUID(values["avatar_uuid"])
+    return _models[role](**values)
+
+
+async def get_principal(role: str, login: str) -> Optional[Union[User, Mentor]]:
+    """
+    Получить пользователя или ментора для авторизации запроса.
+
+    Снимок профиля ищется в L1-кеше процесса и в Redis; при промахе профиль
+    читается из Postgres и кладется в кеш на PRINCIPAL_CACHE_TTL секунд.
+
+    Args:
+        role: Роль из токена (Roles.USER или Roles.MENTOR)
+        login: Логин из токена
+
+    Returns:
+        Объект модели (при попадании — из снимка) или None, если логин не найден
+    """
+    if not PRINCIPAL_CACHE_ENABLED:
+        return await _loaders[role](login)
+    key = principal_key(role, login)
+    snapshot = await redis_service.get_cache(key)
+    if snapshot is not None:
+        principal_cache_stats["hits_total"] += 1
+        return principal_from_snapshot(role, snapshot)
+
+    principal_cache_stats["misses_total"] += 1
+    invalidations = redis_service.invalidations
+    entity = await _loaders[role](login)
+    # Профиль мог измениться, пока шло чтение: такой снимок не кешируем
+    if entity is not None and invalidations == redis_service.invalidations:
+        await redis_service.set_cache(key, principal_snapshot(role, entity), PRINCIPAL_CACHE_TTL)
+    return entity
+
+
+async def invalidate_principal(role: str, login: Optional[str]) -> None:
+    """
+    Удалить снимок профиля из кеша всех воркеров.
+
+    Вызывается после изменения профиля, аватарки или статуса активности.
+    """
+    if not login:
+        return
+    principal_cache_stats["invalidations_total"] += 1
+    await redis_service.delete_cache(principal_key(role, login))
@@ -1,11 +1,34 @@
+import asyncio
 import json
 import hashlib
-from typing import Any, Optional, List, Dict
+import time
+from typing import Any, Awaitable, Callable, Optional, Dict, List, Tuple
 
 import redis.asyncio as redis
+from redis.asyncio.lock import Lock
 from fastapi import Depends
 
-from src.config import REDIS_HOST, REDIS_PORT, REDIS_CACHE_TTL
+from src.config import (
+    CACHE_COMPRESSION,
+    CACHE_COMPRESSION_THRESHOLD,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_SERIALIZER,
+    FEED_ACTIVE_VIEWERS_LIMIT,
+    LOCAL_CACHE_ENABLED,
+    LOCAL_CACHE_MAX_ENTRIES,
+    LOCAL_CACHE_TTL,
+    REDIS_CACHE_TTL,
+    REDIS_HOST,
+    REDIS_PORT,
+)
+from src.services.cache_codec import CacheCodec
+from src.services.local_cache import LRUCache
+
+
+MENTORS_POOL = "mentors"
+USERS_POOL = "users"
+# Поколение справочника университетов (см. university_index)
+UNIVERSITIES_POOL = "universities"
 
 
 class RedisService:
@@ -13,46 +36,292 @@ class RedisService:
         self.redis_client = redis.Redis(
             host=REDIS_HOST,
             port=int(REDIS_PORT),
-            decode_responses=True
+            # Значения кеша бинарные (см. CacheCodec), поэтому ответы не декодируются
+            decode_responses=False
         )
         self.ttl = REDIS_CACHE_TTL
+        self.codec = CacheCodec(CACHE_SERIALIZER, CACHE_COMPRESSION, CACHE_COMPRESSION_THRESHOLD)
+
+        # L1-кеш в памяти процесса; у каждого воркера uvicorn свой
+        self.local_cache = LRUCache(LOCAL_CACHE_MAX_ENTRIES, LOCAL_CACHE_TTL) if LOCAL_CACHE_ENABLED else None
+        # Растет при каждой инвалидации; защищает L1 от записи значений,
+        # прочитанных из Redis до инвалидации
+        self.invalidations = 0
+        self._listener: Optional[asyncio.Task] = None
+        # Источники номера поколения пула на случай потери счетчика в Redis
+        # (см. feed_service.register_generation_seeds)
+        self.generation_seeds: Dict[str, Callable[[], Awaitable[int]]] = {}
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        return self.local_cache.get(key) if self.local_cache is not None else None
 
-    async def get_cache(self, key: str) -> Optional[dict]:
-        """Получить данные из кеша"""
+    def _set_local(self, key: str, value: Any, ttl: Optional[float] = None, invalidations: Optional[int] = None) -> None:
+        if self.local_cache is None:
+            return
+        if invalidations is not None and invalidations != self.invalidations:
+            return
+        self.local_cache.set(key, value, ttl)
+
+    def evict_local(self, prefix: str) -> None:
+        """Удалить из L1-кеша этого процесса все ключи с префиксом"""
+        self.invalidations += 1
+        if self.local_cache is not None:
+            self.local_cache.delete_prefix(prefix)
+
+    async def get_cache(self, key: str) -> Optional[Any]:
+        """
+        Получить данные из кеша.
+
+        Сначала проверяется L1-кеш процесса (без сетевого запроса и декодирования),
+        затем Redis; найденное в Redis значение кладется в L1. Возвращаемые
+        объекты общие для всех запросов процесса и не должны изменяться.
+        """
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        invalidations = self.invalidations
         try:
             data = await self.redis_client.get(key)
-            return json.loads(data) if data else None
+            value = self.codec.decode(data) if data else None
         except Exception:
             return None
+        if value is not None:
+            self._set_local(key, value, invalidations=invalidations)
+        return value
 
-    async def set_cache(self, key: str, value: Any) -> bool:
-        """Сохранить данные в кеш"""
+    async def set_cache(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Сохранить данные в кеш (по умолчанию на REDIS_CACHE_TTL секунд)"""
+        self._set_local(key, value, ttl)
         try:
             await self.redis_client.setex(
                 key,
-                self.ttl,
-                json.dumps(value)
+                ttl or self.ttl,
+                self.codec.encode(value)
             )
             return True
         except Exception:
             return False
 
-    def _generate_content_hash(self, items: List[Dict]) -> str:
-        """Генерация хеша от списка пользователей/менторов и их описаний"""
-        # Сортируем элементы по id для обеспечения стабильного хеша
-        sorted_items = sorted(items, key=lambda x: x.get('id', ''))
-        
-        # Создаем строку из всех описаний и данных
-        content_str = json.dumps(sorted_items, sort_keys=True)
-        
-        # Генерируем хеш
-        return hashlib.sha256(content_str.encode()).hexdigest()
-
-    def generate_feed_cache_key(self, description: str, items: List[Dict], filtered: bool, page: int, size: int) -> str:
-        """Генерация ключа для кеша фида с учетом хеша контента"""
-        content_hash = self._generate_content_hash(items)
-        return f"feed:{hash(description)}:{content_hash}:{filtered}:{page}:{size}"
+    async def delete_cache(self, *keys: str) -> bool:
+        """Удалить ключи из Redis и из L1-кешей всех воркеров"""
+        try:
+            await self.redis_client.delete(*keys)
+        except Exception:
+            await self.publish_invalidation(*keys)
+            return False
+        return await self.publish_invalidation(*keys)
+
+    async def acquire_lock(self, name: str, timeout: float) -> Optional[Lock]:
+        """
+        Неблокирующе захватить распределенную блокировку.
+
+        Возвращает объект блокировки или None, если она занята другим процессом
+        или Redis недоступен.
+        """
+        try:
+            lock = self.redis_client.lock(name, timeout=timeout, blocking=False)
+            if await lock.acquire():
+                return lock
+        except Exception:
+            pass
+        return None
+
+    async def release_lock(self, lock: Lock) -> None:
+        """Освободить блокировку (если она еще принадлежит нам)"""
+        try:
+            await lock.release()
+        except Exception:
+            pass
+
+    async def is_locked(self, name: str) -> bool:
+        """Проверить, удерживает ли кто-то блокировку"""
+        try:
+            return bool(await self.redis_client.exists(name))
+        except Exception:
+            return False
+
+    async def get_generation(self, pool: str) -> int:
+        """
+        Получить номер поколения пула кандидатов (менторов или пользователей).
+
+        Номер кешируется в L1 до инвалидации через pub/sub (см. bump_generation)
+        или истечения LOCAL_CACHE_TTL.
+        """
+        key = f"feed:generation:{pool}"
+        generation = self._get_local(key)
+        if generation is not None:
+            return generation
+        invalidations = self.invalidations
+        try:
+            value = await self.redis_client.get(key)
+            if value is None and pool in self.generation_seeds:
+                value = await self._seed_generation(pool, key)
+        except Exception:
+            return 0
+        generation = int(value) if value else 0
+        self._set_local(key, generation, invalidations=invalidations)
+        return generation
+
+    async def _seed_generation(self, pool: str, key: str) -> Optional[bytes]:
+        """
+        Восстановить счетчик поколения, потерянный Redis (сброс, перезапуск).
+
+        Счетчик продолжается с сохраненного номера, а не с нуля: иначе после
+        новых увеличений он снова дошел бы до номеров, под которыми лежат
+        ранжирования прежнего состава пула.
+        """
+        try:
+            generation = await self.generation_seeds[pool]()
+        except Exception:
+            generation = 0
+        # Если счетчик уже восстановил другой воркер, берем его значение
+        await self.redis_client.set(key, generation, nx=True)
+        return await self.redis_client.get(key)
+
+    async def bump_generation(self, pool: str) -> bool:
+        """
+        Увеличить номер поколения пула кандидатов.
+
+        Вызывается при регистрации и изменении полей профиля, влияющих на
+        ранжирование (см. feed_service.MENTOR_RANKING_FIELDS), после чего все
+        закешированные ранжирования этого пула перестают находиться.
+        Остальные воркеры узнают о новом поколении через pub/sub и удаляют
+        из своих L1-кешей номер поколения и ранжирования пула.
+        """
+        key = f"feed:generation:{pool}"
+        try:
+            if pool in self.generation_seeds and not await self.redis_client.exists(key):
+                await self._seed_generation(pool, key)
+            await self.redis_client.incr(key)
+        except Exception:
+            return False
+        await self.publish_invalidation(f"feed:generation:{pool}", f"feed:ranking:{pool}:")
+        return True
+
+    async def publish_invalidation(self, *prefixes: str) -> bool:
+        """
+        Удалить ключи с префиксами из L1-кеша этого и всех остальных воркеров.
+
+        Локальный L1 очищается сразу, остальные процессы получают префиксы
+        через канал CACHE_INVALIDATION_CHANNEL.
+        """
+        for prefix in prefixes:
+            self.evict_local(prefix)
+        try:
+            await self.redis_client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(list(prefixes)))
+            return True
+        except Exception:
+            return False
+
+    async def listen_invalidations(self, retry_delay: float = 1.0) -> None:
+        """
+        Слушать канал инвалидаций и удалять из L1 ключи с полученными префиксами.
+
+        После каждой (пере)подписки L1 очищается целиком, так как сообщения,
+        отправленные во время разрыва соединения, потеряны.
+        """
+        while True:
+            pubsub = self.redis_client.pubsub()
+            try:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                if self.local_cache is not None:
+                    self.invalidations += 1
+                    self.local_cache.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        for prefix in json.loads(message["data"]):
+                            self.evict_local(prefix)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(retry_delay)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def start_invalidation_listener(self) -> None:
+        """Запустить подписку на инвалидации (только при включенном L1)"""
+        if self.local_cache is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self.listen_invalidations())
+
+    async def stop_invalidation_listener(self) -> None:
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    def local_cache_stats(self) -> Dict[str, int]:
+        """Счетчики L1-кеша этого процесса"""
+        stats = self.local_cache.stats() if self.local_cache is not None else {
+            "entries": 0, "hits": 0, "misses": 0, "evictions": 0
+        }
+        return {**stats, "invalidations": self.invalidations}
+
+    async def touch_viewer(self, pool: str, viewer_id: int) -> bool:
+        """
+        Отметить активность зрителя фида.
+
+        Зрители хранятся в отсортированном множестве по времени последнего
+        запроса; множество обрезается до FEED_ACTIVE_VIEWERS_LIMIT самых свежих.
+        """
+        try:
+            key = f"feed:active:{pool}"
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zadd(key, {str(viewer_id): time.time()})
+            pipe.zremrangebyrank(key, 0, -FEED_ACTIVE_VIEWERS_LIMIT - 1)
+            await pipe.execute()
+            return True
+        except Exception:
+            return False
+
+    async def get_active_viewers(
+        self, pool: str, since: float, limit: int
+    ) -> List[Tuple[int, float]]:
+        """
+        Получить недавно активных зрителей фида.
+
+        Returns:
+            Список пар (id, время последней активности), самые свежие первыми
+        """
+        try:
+            members = await self.redis_client.zrevrangebyscore(
+                f"feed:active:{pool}", "+inf", since, start=0, num=limit, withscores=True
+            )
+            return [(int(member), float(score)) for member, score in members]
+        except Exception:
+            return []
+
+    @staticmethod
+    def description_digest(description: Optional[str]) -> str:
+        """Стабильный между процессами дайджест описания (в отличие от hash())"""
+        return hashlib.sha256((description or "").encode()).hexdigest()[:32]
+
+    def generate_ranking_cache_key(
+        self,
+        pool: str,
+        generation: int,
+        description: str,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        Генерация ключа для кеша ранжированного списка id фида.
 
+        Ключ строится за O(1) из поколения пула, дайджеста описания и параметров
+        фильтрации и не зависит от страницы и размера страницы.
+        """
+        filters_digest = "all"
+        if filters is not None:
+            filters_digest = hashlib.sha256(
+                json.dumps(filters, sort_keys=True, ensure_ascii=False).encode()
+            ).hexdigest()[:16]
+        return f"feed:ranking:{pool}:{generation}:{self.description_digest(description)}:{filters_digest}"
 
 # Singleton instance
 redis_service = RedisService()
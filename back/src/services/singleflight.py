@@ -0,0 +1,101 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.config import (
+    FEED_RANKING_LOCK_POLL_INTERVAL,
+    FEED_RANKING_LOCK_TIMEOUT,
+    FEED_SINGLEFLIGHT_DISTRIBUTED,
+)
+from src.services.redis_service import RedisService, redis_service
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вычислений с одинаковым ключом.
+
+    Внутри процесса выполняется только одно вычисление на ключ, остальные
+    вызовы ждут его результата. Если передан redis_service, то между
+    процессами дополнительно берется блокировка в Redis: процесс, не
+    получивший блокировку, ждет появления результата в кеше под тем же
+    ключом. Поэтому в распределенном режиме fn должна сама сохранять
+    результат в кеш под ключом key.
+    """
+
+    def __init__(
+        self,
+        redis_service: Optional[RedisService] = None,
+        lock_timeout: float = FEED_RANKING_LOCK_TIMEOUT,
+        poll_interval: float = FEED_RANKING_LOCK_POLL_INTERVAL,
+    ):
+        self.redis_service = redis_service
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        # Счетчики для метрик
+        self.executions_total = 0
+        self.coalesced_total = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет fn или присоединяется к уже идущему вычислению с тем же ключом.
+
+        Args:
+            key: Ключ вычисления (обычно ключ кеша)
+            fn: Корутинная функция без аргументов
+
+        Returns:
+            Результат fn
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._execute(key, fn))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced_total += 1
+
+        # Отмена одного ожидающего запроса не должна отменять общее вычисление
+        return await asyncio.shield(future)
+
+    async def _execute(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.redis_service is None:
+            self.executions_total += 1
+            return await fn()
+
+        lock_name = f"lock:{key}"
+        lock = await self.redis_service.acquire_lock(lock_name, self.lock_timeout)
+        if lock is not None:
+            try:
+                self.executions_total += 1
+                return await fn()
+            finally:
+                await self.redis_service.release_lock(lock)
+
+        # Вычисление идет в другом процессе: ждем его результат в кеше
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_timeout
+        while loop.time() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            cached = await self.redis_service.get_cache(key)
+            if cached is not None:
+                self.coalesced_total += 1
+                return cached
+            if not await self.redis_service.is_locked(lock_name):
+                break
+
+        # Блокировка освободилась без результата или истекла: считаем сами
+        self.executions_total += 1
+        return await fn()
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики для экспорта в метрики."""
+        return {
+            "in_flight": len(self._inflight),
+            "executions_total": self.executions_total,
+            "coalesced_total": self.coalesced_total,
+        }
+
+
+# Singleton instance for feed ranking
+ranking_singleflight = SingleFlight(redis_service if FEED_SINGLEFLIGHT_DISTRIBUTED else None)
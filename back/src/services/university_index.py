@@ -0,0 +1,117 @@
+import asyncio
+import time
+from bisect import bisect_left
+from typing import Callable, List, Optional, Tuple
+
+from src.config import UNIVERSITY_INDEX_REFRESH_INTERVAL
+from src.repository.university_repository import list_universities
+from src.services.redis_service import UNIVERSITIES_POOL, redis_service
+from src.utils.universities import normalize_search_text, university_alias_keys
+
+
+class UniversityIndex:
+    """
+    Префиксный индекс справочника университетов в памяти процесса.
+
+    Отвечает на запросы автодополнения без обращения к Postgres. Индекс
+    перестраивается, когда меняется поколение справочника в Redis (см.
+    invalidate) или прошло UNIVERSITY_INDEX_REFRESH_INTERVAL секунд.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = UNIVERSITY_INDEX_REFRESH_INTERVAL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+        # Отсортированные ключи и параллельный список (позиция слова, id, название)
+        self._keys: List[str] = []
+        self._entries: List[Tuple[int, int, str]] = []
+        self.size = 0
+        self.generation: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def build(self, universities: List[Tuple[int, str, str]]) -> None:
+        """
+        Построить индекс по строкам (id, название, нормализованный ключ).
+
+        Индексируются ключ, его синонимы и каждый их суффикс с начала слова,
+        поэтому «ломонос» находит «МГУ им. Ломоносова», а «hse» — «ВШЭ».
+        """
+        items = []
+        for university_id, name, normalized_name in universities:
+            for key in university_alias_keys(normalized_name):
+                words = key.split()
+                for position in range(len(words)):
+                    items.append((" ".join(words[position:]), position, university_id, name))
+        items.sort()
+        self._keys = [key for key, *_ in items]
+        self._entries = [(position, university_id, name) for _, position, university_id, name in items]
+        self.size = len(universities)
+
+    def lookup(self, text: str, limit: int) -> List[Tuple[int, str]]:
+        """
+        Университеты, ключ или синоним которых содержит слово, начинающееся с text.
+
+        Совпадения с начала названия идут первыми, затем более короткие названия.
+
+        Returns:
+            Пары (id, название), не более limit
+        """
+        prefix = normalize_search_text(text)
+        if not prefix:
+            return []
+        best = {}
+        index = bisect_left(self._keys, prefix)
+        while index < len(self._keys) and self._keys[index].startswith(prefix):
+            position, university_id, name = self._entries[index]
+            if university_id not in best or position < best[university_id][0]:
+                best[university_id] = (position, name)
+            index += 1
+        ranked = sorted(best.items(), key=lambda item: (item[1][0], len(item[1][1]), item[1][1]))
+        return [(university_id, name) for university_id, (_, name) in ranked[:limit]]
+
+    async def ensure_fresh(self) -> None:
+        """Перестроить индекс, если справочник изменился или индекс устарел"""
+        generation = await redis_service.get_generation(UNIVERSITIES_POOL)
+        if self._is_fresh(generation):
+            return
+        async with self._lock:
+            if self._is_fresh(generation):
+                return
+            try:
+                universities = await list_universities()
+            except Exception:
+                # Пока база недоступна, отвечаем по последнему построенному индексу
+                if self.loaded_at is None:
+                    raise
+                return
+            self.build(universities)
+            self.generation = generation
+            self.loaded_at = self.clock()
+
+    def _is_fresh(self, generation: int) -> bool:
+        return (
+            self.loaded_at is not None
+            and self.generation == generation
+            and self.clock() - self.loaded_at < self.refresh_interval
+        )
+
+    async def search(self, text: str, limit: int) -> List[Tuple[int, str]]:
+        await self.ensure_fresh()
+        return self.lookup(text, limit)
+
+    async def invalidate(self) -> None:
+        """
+        Сообщить об изменении справочника.
+
+        Индекс этого процесса перестраивается при следующем запросе, остальные
+        воркеры узнают о новом поколении через pub/sub.
+        """
+        self.loaded_at = None
+        await redis_service.bump_generation(UNIVERSITIES_POOL)
+
+
+university_index = UniversityIndex()
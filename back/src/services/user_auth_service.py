@@ -1,4 +1,5 @@
 from datetime import timedelta
+import logging
 import re
 from transliterate import translit
 
@@ -9,13 +10,21 @@ from src.config import Roles
 from src.data.models import User
 import src.repository.user_repository as user_repo
 from src.schemas.schemas import UserCreationSchema, UserUpdateSchema
+from src.services.feed_service import USER_RANKING_FIELDS
+from src.services.feed_worker import feed_precompute_worker
+from src.services.interest_rating import local_interest_service
+from src.services.principal_cache import invalidate_principal
+from src.services.redis_service import USERS_POOL, redis_service
+from src.services.university_index import university_index
 from src.security.auth import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    check_password,
     create_access_token,
-    get_password_hash,
-    verify_password,
+    hash_password,
 )
 
+logger = logging.getLogger(__name__)
+
 
 async def generate_unique_login(name: str) -> str:
     """
@@ -59,7 +68,7 @@ async def register_user(user_data: UserCreationSchema):
     login = await generate_unique_login(user_data.name)
     
     # Создаем хеш пароля
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await hash_password(user_data.password)
     
     # Создаем нового пользователя
     new_user = User(
@@ -71,6 +80,8 @@ async def register_user(user_data: UserCreationSchema):
     try:
         await user_repo.create_user(new_user)
         created_user = await user_repo.get_user_by_login(login)
+        await redis_service.bump_generation(USERS_POOL)
+        await feed_precompute_worker.notify_user_changed(created_user.id)
         
         # Генерируем JWT токен
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -90,8 +101,16 @@ async def authenticate_user(login: str, password: str):
     if not user:
         return False
 
-    if not verify_password(password, user.password_hash):
+    valid, new_hash = await check_password(password, user.password_hash)
+    if not valid:
         return False
+    if new_hash is not None:
+        # Хеш с устаревшей стоимостью (PASSWORD_BCRYPT_ROUNDS) пересохраняется;
+        # ошибка записи не должна мешать входу
+        try:
+            await user_repo.update_user_password_hash(user.id, new_hash)
+        except Exception:
+            logger.exception("Failed to rehash password for user %s", user.id)
 
     # Generate JWT token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -120,7 +139,7 @@ async def update_user_profile_service(user_id: int, update_data: UserUpdateSchem
     
     # Если передан пароль, хэшируем его
     if "password" in update_dict:
-        update_dict["password_hash"] = get_password_hash(update_dict.pop("password"))
+        update_dict["password_hash"] = await hash_password(update_dict.pop("password"))
     
     # Убеждаемся, что поле login не может быть изменено
     if "login" in update_dict:
@@ -145,6 +164,26 @@ async def update_user_profile_service(user_id: int, update_data: UserUpdateSchem
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Пользователь не найден",
             )
+
+        # Кешированные ранжирования пула становятся неактуальными, только
+        # если изменились поля, по которым ранжируется и фильтруется фид
+        if USER_RANKING_FIELDS.intersection(update_dict):
+            await redis_service.bump_generation(USERS_POOL)
+        # Снимок профиля для авторизации обновляется при любом изменении
+        await invalidate_principal(Roles.USER, updated_user.login)
+
+        # В справочник могли добавиться университеты: перестраиваем индекс автодополнения
+        if "target_universities" in update_dict:
+            await university_index.invalidate()
+
+        # Пересчитываем вектор описания для локального ранжирования фида
+        if "description" in update_dict:
+            local_interest_service.update_user(user_id, update_dict["description"])
+
+        # Заранее пересчитываем фиды, затронутые изменением профиля (смена
+        # пароля или контактов ранжирование не меняет)
+        if USER_RANKING_FIELDS.intersection(update_dict):
+            await feed_precompute_worker.notify_user_changed(user_id)
         
         return updated_user
     except IntegrityError as e:
@@ -1,10 +1,17 @@
 import asyncio
 from dotenv import load_dotenv
 
-def setup_db():
+
+async def init_db():
     from src.data.base import create_schema
-    asyncio.get_event_loop().create_task(create_schema())
+    from src.repository.university_repository import backfill_university_ids
+    await create_schema()
+    await backfill_university_ids()
+
+
+def setup_db():
+    asyncio.get_event_loop().create_task(init_db())
 
 def setup():
     load_dotenv()
-    setup_db()
\ No newline at end of file
+    setup_db()
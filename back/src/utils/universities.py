@@ -0,0 +1,87 @@
+"""Нормализация названий университетов."""
+import re
+from typing import Dict, List
+
+# Транслитерация кириллицы, чтобы «МГУ» и «MGU» давали один ключ
+# (та же таблица используется в SQL-ключах нечеткого поиска, см. translit_sql)
+TRANSLIT_TABLE: Dict[str, str] = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh",
+    "з": "z", "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n",
+    "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f",
+    "х": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ы": "y",
+    "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+_TRANSLIT = str.maketrans(TRANSLIT_TABLE)
+_non_word_re = re.compile(r"[^\w]+", re.UNICODE)
+
+# Канонические названия и их распространенные варианты
+UNIVERSITY_ALIASES: Dict[str, List[str]] = {
+    "МГУ": ["МГУ им. Ломоносова", "Московский государственный университет", "MSU"],
+    "ВШЭ": ["НИУ ВШЭ", "Высшая школа экономики", "Вышка", "HSE"],
+    "МФТИ": ["Физтех", "Московский физико-технический институт", "MIPT"],
+    "СПбГУ": ["Санкт-Петербургский государственный университет", "SPbU"],
+    "ИТМО": ["Университет ИТМО", "ITMO"],
+    "МИФИ": ["НИЯУ МИФИ", "MEPhI"],
+    "МГТУ им. Баумана": ["МГТУ", "Бауманка", "BMSTU"],
+}
+
+
+def normalize_university(name: str) -> str:
+    """
+    Ключ названия университета: нижний регистр, ё -> е, транслитерация,
+    без пунктуации и лишних пробелов, с учетом UNIVERSITY_ALIASES.
+    """
+    key = _normalize(name)
+    return _alias_keys.get(key, key)
+
+
+def canonical_university_name(name: str) -> str:
+    """Каноническое название для показа (для неизвестных — очищенный ввод)."""
+    key = _normalize(name)
+    if key in _alias_keys:
+        return _canonical_names[_alias_keys[key]]
+    return " ".join(name.split())
+
+
+def university_alias_keys(key: str) -> List[str]:
+    """Нормализованные синонимы университета по его ключу (включая сам ключ)."""
+    return _alias_variants.get(key, [key])
+
+
+def normalize_search_text(text: str) -> str:
+    """Нормализация поискового ввода: как normalize_university, без синонимов."""
+    return _normalize(text)
+
+
+def translit_sql(expression: str) -> str:
+    """
+    SQL-выражение, транслитерирующее expression так же, как _normalize
+    (нижний регистр, ё -> е, кириллица -> латиница).
+
+    Пунктуация не удаляется: pg_trgm сам разбивает текст на слова.
+    Выражение неизменяемое (IMMUTABLE) и подходит для генерируемых колонок.
+    """
+    sql = f"replace(lower({expression}), 'ё', 'е')"
+    for letter, latin in TRANSLIT_TABLE.items():
+        if len(latin) > 1:
+            sql = f"replace({sql}, '{letter}', '{latin}')"
+    single = {letter: latin for letter, latin in TRANSLIT_TABLE.items() if len(latin) == 1}
+    # translate удаляет символы, для которых нет пары (ъ, ь)
+    removed = "".join(letter for letter, latin in TRANSLIT_TABLE.items() if not latin)
+    return f"translate({sql}, '{''.join(single)}{removed}', '{''.join(single.values())}')"
+
+
+def _normalize(name: str) -> str:
+    text = name.lower().replace("ё", "е").translate(_TRANSLIT)
+    return " ".join(_non_word_re.sub(" ", text).split())
+
+
+_alias_keys: Dict[str, str] = {}
+_canonical_names: Dict[str, str] = {}
+_alias_variants: Dict[str, List[str]] = {}
+for _canonical, _aliases in UNIVERSITY_ALIASES.items():
+    _canonical_key = _normalize(_canonical)
+    _canonical_names[_canonical_key] = _canonical
+    for _alias in [_canonical, *_aliases]:
+        _alias_keys[_normalize(_alias)] = _canonical_key
+    _alias_variants[_canonical_key] = list(dict.fromkeys(_normalize(_alias) for _alias in [_canonical, *_aliases]))
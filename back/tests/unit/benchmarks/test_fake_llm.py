@@ -0,0 +1,57 @@
+import httpx
+import pytest
+
+from benchmarks.dataset import make_profiles, overlap_at_k, reference_order
+from benchmarks.fake_llm import FakeLLMConfig, create_app, parse_prompt
+from benchmarks.report import parse_prometheus, percentile
+from src.services.interest_rating import InterestRatingService
+
+
+def test_parse_prompt_matches_service_prompt():
+    candidates = [profile.as_candidate() for profile in make_profiles(3, seed=1)]
+    _, prompt = InterestRatingService._mentors_prompt(candidates, "Люблю алгоритмы и python")
+
+    query, items = parse_prompt(prompt)
+
+    assert query == "Люблю алгоритмы и python"
+    assert [item["id"] for item in items] == [str(candidate["id"]) for candidate in candidates]
+
+
+def test_reference_order_puts_same_topic_first():
+    candidates = [
+        {"id": 1, "description": "Химия и органическая химия"},
+        {"id": 2, "description": "Алгоритмы и python"},
+    ]
+
+    assert reference_order("Хочу изучать программирование и алгоритмы", candidates) == [2, 1]
+    assert overlap_at_k([2, 1], [2, 1], k=1) == 1.0
+    assert overlap_at_k([1, 2], [2, 1], k=1) == 0.0
+
+
+def test_percentile_and_metrics_parsing():
+    assert percentile([0.3, 0.1, 0.2], 50) == 0.2
+    assert percentile([], 99) == 0.0
+    assert parse_prometheus("# HELP x\nfeed_ranking_executions_total 4\nllm{reason=\"a\"} 1") == {
+        "feed_ranking_executions_total": 4.0,
+        'llm{reason="a"}': 1.0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_fake_server_ranks_with_reference_order():
+    app = create_app(FakeLLMConfig(latency=0, stream_delay=0))
+    service = InterestRatingService()
+    service.api_url = "http://fake/v1/chat/completions"
+    service._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    candidates = [profile.as_candidate() for profile in make_profiles(20, seed=2)]
+    query = "Люблю генетику и биологию"
+
+    ranked = await service.get_ranked_mentors(candidates, query)
+    streamed = [mentor_id async for mentor_id in service.stream_ranked_mentors(candidates, query)]
+    await service.aclose()
+
+    assert ranked == reference_order(query, candidates)
+    assert streamed == ranked
+    assert app.state.stats.calls == 2
+    assert app.state.stats.streamed_calls == 1
+    assert app.state.stats.prompt_bytes > 0
@@ -0,0 +1,85 @@
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.repository.feed_ranking_repository import (
+    get_feed_ranking,
+    get_max_feed_ranking_generation,
+    save_feed_ranking,
+)
+
+
+class AsyncContextManager:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_get_feed_ranking():
+    computed_at = datetime(2024, 9, 1, 12, 0)
+    session = AsyncMock()
+    result = MagicMock()
+    result.first.return_value = MagicMock(ranked_ids=[3, 1, 2], total=3, computed_at=computed_at)
+    session.execute.return_value = result
+
+    with patch(
+        "src.repository.feed_ranking_repository.session_scope", return_value=AsyncContextManager(session)
+    ):
+        ranking = await get_feed_ranking("feed:ranking:users:1:x:all")
+
+    assert ranking == {"ids": [3, 1, 2], "total": 3, "computed_at": computed_at.timestamp()}
+
+
+@pytest.mark.asyncio
+async def test_get_feed_ranking_missing():
+    session = AsyncMock()
+    result = MagicMock()
+    result.first.return_value = None
+    session.execute.return_value = result
+
+    with patch(
+        "src.repository.feed_ranking_repository.session_scope", return_value=AsyncContextManager(session)
+    ):
+        assert await get_feed_ranking("feed:ranking:users:1:x:all") is None
+
+
+@pytest.mark.asyncio
+async def test_save_feed_ranking_upserts_and_prunes_other_generations():
+    session = AsyncMock()
+
+    with patch(
+        "src.repository.feed_ranking_repository.session_scope", return_value=AsyncContextManager(session)
+    ):
+        await save_feed_ranking("feed:ranking:users:4:x:all", "users", 4, "x", [2, 1], 2)
+
+    upsert, prune = [call.args[0] for call in session.execute.call_args_list]
+    upsert_sql = str(upsert)
+    assert "ON CONFLICT (cache_key) DO UPDATE" in upsert_sql
+    assert "generation !=" in str(prune)
+    assert prune.compile().params["generation_1"] == 4
+
+
+@pytest.mark.asyncio
+async def test_get_max_feed_ranking_generation():
+    session = AsyncMock()
+    result = MagicMock()
+    result.scalar.return_value = None
+    session.execute.return_value = result
+
+    with patch(
+        "src.repository.feed_ranking_repository.session_scope", return_value=AsyncContextManager(session)
+    ):
+        assert await get_max_feed_ranking_generation("users") == 0
+        result.scalar.return_value = 5
+        assert await get_max_feed_ranking_generation("users") == 5
+
+    query = str(session.execute.call_args.args[0])
+    assert "max(prod.feed_rankings.generation)" in query
+    assert "feed_rankings.pool =" in query
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.repository.mentor_repository import autocomplete_mentors, search_mentors
+
+
+def compiled_search(session):
+    return str(session.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+
+
+@pytest.fixture
+def mock_session():
+    session = MagicMock()
+    session.execute = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[])))
+    scope = MagicMock()
+    scope.__aenter__ = AsyncMock(return_value=session)
+    scope.__aexit__ = AsyncMock(return_value=None)
+    with patch("src.repository.search.session_scope", return_value=scope):
+        yield session
+
+
+@pytest.mark.asyncio
+async def test_search_orders_by_relevance_and_highlights_page(mock_session):
+    assert await search_mentors("олимпиады по математике", 11) == []
+
+    sql = compiled_search(mock_session)
+    assert "prod.mentors.search_vector @@ websearch_to_tsquery" in sql
+    assert "ts_rank_cd(prod.mentors.search_vector" in sql
+    assert "ts_headline" in sql
+    assert "< %(after_rank)s" not in sql
+
+
+@pytest.mark.asyncio
+async def test_search_continues_after_keyset_position(mock_session):
+    await search_mentors("математика", 11, after=(0.25, 42))
+
+    sql = compiled_search(mock_session)
+    assert "< %(after_rank)s OR" in sql
+    assert "prod.mentors.id > %(id_1)s" in sql
+    params = mock_session.execute.call_args.args[0].compile(dialect=postgresql.dialect()).params
+    assert params["after_rank"] == 0.25
+    assert params["id_1"] == 42
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_matches_transliterated_keys(mock_session):
+    await autocomplete_mentors("Ивнаов", 5)
+
+    statement = mock_session.execute.call_args.args[0]
+    sql = compiled_search(mock_session)
+    assert "<%% prod.mentors.name_key" in sql
+    assert "<%% prod.mentors.title_key" in sql
+    assert "greatest(word_similarity(" in sql
+    assert "ivnaov" in statement.compile(dialect=postgresql.dialect()).params.values()
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_skips_query_without_letters(mock_session):
+    assert await autocomplete_mentors(" - ", 5) == []
+    mock_session.execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_search_filters_by_free_days(mock_session):
+    await search_mentors("математика", 11, free_days=["Суббота", "Воскресенье"], free_days_match="all")
+
+    assert "prod.mentors.free_days @> %(free_days_1)s" in compiled_search(mock_session)
+
+    await search_mentors("математика", 11, free_days=["Суббота"])
+
+    assert "prod.mentors.free_days && %(free_days_1)s" in compiled_search(mock_session)
@@ -0,0 +1,122 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.repository import university_repository
+from src.repository.mentor_repository import mentor_filter_conditions
+from src.repository.university_repository import (
+    get_or_create_universities,
+    normalize_university_fields,
+    resolve_university_ids,
+)
+from src.repository.user_repository import user_filter_conditions
+from src.utils.universities import canonical_university_name, normalize_university
+
+
+class AsyncContextManager:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        return self.session
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def university_row(university_id, name, normalized_name):
+    row = MagicMock()
+    row.id = university_id
+    row.name = name
+    row.normalized_name = normalized_name
+    return row
+
+
+@pytest.fixture(autouse=True)
+def clear_university_cache():
+    university_repository._university_ids.clear()
+    yield
+    university_repository._university_ids.clear()
+
+
+@pytest.fixture
+def session():
+    session = AsyncMock()
+    with patch(
+        "src.repository.university_repository.session_scope", return_value=AsyncContextManager(session)
+    ):
+        yield session
+
+
+def sql(condition):
+    return str(condition.compile(dialect=postgresql.dialect()))
+
+
+def test_normalize_university():
+    assert normalize_university("МГУ") == normalize_university(" mgu ") == "mgu"
+    assert normalize_university("Высшая школа экономики") == normalize_university("HSE")
+    assert normalize_university("Новосибирский Гос. Университет") == "novosibirskii gos universitet"
+    assert canonical_university_name("мгу им. ломоносова") == "МГУ"
+    assert canonical_university_name("  Новосибирский   ГУ ") == "Новосибирский ГУ"
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_universities_deduplicates_aliases(session):
+    result = MagicMock()
+    result.all.return_value = [university_row(1, "МГУ", "mgu"), university_row(2, "ВШЭ", "vshe")]
+    session.execute.side_effect = [MagicMock(), result]
+
+    universities = await get_or_create_universities(["MSU", "ВШЭ", "мгу"])
+
+    assert universities == [(1, "МГУ"), (2, "ВШЭ")]
+    insert_sql = sql(session.execute.call_args_list[0].args[0])
+    assert "ON CONFLICT (normalized_name) DO NOTHING" in insert_sql
+    assert university_repository._university_ids == {"mgu": 1, "vshe": 2}
+
+
+@pytest.mark.asyncio
+async def test_resolve_university_ids_uses_cache(session):
+    result = MagicMock()
+    result.all.return_value = [university_row(1, "МГУ", "mgu")]
+    session.execute.return_value = result
+
+    assert await resolve_university_ids(["МГУ", "Неизвестный"]) == [1]
+    assert await resolve_university_ids(["mgu"]) == [1]
+    session.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_normalize_university_fields():
+    with patch(
+        "src.repository.university_repository.get_or_create_universities", new_callable=AsyncMock
+    ) as mock_get_or_create:
+        mock_get_or_create.side_effect = [[(1, "МГУ")], [(1, "МГУ"), (2, "ВШЭ")]]
+
+        mentor_update = await normalize_university_fields({"university": "msu", "title": "Ментор"})
+        user_update = await normalize_university_fields({"target_universities": ["мгу", "hse"]})
+
+    assert mentor_update == {"university": "МГУ", "university_id": 1, "title": "Ментор"}
+    assert user_update == {"target_universities": ["МГУ", "ВШЭ"], "target_university_ids": [1, 2]}
+
+
+@pytest.mark.asyncio
+async def test_filter_conditions_use_university_ids():
+    university_repository._university_ids.update({"mgu": 1, "vshe": 2})
+
+    (mentor_condition,) = await mentor_filter_conditions(["МГУ", "ВШЭ"])
+    (user_condition,) = await user_filter_conditions("HSE")
+
+    assert "mentors.university_id IN" in sql(mentor_condition)
+    assert "users.target_university_ids @>" in sql(user_condition)
+
+
+@pytest.mark.asyncio
+async def test_user_filter_with_unknown_university_matches_nothing(session):
+    result = MagicMock()
+    result.all.return_value = []
+    session.execute.return_value = result
+
+    (condition,) = await user_filter_conditions("Неизвестный университет")
+
+    assert sql(condition) == "false"
@@ -9,7 +9,7 @@ from src.repository.user_repository import (
     get_user_by_login,
     update_user_profile,
     get_users,
-    get_filtered_users,
+    get_users_page,
 )
 
 
@@ -67,3 +67,69 @@ async def test_update_user_avatar():
 
     mock_db.execute.assert_called_once()
     mock_db.commit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_users_page_uses_keyset(mock_db_session):
+    page_result = MagicMock()
+    page_result.all.return_value = [MagicMock(total_count=5)]
+    mock_db_session.execute.return_value = page_result
+
+    with patch(
+        "src.repository.user_repository.session_scope",
+        return_value=AsyncContextManager(mock_db_session),
+    ):
+        users, total = await get_users_page(10, after_id=42, offset=20, admission_type="ЕГЭ")
+
+    assert users == page_result.all.return_value
+    assert total == 5
+    # Страница и общее количество читаются одним запросом
+    mock_db_session.execute.assert_called_once()
+    page_query = str(mock_db_session.execute.call_args.args[0])
+    assert "users.id >" in page_query
+    assert "ORDER BY" in page_query
+    assert "OFFSET" not in page_query
+    assert "password_hash" not in page_query
+    assert "count(*)" in page_query
+    # Подсчет учитывает фильтры, но не позицию keyset
+    count_query = page_query[page_query.index("(SELECT count(*)"):page_query.index(") AS total_count")]
+    assert "admission_type" in count_query
+    assert "users.id >" not in count_query
+
+
+@pytest.mark.asyncio
+async def test_get_users_counts_separately_only_past_the_end(mock_db_session):
+    page_result = MagicMock()
+    page_result.all.return_value = []
+    count_result = MagicMock()
+    count_result.scalar.return_value = 3
+    mock_db_session.execute.side_effect = [page_result, count_result]
+
+    with patch(
+        "src.repository.user_repository.session_scope",
+        return_value=AsyncContextManager(mock_db_session),
+    ):
+        users, total = await get_users(page=5, size=10)
+
+    assert users == []
+    assert total == 3
+
+
+@pytest.mark.asyncio
+async def test_get_users_estimated_total(mock_db_session):
+    user = MagicMock()
+    page_result = MagicMock()
+    page_result.all.return_value = [MagicMock(total_count=1000, __getitem__=lambda self, i: user)]
+    mock_db_session.execute.return_value = page_result
+
+    with patch(
+        "src.repository.user_repository.session_scope",
+        return_value=AsyncContextManager(mock_db_session),
+    ):
+        users, total = await get_users(page=1, size=1, estimate_total=True)
+
+    assert users == [user]
+    assert total == 1000
+    page_query = str(mock_db_session.execute.call_args.args[0])
+    assert "pg_class.reltuples" in page_query
+    assert "coalesce" in page_query
@@ -0,0 +1,294 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+from src.data.models import DayOfWeek
+from src.routers.feed_router import get_mentors_feed, get_users_feed
+from src.services.feed_service import decode_cursor, encode_cursor
+from src.services.singleflight import SingleFlight
+
+
+
+@pytest.fixture(autouse=True)
+def ranking_store():
+    """Postgres-копия ранжирований: по умолчанию пустая"""
+    with patch(
+        "src.services.feed_service.get_feed_ranking", new_callable=AsyncMock, return_value=None
+    ) as mock_get, patch("src.services.feed_service.save_feed_ranking", new_callable=AsyncMock) as mock_save:
+        yield mock_get, mock_save
+
+def make_mentor(mentor_id, description="Описание ментора"):
+    mentor = MagicMock()
+    mentor.id = mentor_id
+    mentor.name = f"Mentor {mentor_id}"
+    mentor.login = f"mentor_{mentor_id}"
+    mentor.title = None
+    mentor.description = description
+    mentor.university = None
+    mentor.admission_type = None
+    mentor.avatar_uuid = None
+    return mentor
+
+
+def make_user(user_id, description="Описание пользователя"):
+    user = MagicMock()
+    user.id = user_id
+    user.name = f"User {user_id}"
+    user.login = f"user_{user_id}"
+    user.description = description
+    user.target_universities = []
+    user.admission_type = None
+    user.avatar_uuid = None
+    return user
+
+
+def stream_of(ids):
+    async def stream(*args, **kwargs):
+        for item_id in ids:
+            yield item_id
+    return stream
+
+
+@pytest.fixture
+def mock_request():
+    request = MagicMock()
+    request.base_url = "http://testserver/"
+    return request
+
+
+@pytest.fixture
+def mock_redis():
+    redis_service = MagicMock()
+    redis_service.generate_ranking_cache_key.return_value = "feed:ranking:key"
+    redis_service.get_generation = AsyncMock(return_value=7)
+    redis_service.get_cache = AsyncMock(return_value=None)
+    redis_service.set_cache = AsyncMock(return_value=True)
+    redis_service.touch_viewer = AsyncMock(return_value=True)
+    return redis_service
+
+
+@pytest.fixture(autouse=True)
+def local_singleflight():
+    with patch("src.services.feed_service.ranking_singleflight", SingleFlight()):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_mentors_feed_caches_full_ranking(mock_request, mock_redis):
+    mentors = [make_mentor(i) for i in range(1, 6)]
+    current_user = make_user(100)
+
+    with patch(
+        "src.services.feed_service.get_mentor_candidates", new_callable=AsyncMock
+    ) as mock_get_candidates, patch(
+        "src.routers.feed_router.get_mentor_feed_rows", new_callable=AsyncMock
+    ) as mock_get_by_ids, patch(
+        "src.services.feed_service.interest_service"
+    ) as mock_interest:
+        mock_get_candidates.return_value = mentors
+        mock_get_by_ids.return_value = [mentors[1], mentors[2]]
+        mock_interest.stream_ranked_mentors = stream_of([5, 4, 3, 2, 1])
+
+        response = await get_mentors_feed(
+            mock_request, current_user, mock_redis, filtered=True, page=2, size=2, prompt=None, cursor=None,
+            free_days=None, free_days_match="any",
+        )
+        # Остаток ранжирования дописывается в кеш в фоне
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    assert [item.id for item in response.items] == [3, 2]
+    assert response.total == 5
+    assert response.pages == 3
+    assert decode_cursor(response.next_cursor) == {"page": 3, "offset": 4}
+    mock_get_by_ids.assert_called_once_with([3, 2])
+    mock_redis.set_cache.assert_called_once_with(
+        "feed:ranking:key",
+        {"ids": [5, 4, 3, 2, 1], "total": 5, "fresh_until": ANY, "compute_time": ANY},
+    )
+    mock_redis.generate_ranking_cache_key.assert_called_once_with(
+        "mentors", 7, current_user.description,
+        {"filtered": True, "target_universities": [], "admission_type": ""},
+    )
+    mock_redis.touch_viewer.assert_called_once_with("users", 100)
+
+
+@pytest.mark.asyncio
+async def test_mentors_feed_cache_hit_hydrates_only_page(mock_request, mock_redis):
+    mock_redis.get_cache.return_value = {"ids": [2, 4, 1, 3, 5], "total": 5}
+
+    with patch(
+        "src.services.feed_service.get_mentor_candidates", new_callable=AsyncMock
+    ) as mock_get_candidates, patch(
+        "src.routers.feed_router.get_mentor_feed_rows", new_callable=AsyncMock
+    ) as mock_get_by_ids, patch(
+        "src.services.feed_service.interest_service"
+    ) as mock_interest:
+        avatar_mentor = make_mentor(4)
+        avatar_mentor.avatar_uuid = "abc"
+        mock_get_by_ids.return_value = [make_mentor(1), avatar_mentor, make_mentor(2)]
+        mock_interest.get_ranked_mentors = AsyncMock()
+
+        response = await get_mentors_feed(
+            mock_request, None, mock_redis, filtered=False, page=1, size=3, prompt="Программирование", cursor=None,
+            free_days=None, free_days_match="any",
+        )
+
+    assert [item.id for item in response.items] == [2, 4, 1]
+    assert response.items[1].avatar_url == "http://testserver/img/abc"
+    assert response.total == 5
+    mock_get_by_ids.assert_called_once_with([2, 4, 1])
+    mock_get_candidates.assert_not_called()
+    mock_interest.get_ranked_mentors.assert_not_called()
+    mock_redis.set_cache.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_users_feed_without_description_is_not_ranked(mock_request, mock_redis):
+    users = [make_user(i) for i in range(1, 4)]
+
+    with patch(
+        "src.routers.feed_router.get_users_page", new_callable=AsyncMock
+    ) as mock_get_users, patch(
+        "src.services.feed_service.interest_service"
+    ) as mock_interest:
+        mock_get_users.return_value = (users, 3)
+        mock_interest.get_ranked_users = AsyncMock()
+
+        response = await get_users_feed(
+            mock_request, None, mock_redis, filtered=True, page=1, size=10, prompt=None, cursor=None
+        )
+
+    assert [item.id for item in response.items] == [1, 2, 3]
+    mock_interest.get_ranked_users.assert_not_called()
+    mock_redis.get_cache.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_mentors_feed_ranked_cursor(mock_request, mock_redis):
+    mock_redis.get_cache.return_value = {"ids": [2, 4, 1, 3, 5], "total": 5}
+
+    with patch(
+        "src.routers.feed_router.get_mentor_feed_rows", new_callable=AsyncMock
+    ) as mock_get_by_ids:
+        mock_get_by_ids.return_value = [make_mentor(1), make_mentor(3)]
+        second = await get_mentors_feed(
+            mock_request, None, mock_redis, filtered=False, page=1, size=2, prompt="Физика",
+            cursor=encode_cursor({"page": 2, "offset": 2}), free_days=None, free_days_match="any",
+        )
+
+        mock_get_by_ids.return_value = [make_mentor(5)]
+        last = await get_mentors_feed(
+            mock_request, None, mock_redis, filtered=False, page=1, size=2, prompt="Физика",
+            cursor=second.next_cursor, free_days=None, free_days_match="any",
+        )
+
+    assert second.page == 2
+    assert [item.id for item in second.items] == [1, 3]
+    assert last.page == 3
+    assert [item.id for item in last.items] == [5]
+    assert last.next_cursor is None
+    mock_get_by_ids.assert_called_with([5])
+
+
+@pytest.mark.asyncio
+async def test_users_feed_keyset_cursor(mock_request, mock_redis):
+    with patch(
+        "src.routers.feed_router.get_users_page", new_callable=AsyncMock
+    ) as mock_get_users:
+        mock_get_users.return_value = ([make_user(3), make_user(8)], 5)
+        first = await get_users_feed(
+            mock_request, None, mock_redis, filtered=False, page=1, size=2, prompt=None, cursor=None
+        )
+
+        mock_get_users.return_value = ([make_user(9), make_user(12)], 5)
+        second = await get_users_feed(
+            mock_request, None, mock_redis, filtered=False, page=1, size=2, prompt=None,
+            cursor=first.next_cursor,
+        )
+
+    assert decode_cursor(first.next_cursor) == {"page": 2, "after": 8}
+    mock_get_users.assert_called_with(
+        2, after_id=8, offset=2, university=None, admission_type=None, estimate_total=False
+    )
+    assert second.page == 2
+    assert [item.id for item in second.items] == [9, 12]
+    assert decode_cursor(second.next_cursor) == {"page": 3, "after": 12}
+
+
+@pytest.mark.asyncio
+async def test_feed_rejects_invalid_cursor(mock_request, mock_redis):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_users_feed(
+            mock_request, None, mock_redis, filtered=False, page=1, size=2, prompt=None,
+            cursor="not-a-cursor",
+        )
+
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_mentors_feed_filters_by_free_days(mock_request, mock_redis):
+    mentors = [make_mentor(i) for i in range(1, 3)]
+
+    with patch(
+        "src.routers.feed_router.get_mentors_page", new_callable=AsyncMock, return_value=(mentors, 2)
+    ) as mock_get_mentors:
+        response = await get_mentors_feed(
+            mock_request, None, mock_redis, filtered=True, page=1, size=10, prompt=None, cursor=None,
+            free_days=[DayOfWeek.SUNDAY, DayOfWeek.SATURDAY], free_days_match="all",
+        )
+
+    assert [item.id for item in response.items] == [1, 2]
+    mock_get_mentors.assert_called_once_with(
+        10,
+        after_id=None,
+        offset=0,
+        target_universities=None,
+        admission_type=None,
+        estimate_total=ANY,
+        free_days=["Суббота", "Воскресенье"],
+        free_days_match="all",
+    )
+
+
+@pytest.mark.asyncio
+async def test_mentors_feed_ranking_key_includes_free_days(mock_request, mock_redis):
+    mentors = [make_mentor(i) for i in range(1, 3)]
+    current_user = make_user(100)
+
+    with patch(
+        "src.services.feed_service.get_mentor_candidates", new_callable=AsyncMock, return_value=mentors
+    ) as mock_get_candidates, patch(
+        "src.routers.feed_router.get_mentor_feed_rows", new_callable=AsyncMock, return_value=mentors
+    ), patch(
+        "src.services.feed_service.interest_service"
+    ) as mock_interest:
+        mock_interest.stream_ranked_mentors = stream_of([2, 1])
+
+        await get_mentors_feed(
+            mock_request, current_user, mock_redis, filtered=False, page=1, size=10, prompt=None, cursor=None,
+            free_days=[DayOfWeek.MONDAY], free_days_match="any",
+        )
+        for _ in range(10):
+            await asyncio.sleep(0)
+
+    mock_redis.generate_ranking_cache_key.assert_called_once_with(
+        "mentors", 7, current_user.description,
+        {
+            "filtered": False,
+            "target_universities": [],
+            "admission_type": "",
+            "free_days": ["Понедельник"],
+            "free_days_match": "any",
+        },
+    )
+    mock_get_candidates.assert_called_once_with(
+        ANY,
+        target_universities=None,
+        admission_type=None,
+        free_days=["Понедельник"],
+        free_days_match="any",
+    )
@@ -0,0 +1,139 @@
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.repository.search import HIGHLIGHT_START, HIGHLIGHT_STOP
+from src.routers.search_router import (
+    autocomplete_mentors_endpoint,
+    autocomplete_universities_endpoint,
+    render_headline,
+    search_mentors_endpoint,
+    search_users_endpoint,
+)
+from src.services.feed_service import decode_cursor, encode_cursor
+
+
+def make_mentor_hit(mentor_id, rank, headline=None):
+    mentor = MagicMock()
+    mentor.id = mentor_id
+    mentor.name = f"Mentor {mentor_id}"
+    mentor.login = f"mentor_{mentor_id}"
+    mentor.title = None
+    mentor.description = "Готовлю к олимпиадам по математике"
+    mentor.university = None
+    mentor.avatar_uuid = None
+    mentor.rank = rank
+    mentor.headline = headline
+    return mentor
+
+
+def make_user_hit(user_id, rank, headline=None):
+    user = MagicMock()
+    user.id = user_id
+    user.name = f"User {user_id}"
+    user.login = f"user_{user_id}"
+    user.description = "Ищу ментора по математике"
+    user.target_universities = []
+    user.admission_type = None
+    user.avatar_uuid = None
+    user.rank = rank
+    user.headline = headline
+    return user
+
+
+@pytest.fixture
+def mock_request():
+    request = MagicMock()
+    request.base_url = "http://testserver/"
+    return request
+
+
+def test_render_headline_escapes_text_and_marks_matches():
+    headline = f"<b>олимпиады</b> по {HIGHLIGHT_START}математике{HIGHLIGHT_STOP}"
+    assert render_headline(headline) == "&lt;b&gt;олимпиады&lt;/b&gt; по <mark>математике</mark>"
+    assert render_headline(None) is None
+
+
+@pytest.mark.asyncio
+async def test_search_mentors_returns_ranked_hits_and_next_cursor(mock_request):
+    rows = [make_mentor_hit(1, 0.9), make_mentor_hit(5, 0.4), make_mentor_hit(7, 0.4)]
+    with patch("src.routers.search_router.search_mentors", new_callable=AsyncMock, return_value=rows) as mock_search:
+        response = await search_mentors_endpoint(
+            mock_request, q="математика", size=2, cursor=None, free_days=None, free_days_match="any"
+        )
+
+    mock_search.assert_awaited_once_with("математика", 3, None, None, "any")
+    assert [item.id for item in response.items] == [1, 5]
+    assert [item.rank for item in response.items] == [0.9, 0.4]
+    assert decode_cursor(response.next_cursor, float_keys=("rank",)) == {"rank": 0.4, "after": 5}
+
+
+@pytest.mark.asyncio
+async def test_search_mentors_passes_cursor_position(mock_request):
+    cursor = encode_cursor({"rank": 0.4, "after": 5})
+    rows = [make_mentor_hit(7, 0.4, headline=f"по {HIGHLIGHT_START}математике{HIGHLIGHT_STOP}")]
+    with patch("src.routers.search_router.search_mentors", new_callable=AsyncMock, return_value=rows) as mock_search:
+        response = await search_mentors_endpoint(
+            mock_request, q="математика", size=2, cursor=cursor, free_days=None, free_days_match="any"
+        )
+
+    mock_search.assert_awaited_once_with("математика", 3, (0.4, 5), None, "any")
+    assert response.items[0].headline == "по <mark>математике</mark>"
+    assert response.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_search_users_returns_hits(mock_request):
+    rows = [make_user_hit(3, 0.7)]
+    with patch("src.routers.search_router.search_users", new_callable=AsyncMock, return_value=rows):
+        response = await search_users_endpoint(mock_request, q="математика", size=10, cursor=None)
+
+    assert [item.id for item in response.items] == [3]
+    assert response.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_invalid_cursor(mock_request):
+    with patch("src.routers.search_router.search_users", new_callable=AsyncMock) as mock_search:
+        with pytest.raises(HTTPException) as exc_info:
+            await search_users_endpoint(mock_request, q="математика", size=10, cursor="not-a-cursor")
+
+    assert exc_info.value.status_code == 400
+    mock_search.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_universities_uses_prefix_index():
+    with patch("src.routers.search_router.university_index") as mock_index, patch(
+        "src.routers.search_router.search_universities", new_callable=AsyncMock
+    ) as mock_fuzzy:
+        mock_index.search = AsyncMock(return_value=[(1, "МГУ")])
+        response = await autocomplete_universities_endpoint(q="мг", size=5)
+
+    assert [(item.id, item.name) for item in response.items] == [(1, "МГУ")]
+    mock_fuzzy.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_universities_falls_back_to_trigram_search():
+    row = MagicMock()
+    row.id, row.name = 4, "МФТИ"
+    with patch("src.routers.search_router.university_index") as mock_index, patch(
+        "src.routers.search_router.search_universities", new_callable=AsyncMock, return_value=[row]
+    ) as mock_fuzzy:
+        mock_index.search = AsyncMock(return_value=[])
+        response = await autocomplete_universities_endpoint(q="мфит", size=5)
+
+    mock_fuzzy.assert_awaited_once_with("мфит", 5)
+    assert [(item.id, item.name) for item in response.items] == [(4, "МФТИ")]
+
+
+@pytest.mark.asyncio
+async def test_autocomplete_mentors_returns_suggestions():
+    row = make_mentor_hit(2, 0.0)
+    row.title = "Преподаватель"
+    with patch("src.routers.search_router.autocomplete_mentors", new_callable=AsyncMock, return_value=[row]):
+        response = await autocomplete_mentors_endpoint(q="mentr", size=5)
+
+    assert response.items[0].login == "mentor_2"
+    assert response.items[0].title == "Преподаватель"
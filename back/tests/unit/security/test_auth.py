@@ -5,13 +5,14 @@ from datetime import datetime, timedelta
 from fastapi import HTTPException
 
 from src.security.auth import (
-    verify_password,
-    get_password_hash,
+    check_password,
+    hash_password,
     create_access_token,
     get_current_user,
     get_current_mentor,
     get_optional_current_user,
     get_optional_current_mentor,
+    get_optional_current_principal,
 )
 from src.config import SECRET_KEY, ALGORITHM, Roles
 
@@ -21,34 +22,37 @@ def mock_token():
     return "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJzdWIiOiJ0ZXN0X3VzZXIiLCJleHAiOjk5OTk5OTk5OTksInJvbGUiOiJ1c2VyIn0.signature"
 
 
-def test_verify_password_success():
-    with patch("src.security.auth.pwd_context.verify") as mock_verify:
-        mock_verify.return_value = True
+@pytest.mark.asyncio
+async def test_check_password_success():
+    with patch("src.security.auth.password_hasher.context") as mock_context:
+        mock_context.verify_and_update.return_value = (True, None)
 
-        result = verify_password("plain_password", "hashed_password")
+        result = await check_password("plain_password", "hashed_password")
 
-        assert result is True
-        mock_verify.assert_called_once_with("plain_password", "hashed_password")
+        assert result == (True, None)
+        mock_context.verify_and_update.assert_called_once_with("plain_password", "hashed_password")
 
 
-def test_verify_password_failure():
-    with patch("src.security.auth.pwd_context.verify") as mock_verify:
-        mock_verify.return_value = False
+@pytest.mark.asyncio
+async def test_check_password_failure():
+    with patch("src.security.auth.password_hasher.context") as mock_context:
+        mock_context.verify_and_update.return_value = (False, None)
 
-        result = verify_password("wrong_password", "hashed_password")
+        result = await check_password("wrong_password", "hashed_password")
 
-        assert result is False
-        mock_verify.assert_called_once_with("wrong_password", "hashed_password")
+        assert result == (False, None)
+        mock_context.verify_and_update.assert_called_once_with("wrong_password", "hashed_password")
 
 
-def test_get_password_hash():
-    with patch("src.security.auth.pwd_context.hash") as mock_hash:
-        mock_hash.return_value = "hashed_password"
+@pytest.mark.asyncio
+async def test_hash_password():
+    with patch("src.security.auth.password_hasher.context") as mock_context:
+        mock_context.hash.return_value = "hashed_password"
 
-        result = get_password_hash("plain_password")
+        result = await hash_password("plain_password")
 
         assert result == "hashed_password"
-        mock_hash.assert_called_once_with("plain_password")
+        mock_context.hash.assert_called_once_with("plain_password")
 
 
 def test_create_access_token():
@@ -300,7 +304,7 @@ async def test_get_current_mentor_not_found(mock_token):
 @pytest.mark.asyncio
 async def test_get_optional_current_user_valid_token(mock_token):
     with patch("src.security.auth.jwt.decode") as mock_decode, patch(
-        "src.security.auth.get_user_by_login", new_callable=AsyncMock
+        "src.security.auth.get_principal", new_callable=AsyncMock
     ) as mock_get_user:
         mock_decode.return_value = {"sub": "test_user", "role": Roles.USER}
 
@@ -314,7 +318,7 @@ async def test_get_optional_current_user_valid_token(mock_token):
         mock_decode.assert_called_once_with(
             mock_token, SECRET_KEY, algorithms=[ALGORITHM]
         )
-        mock_get_user.assert_called_once_with("test_user")
+        mock_get_user.assert_called_once_with(Roles.USER, "test_user")
 
 
 @pytest.mark.asyncio
@@ -359,7 +363,7 @@ async def test_get_optional_current_user_wrong_role(mock_token):
 @pytest.mark.asyncio
 async def test_get_optional_current_user_not_found(mock_token):
     with patch("src.security.auth.jwt.decode") as mock_decode, patch(
-        "src.security.auth.get_user_by_login", new_callable=AsyncMock
+        "src.security.auth.get_principal", new_callable=AsyncMock
     ) as mock_get_user:
         mock_decode.return_value = {"sub": "test_user", "role": Roles.USER}
         mock_get_user.return_value = None  # User not found
@@ -372,7 +376,7 @@ async def test_get_optional_current_user_not_found(mock_token):
 @pytest.mark.asyncio
 async def test_get_optional_current_user_inactive(mock_token):
     with patch("src.security.auth.jwt.decode") as mock_decode, patch(
-        "src.security.auth.get_user_by_login", new_callable=AsyncMock
+        "src.security.auth.get_principal", new_callable=AsyncMock
     ) as mock_get_user:
         mock_decode.return_value = {"sub": "test_user", "role": Roles.USER}
 
@@ -388,7 +392,7 @@ async def test_get_optional_current_user_inactive(mock_token):
 @pytest.mark.asyncio
 async def test_get_optional_current_mentor_valid_token(mock_token):
     with patch("src.security.auth.jwt.decode") as mock_decode, patch(
-        "src.security.auth.get_mentor_by_login", new_callable=AsyncMock
+        "src.security.auth.get_principal", new_callable=AsyncMock
     ) as mock_get_mentor:
         mock_decode.return_value = {"sub": "test_mentor", "role": Roles.MENTOR}
 
@@ -402,7 +406,7 @@ async def test_get_optional_current_mentor_valid_token(mock_token):
         mock_decode.assert_called_once_with(
             mock_token, SECRET_KEY, algorithms=[ALGORITHM]
         )
-        mock_get_mentor.assert_called_once_with("test_mentor")
+        mock_get_mentor.assert_called_once_with(Roles.MENTOR, "test_mentor")
 
 
 @pytest.mark.asyncio
@@ -437,7 +441,7 @@ async def test_get_optional_current_mentor_missing_sub(mock_token):
 @pytest.mark.asyncio
 async def test_get_optional_current_mentor_not_found(mock_token):
     with patch("src.security.auth.jwt.decode") as mock_decode, patch(
-        "src.security.auth.get_mentor_by_login", new_callable=AsyncMock
+        "src.security.auth.get_principal", new_callable=AsyncMock
     ) as mock_get_mentor:
         mock_decode.return_value = {"sub": "test_mentor", "role": Roles.MENTOR}
         mock_get_mentor.return_value = None  # Mentor not found
@@ -450,7 +454,7 @@ async def test_get_optional_current_mentor_not_found(mock_token):
 @pytest.mark.asyncio
 async def test_get_optional_current_mentor_inactive(mock_token):
     with patch("src.security.auth.jwt.decode") as mock_decode, patch(
-        "src.security.auth.get_mentor_by_login", new_callable=AsyncMock
+        "src.security.auth.get_principal", new_callable=AsyncMock
     ) as mock_get_mentor:
         mock_decode.return_value = {"sub": "test_mentor", "role": Roles.MENTOR}
 
@@ -461,3 +465,50 @@ async def test_get_optional_current_mentor_inactive(mock_token):
         result = await get_optional_current_mentor(mock_token)
 
         assert result is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("role", [Roles.USER, Roles.MENTOR])
+async def test_get_optional_current_principal_resolves_token_role(mock_token, role):
+    with patch("src.security.auth.jwt.decode") as mock_decode, patch(
+        "src.security.auth.get_principal", new_callable=AsyncMock
+    ) as mock_get_principal:
+        mock_decode.return_value = {"sub": "someone", "role": role}
+        principal = MagicMock()
+        principal.is_active = True
+        mock_get_principal.return_value = principal
+
+        result = await get_optional_current_principal(mock_token)
+
+        assert result == principal
+        mock_decode.assert_called_once_with(mock_token, SECRET_KEY, algorithms=[ALGORITHM])
+        mock_get_principal.assert_called_once_with(role, "someone")
+
+
+@pytest.mark.asyncio
+async def test_get_optional_current_principal_rejects_unknown_role(mock_token):
+    with patch("src.security.auth.jwt.decode") as mock_decode, patch(
+        "src.security.auth.get_principal", new_callable=AsyncMock
+    ) as mock_get_principal:
+        mock_decode.return_value = {"sub": "someone", "role": Roles.ADMIN}
+
+        assert await get_optional_current_principal(mock_token) is None
+        mock_get_principal.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_optional_current_principal_invalid_or_inactive(mock_token):
+    with patch("src.security.auth.jwt.decode") as mock_decode, patch(
+        "src.security.auth.get_principal", new_callable=AsyncMock
+    ) as mock_get_principal:
+        mock_decode.side_effect = jwt.PyJWTError()
+        assert await get_optional_current_principal(mock_token) is None
+        assert await get_optional_current_principal(None) is None
+
+        mock_decode.side_effect = None
+        mock_decode.return_value = {"sub": "someone", "role": Roles.USER}
+        principal = MagicMock()
+        principal.is_active = False
+        mock_get_principal.return_value = principal
+        assert await get_optional_current_principal(mock_token) is None
+
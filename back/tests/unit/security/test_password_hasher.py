@@ -0,0 +1,98 @@
+import asyncio
+import threading
+
+import pytest
+from unittest.mock import MagicMock
+
+from src.security.password_hasher import PasswordHasher
+
+
+def make_hasher(concurrency=2):
+    hasher = PasswordHasher(rounds=4, concurrency=concurrency)
+    # passlib/bcrypt не вызываются: проверяется только работа пула и счетчики
+    hasher.context = MagicMock()
+    return hasher
+
+
+@pytest.mark.asyncio
+async def test_hash_runs_in_bcrypt_thread():
+    hasher = make_hasher()
+    threads = []
+
+    def fake_hash(password):
+        threads.append(threading.current_thread().name)
+        return f"hashed:{password}"
+
+    hasher.context.hash.side_effect = fake_hash
+    try:
+        result = await hasher.hash("secret")
+    finally:
+        hasher.shutdown()
+
+    assert result == "hashed:secret"
+    assert threads[0].startswith("bcrypt")
+    stats = hasher.stats()
+    assert stats["operations"] == {"hash": 1, "verify": 0}
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_verify_counts_rehash():
+    hasher = make_hasher()
+    hasher.context.verify_and_update.side_effect = [(True, None), (True, "new_hash"), (False, None)]
+    try:
+        results = [await hasher.verify("secret", "hash") for _ in range(3)]
+    finally:
+        hasher.shutdown()
+
+    assert results == [(True, None), (True, "new_hash"), (False, None)]
+    stats = hasher.stats()
+    assert stats["operations"] == {"hash": 0, "verify": 3}
+    assert stats["rehashes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    hasher = make_hasher(concurrency=2)
+    lock = threading.Lock()
+    running = 0
+    peak = 0
+    release = threading.Event()
+
+    def fake_hash(password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        release.wait(1)
+        with lock:
+            running -= 1
+        return password
+
+    hasher.context.hash.side_effect = fake_hash
+    try:
+        tasks = [asyncio.create_task(hasher.hash(str(i))) for i in range(5)]
+        await asyncio.sleep(0.05)
+        assert hasher.stats()["in_flight"] == 5
+        release.set()
+        results = await asyncio.gather(*tasks)
+    finally:
+        hasher.shutdown()
+
+    assert results == [str(i) for i in range(5)]
+    assert peak == 2
+    assert hasher.stats()["queue_wait_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_failed_operation_is_counted_and_raised():
+    hasher = make_hasher()
+    hasher.context.verify_and_update.side_effect = ValueError("malformed hash")
+    try:
+        with pytest.raises(ValueError):
+            await hasher.verify("secret", "broken")
+    finally:
+        hasher.shutdown()
+
+    assert hasher.stats()["operations"]["verify"] == 1
+    assert hasher.stats()["in_flight"] == 0
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from src.services.cache_codec import COMPRESSORS, SERIALIZERS, CacheCodec, CodecError
+
+VALUE = {"ids": list(range(1, 500)), "total": 499, "label": "Ментор по математике"}
+
+AVAILABLE = [
+    (serializer, compression)
+    for serializer, (_, serializer_impl) in SERIALIZERS.items()
+    for compression, (_, compressor_impl) in COMPRESSORS.items()
+    if serializer_impl is not None and compressor_impl is not None
+]
+
+
+@pytest.mark.parametrize("serializer,compression", AVAILABLE)
+def test_roundtrip(serializer, compression):
+    codec = CacheCodec(serializer, compression, compression_threshold=64)
+
+    assert codec.decode(codec.encode(VALUE)) == VALUE
+
+
+def test_small_values_are_not_compressed():
+    codec = CacheCodec("json", "zlib", compression_threshold=1024)
+
+    encoded = codec.encode({"ids": [1], "total": 1})
+
+    assert encoded[3] == 0
+    assert encoded[4:] == b'{"ids":[1],"total":1}'
+
+
+def test_large_values_are_compressed():
+    codec = CacheCodec("json", "zlib", compression_threshold=64)
+
+    encoded = codec.encode(VALUE)
+
+    assert encoded[3] == COMPRESSORS["zlib"][0]
+    assert len(encoded) < len(json.dumps(VALUE))
+
+
+def test_decode_reads_values_written_with_other_settings():
+    written = CacheCodec("json", "zlib", compression_threshold=0).encode(VALUE)
+
+    assert CacheCodec("orjson", "none").decode(written) == VALUE
+
+
+def test_decode_reads_legacy_json():
+    assert CacheCodec("orjson", "lz4").decode(b'{"ids": [1, 2]}') == {"ids": [1, 2]}
+    assert CacheCodec("orjson", "lz4").decode('{"ids": [3]}') == {"ids": [3]}
+
+
+def test_decode_rejects_unknown_version():
+    encoded = bytearray(CacheCodec("json").encode(VALUE))
+    encoded[1] = 99
+
+    with pytest.raises(CodecError):
+        CacheCodec.decode(bytes(encoded))
+
+
+def test_unknown_codec_names_are_rejected():
+    with pytest.raises(ValueError):
+        CacheCodec("pickle")
+    with pytest.raises(ValueError):
+        CacheCodec("json", "brotli")
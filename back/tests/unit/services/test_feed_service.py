@@ -0,0 +1,296 @@
+import asyncio
+import time
+
+import pytest
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+from src.config import FEED_DEGRADED_CACHE_TTL, REDIS_CACHE_TTL
+from src.services.feed_service import (
+    decode_cursor,
+    encode_cursor,
+    get_user_ranking,
+    is_stale,
+    merge_ranked_ids,
+)
+from src.services.interest_rating import ranking_degraded
+from src.services.redis_service import RedisService
+from src.services.singleflight import SingleFlight
+
+
+
+@pytest.fixture(autouse=True)
+def ranking_store():
+    """Postgres-копия ранжирований: по умолчанию пустая"""
+    with patch(
+        "src.services.feed_service.get_feed_ranking", new_callable=AsyncMock, return_value=None
+    ) as mock_get, patch("src.services.feed_service.save_feed_ranking", new_callable=AsyncMock) as mock_save:
+        yield mock_get, mock_save
+
+def make_user(user_id):
+    user = MagicMock()
+    user.id = user_id
+    user.description = f"Описание {user_id}"
+    user.target_universities = []
+    user.admission_type = None
+    return user
+
+
+def test_merge_ranked_ids_normalizes_and_appends_missing():
+    assert merge_ranked_ids(["3", 1, 99, 3], [1, 2, 3]) == [3, 1, 2]
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor({"page": 3, "after": 42})
+
+    assert decode_cursor(cursor) == {"page": 3, "after": 42}
+    with pytest.raises(ValueError):
+        decode_cursor("bm90LWpzb24")
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor({"page": -1}))
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rankings_are_coalesced():
+    redis_service = MagicMock()
+    redis_service.generate_ranking_cache_key.return_value = "feed:ranking:key"
+    redis_service.get_generation = AsyncMock(return_value=1)
+    redis_service.get_cache = AsyncMock(return_value=None)
+    redis_service.set_cache = AsyncMock(return_value=True)
+
+    async def slow_ranking(users, mentor_description, preferences=None):
+        await asyncio.sleep(0.01)
+        return [user["id"] for user in reversed(users)]
+
+    with patch(
+        "src.services.feed_service.ranking_singleflight", SingleFlight()
+    ), patch(
+        "src.services.feed_service.get_user_candidates", new_callable=AsyncMock
+    ) as mock_get_users, patch(
+        "src.services.feed_service.interest_service"
+    ) as mock_interest:
+        mock_get_users.return_value = [make_user(1), make_user(2)]
+        mock_interest.get_ranked_users = AsyncMock(side_effect=slow_ranking)
+
+        results = await asyncio.gather(
+            *[get_user_ranking(redis_service, None, "Описание ментора") for _ in range(5)]
+        )
+
+    assert all(result["ids"] == [2, 1] and result["total"] == 2 for result in results)
+    mock_interest.get_ranked_users.assert_called_once()
+    redis_service.set_cache.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_degraded_ranking_cached_with_short_ttl(ranking_store):
+    redis_service = MagicMock()
+    redis_service.generate_ranking_cache_key.return_value = "feed:ranking:key"
+    redis_service.get_generation = AsyncMock(return_value=1)
+    redis_service.get_cache = AsyncMock(return_value=None)
+    redis_service.set_cache = AsyncMock(return_value=True)
+
+    async def degraded_ranking(users, mentor_description, preferences=None):
+        ranking_degraded.set(True)
+        return [user["id"] for user in users]
+
+    with patch("src.services.feed_service.ranking_singleflight", SingleFlight()), patch(
+        "src.services.feed_service.get_user_candidates", new_callable=AsyncMock
+    ) as mock_get_users, patch("src.services.feed_service.interest_service") as mock_interest:
+        mock_get_users.return_value = [make_user(1)]
+        mock_interest.get_ranked_users = AsyncMock(side_effect=degraded_ranking)
+
+        await get_user_ranking(redis_service, None, "описание")
+
+    redis_service.set_cache.assert_called_once_with(
+        "feed:ranking:key",
+        {"ids": [1], "total": 1, "fresh_until": ANY, "compute_time": ANY},
+        FEED_DEGRADED_CACHE_TTL,
+    )
+    ranking_store[1].assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_streaming_ranking_returns_first_page_early():
+    redis_service = MagicMock()
+    redis_service.generate_ranking_cache_key.return_value = "feed:ranking:stream"
+    redis_service.get_generation = AsyncMock(return_value=1)
+    redis_service.get_cache = AsyncMock(return_value=None)
+    redis_service.set_cache = AsyncMock(return_value=True)
+    release = asyncio.Event()
+
+    async def stream(users, mentor_description, preferences=None):
+        for user_id in (3, 1):
+            yield user_id
+        await release.wait()
+        yield 2
+
+    with patch("src.services.feed_service.ranking_singleflight", SingleFlight()), patch(
+        "src.services.feed_service.get_user_candidates", new_callable=AsyncMock
+    ) as mock_get_users, patch("src.services.feed_service.interest_service") as mock_interest:
+        mock_get_users.return_value = [make_user(i) for i in (1, 2, 3, 4)]
+        mock_interest.stream_ranked_users = stream
+
+        first = await get_user_ranking(redis_service, None, "описание", min_ids=2)
+        assert first == {"ids": [3, 1], "total": 4}
+        redis_service.set_cache.assert_not_called()
+
+        # Второй запрос присоединяется к тому же потоку
+        waiting = asyncio.ensure_future(get_user_ranking(redis_service, None, "описание", min_ids=3))
+        await asyncio.sleep(0)
+        release.set()
+        second = await waiting
+
+    assert second["ids"][:3] == [3, 1, 2]
+    await asyncio.sleep(0)
+    redis_service.set_cache.assert_called_once_with(
+        "feed:ranking:stream", {"ids": [3, 1, 2, 4], "total": 4, "fresh_until": ANY, "compute_time": ANY}
+    )
+    assert mock_interest.get_ranked_users.call_count == 0
+
+
+def test_is_stale_after_soft_ttl():
+    ranking = {"ids": [1], "total": 1, "fresh_until": 100.0, "compute_time": 2.0}
+
+    assert not is_stale(ranking, now=99.0, beta=0)
+    assert is_stale(ranking, now=100.0, beta=0)
+    assert not is_stale({"ids": [1], "total": 1}, now=1e12)
+
+
+def test_is_stale_refreshes_early_with_probability():
+    ranking = {"ids": [1], "total": 1, "fresh_until": 100.0, "compute_time": 2.0}
+
+    # -2 * ln(1 - 0.99) ~ 9.2 секунды раньше срока
+    assert is_stale(ranking, now=95.0, beta=1.0, rand=lambda: 0.99)
+    assert not is_stale(ranking, now=95.0, beta=1.0, rand=lambda: 0.1)
+
+
+def make_stale_redis(stale):
+    redis_service = MagicMock()
+    redis_service.generate_ranking_cache_key.return_value = "feed:ranking:key"
+    redis_service.get_generation = AsyncMock(return_value=1)
+    redis_service.get_cache = AsyncMock(return_value=stale)
+    redis_service.set_cache = AsyncMock(return_value=True)
+    redis_service.acquire_lock = AsyncMock(return_value=MagicMock())
+    redis_service.release_lock = AsyncMock()
+    redis_service.publish_invalidation = AsyncMock(return_value=True)
+    return redis_service
+
+
+@pytest.mark.asyncio
+async def test_stale_ranking_is_served_and_refreshed_in_background():
+    stale = {"ids": [1, 2], "total": 2, "fresh_until": 0.0, "compute_time": 0.0}
+    redis_service = make_stale_redis(stale)
+
+    async def ranking(users, mentor_description, preferences=None):
+        return [user["id"] for user in reversed(users)]
+
+    with patch("src.services.feed_service.get_user_candidates", new_callable=AsyncMock) as mock_get_users, patch(
+        "src.services.feed_service.interest_service"
+    ) as mock_interest:
+        mock_get_users.return_value = [make_user(1), make_user(2)]
+        mock_interest.get_ranked_users = AsyncMock(side_effect=ranking)
+
+        results = await asyncio.gather(*[get_user_ranking(redis_service, None, "описание") for _ in range(3)])
+        assert all(result is stale for result in results)
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    mock_interest.get_ranked_users.assert_called_once()
+    redis_service.acquire_lock.assert_called_once_with("refresh:feed:ranking:key", ANY)
+    redis_service.set_cache.assert_called_once_with(
+        "feed:ranking:key", {"ids": [2, 1], "total": 2, "fresh_until": ANY, "compute_time": ANY}
+    )
+    redis_service.publish_invalidation.assert_called_once_with("feed:ranking:key")
+    redis_service.release_lock.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_stale_ranking_is_not_refreshed_without_lock():
+    stale = {"ids": [1, 2], "total": 2, "fresh_until": 0.0, "compute_time": 0.0}
+    redis_service = make_stale_redis(stale)
+    redis_service.acquire_lock = AsyncMock(return_value=None)
+
+    with patch("src.services.feed_service.interest_service") as mock_interest:
+        mock_interest.get_ranked_users = AsyncMock()
+
+        assert await get_user_ranking(redis_service, None, "описание") is stale
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    mock_interest.get_ranked_users.assert_not_called()
+    redis_service.set_cache.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ranking_is_read_through_from_postgres(ranking_store):
+    mock_get, mock_save = ranking_store
+    mock_get.return_value = {"ids": [2, 1], "total": 2, "computed_at": time.time()}
+    redis_service = make_stale_redis(None)
+
+    with patch("src.services.feed_service.interest_service") as mock_interest:
+        mock_interest.get_ranked_users = AsyncMock()
+
+        ranking = await get_user_ranking(redis_service, None, "описание")
+
+    assert ranking["ids"] == [2, 1] and ranking["total"] == 2
+    assert not is_stale(ranking, beta=0)
+    mock_get.assert_called_once_with("feed:ranking:key")
+    redis_service.set_cache.assert_called_once_with("feed:ranking:key", ranking, ANY)
+    assert REDIS_CACHE_TTL - 5 <= redis_service.set_cache.call_args.args[2] <= REDIS_CACHE_TTL
+    mock_interest.get_ranked_users.assert_not_called()
+    mock_save.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stored_ranking_is_backfilled_for_remaining_lifetime(ranking_store):
+    mock_get, _ = ranking_store
+    mock_get.return_value = {"ids": [2, 1], "total": 2, "computed_at": time.time() - REDIS_CACHE_TTL + 60}
+    redis_service = make_stale_redis(None)
+
+    with patch("src.services.feed_service.interest_service"):
+        ranking = await get_user_ranking(redis_service, None, "описание")
+
+    assert ranking["ids"] == [2, 1]
+    assert 55 <= redis_service.set_cache.call_args.args[2] <= 60
+
+
+@pytest.mark.asyncio
+async def test_stored_ranking_past_hard_ttl_is_recomputed(ranking_store):
+    mock_get, mock_save = ranking_store
+    mock_get.return_value = {"ids": [2, 1], "total": 2, "computed_at": time.time() - REDIS_CACHE_TTL - 1}
+    redis_service = make_stale_redis(None)
+
+    async def ranking(users, mentor_description, preferences=None):
+        return [user["id"] for user in users]
+
+    with patch("src.services.feed_service.ranking_singleflight", SingleFlight()), patch(
+        "src.services.feed_service.get_user_candidates", new_callable=AsyncMock
+    ) as mock_get_users, patch("src.services.feed_service.interest_service") as mock_interest:
+        mock_get_users.return_value = [make_user(1), make_user(2), make_user(3)]
+        mock_interest.get_ranked_users = AsyncMock(side_effect=ranking)
+
+        result = await get_user_ranking(redis_service, None, "описание")
+
+    assert result["ids"] == [1, 2, 3] and result["total"] == 3
+    mock_interest.get_ranked_users.assert_called_once()
+    mock_save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_computed_ranking_is_written_to_postgres(ranking_store):
+    _, mock_save = ranking_store
+    redis_service = make_stale_redis(None)
+
+    async def ranking(users, mentor_description, preferences=None):
+        return [user["id"] for user in users]
+
+    with patch("src.services.feed_service.ranking_singleflight", SingleFlight()), patch(
+        "src.services.feed_service.get_user_candidates", new_callable=AsyncMock
+    ) as mock_get_users, patch("src.services.feed_service.interest_service") as mock_interest:
+        mock_get_users.return_value = [make_user(1), make_user(2)]
+        mock_interest.get_ranked_users = AsyncMock(side_effect=ranking)
+
+        await get_user_ranking(redis_service, None, "описание")
+
+    mock_save.assert_called_once_with(
+        "feed:ranking:key", "users", 1, RedisService.description_digest("описание"), [1, 2], 2
+    )
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.services.feed_worker import FeedPrecomputeWorker
+from src.services.redis_service import MENTORS_POOL, USERS_POOL
+
+
+def make_worker(**kwargs):
+    redis_service = MagicMock()
+    redis_service.get_active_viewers = AsyncMock(return_value=[])
+    return FeedPrecomputeWorker(redis_service, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_notify_is_noop_when_not_running():
+    worker = make_worker()
+
+    await worker.notify_user_changed(1)
+
+    worker.redis_service.get_active_viewers.assert_not_called()
+    assert worker.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_recently_active_viewers_are_refreshed_first():
+    worker = make_worker(concurrency=1)
+    worker.redis_service.get_active_viewers.return_value = [(10, 300.0), (11, 100.0)]
+    refreshed = []
+
+    async def fake_refresh(pool, viewer_id):
+        refreshed.append((pool, viewer_id))
+
+    worker.refresh = fake_refresh
+    worker.start()
+    # Заполняем очередь до того, как обработчик успеет взять задачу
+    worker.enqueue(MENTORS_POOL, 12, 200.0)
+    await worker.notify_user_changed(1)
+    await worker._queue.join()
+    await worker.stop()
+
+    assert refreshed == [(USERS_POOL, 1), (MENTORS_POOL, 10), (MENTORS_POOL, 12), (MENTORS_POOL, 11)]
+    assert worker.stats()["processed_total"] == 4
+    assert worker.redis_service.get_active_viewers.call_args.args[0] == MENTORS_POOL
+
+
+@pytest.mark.asyncio
+async def test_duplicate_and_overflow_enqueue():
+    worker = make_worker(concurrency=1, queue_size=1)
+    worker.start()
+    # Обработчик еще не запущен, поэтому задачи остаются в очереди
+    assert worker.enqueue(USERS_POOL, 1, 1.0)
+    assert not worker.enqueue(USERS_POOL, 1, 2.0)
+    assert not worker.enqueue(USERS_POOL, 2, 3.0)
+
+    assert worker.stats()["dropped_total"] == 1
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    worker = make_worker(concurrency=2)
+    active = 0
+    max_active = 0
+
+    async def fake_refresh(pool, viewer_id):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    worker.refresh = fake_refresh
+    worker.start()
+    for viewer_id in range(6):
+        worker.enqueue(USERS_POOL, viewer_id, float(viewer_id))
+    await worker._queue.join()
+    await worker.stop()
+
+    assert max_active == 2
+
+
+@pytest.mark.asyncio
+async def test_refresh_user_feed_uses_profile():
+    worker = make_worker()
+    user = MagicMock()
+    user.description = "Люблю математику"
+    user.target_universities = ["МГУ"]
+    user.admission_type = None
+
+    with patch(
+        "src.services.feed_worker.get_users_by_ids", new_callable=AsyncMock
+    ) as mock_get_users, patch(
+        "src.services.feed_worker.get_mentor_ranking", new_callable=AsyncMock
+    ) as mock_ranking:
+        mock_get_users.return_value = [user]
+        await worker.refresh(USERS_POOL, 1)
+
+    preferences = {"target_universities": ["МГУ"], "admission_type": ""}
+    mock_ranking.assert_called_once_with(
+        worker.redis_service, preferences, "Люблю математику", preferences
+    )
+
+
+@pytest.mark.asyncio
+async def test_refresh_skips_mentor_without_description():
+    worker = make_worker()
+    mentor = MagicMock()
+    mentor.description = None
+
+    with patch(
+        "src.services.feed_worker.get_mentor_by_id", new_callable=AsyncMock
+    ) as mock_get_mentor, patch(
+        "src.services.feed_worker.get_user_ranking", new_callable=AsyncMock
+    ) as mock_ranking:
+        mock_get_mentor.return_value = mentor
+        await worker.refresh(MENTORS_POOL, 1)
+
+    mock_ranking.assert_not_called()
@@ -0,0 +1,473 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.interest_rating import (
+    HashedNgramVectorizer,
+    HybridInterestRatingService,
+    IncrementalIdParser,
+    InterestRatingService,
+    LocalInterestRatingService,
+    get_interest_service,
+    hybrid_interest_service,
+    llm_interest_service,
+    local_interest_service,
+    merge_chunk_rankings,
+    merge_ranked_ids,
+    ranking_degraded,
+)
+
+
+def test_vectorizer_is_normalized_and_stable():
+    vectorizer = HashedNgramVectorizer(dim=256)
+
+    first = vectorizer.transform("Олимпиадная математика и физика")
+    second = vectorizer.transform("Олимпиадная математика и физика")
+
+    assert first.dtype == np.float32
+    assert np.isclose(np.linalg.norm(first), 1.0)
+    assert np.array_equal(first, second)
+
+
+def test_vectorizer_empty_text():
+    vector = HashedNgramVectorizer(dim=64).transform(None)
+
+    assert not vector.any()
+
+
+@pytest.mark.asyncio
+async def test_local_ranking_orders_by_similarity():
+    service = LocalInterestRatingService(dim=512)
+    mentors = [
+        {"id": 1, "description": "Готовлю к ЕГЭ по литературе и русскому языку"},
+        {"id": 2, "description": "Олимпиадное программирование, алгоритмы и структуры данных"},
+        {"id": 3, "description": "Химия и биология для медицинских вузов"},
+    ]
+
+    result = await service.get_ranked_mentors(mentors, "Хочу заниматься программированием и алгоритмами")
+
+    assert result[0] == 2
+    assert sorted(result) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_local_ranking_without_description_keeps_order():
+    service = LocalInterestRatingService(dim=64)
+    users = [{"id": 3, "description": "a"}, {"id": 1, "description": "b"}]
+
+    assert await service.get_ranked_users(users, "") == [3, 1]
+
+
+def test_update_recomputes_only_changed_description():
+    service = LocalInterestRatingService(dim=64)
+    service.update_mentor(1, "математика")
+    row = service.mentor_index._rows[1]
+    before = service.mentor_index._matrix[row].copy()
+
+    service.update_mentor(1, "математика")
+    assert np.array_equal(service.mentor_index._matrix[row], before)
+
+    service.update_mentor(1, "биология")
+    assert not np.array_equal(service.mentor_index._matrix[row], before)
+    assert len(service.mentor_index) == 1
+
+
+def test_index_grows_beyond_initial_capacity():
+    service = LocalInterestRatingService(dim=16)
+    for i in range(300):
+        service.update_user(i, f"описание {i}")
+
+    assert len(service.user_index) == 300
+    assert service.user_index._matrix.shape[0] >= 300
+
+
+def test_get_interest_service_by_name():
+    assert get_interest_service("local") is local_interest_service
+    assert get_interest_service("hybrid") is hybrid_interest_service
+    assert get_interest_service("llm") is llm_interest_service
+
+
+def test_merge_ranked_ids_normalizes_and_appends_missing():
+    assert merge_ranked_ids(["3", 1, 99, 3], [1, 2, 3]) == [3, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_local_ranking_profile_match_bonus():
+    service = LocalInterestRatingService(dim=64)
+    mentors = [
+        {"id": 1, "description": "математика", "university": "ВШЭ", "admission_type": "ЕГЭ"},
+        {"id": 2, "description": "математика", "university": "МГУ", "admission_type": "ЕГЭ"},
+    ]
+
+    result = await service.get_ranked_mentors(
+        mentors, "математика", preferences={"target_universities": ["МГУ"], "admission_type": "ЕГЭ"}
+    )
+
+    assert result == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_local_lexical_scorer():
+    service = LocalInterestRatingService(dim=64, scorer="lexical")
+    users = [
+        {"id": 1, "description": "люблю химию"},
+        {"id": 2, "description": "люблю физику и математику"},
+    ]
+
+    assert await service.get_ranked_users(users, "физику") == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_sends_only_top_k_to_llm():
+    local = LocalInterestRatingService(dim=512)
+    llm = MagicMock()
+    llm.get_ranked_mentors = AsyncMock(
+        side_effect=lambda head, description, preferences=None: [m["id"] for m in reversed(head)]
+    )
+    hybrid = HybridInterestRatingService(local, llm, top_k=2)
+    mentors = [
+        {"id": 1, "description": "биология"},
+        {"id": 2, "description": "программирование алгоритмы"},
+        {"id": 3, "description": "алгоритмы"},
+        {"id": 4, "description": "история"},
+    ]
+
+    result = await hybrid.get_ranked_mentors(mentors, "программирование алгоритмы")
+
+    head = llm.get_ranked_mentors.call_args.args[0]
+    assert [m["id"] for m in head] == [2, 3]
+    assert result[:2] == [3, 2]
+    assert sorted(result[2:]) == [1, 4]
+
+
+@pytest.mark.asyncio
+async def test_llm_service_reuses_http_client():
+    service = InterestRatingService()
+
+    client = service.client
+    assert service.client is client
+
+    await service.aclose()
+    assert client.is_closed
+    assert service.client is not client
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_llm_service_ranking_and_stats():
+    service = InterestRatingService()
+    response = MagicMock()
+    response.json.return_value = {"choices": [{"message": {"content": "```json\n[2, 1]\n```"}}]}
+    client = MagicMock(is_closed=False)
+    client.post = AsyncMock(return_value=response)
+    service._client = client
+
+    result = await service.get_ranked_mentors(
+        [{"id": 1, "description": "a"}, {"id": 2, "description": "b"}], "описание"
+    )
+
+    assert result == [2, 1]
+    assert service.pool_stats()["requests_total"] == 1
+    assert service.pool_stats()["requests_in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_service_error_falls_back_to_original_order():
+    service = InterestRatingService()
+    client = MagicMock(is_closed=False)
+    client.post = AsyncMock(side_effect=RuntimeError("boom"))
+    service._client = client
+
+    result = await service.get_ranked_users(
+        [{"id": 5, "description": "a"}, {"id": 6, "description": "b"}], "описание"
+    )
+
+    assert result == [5, 6]
+    assert service.pool_stats()["errors_total"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_timeout_falls_back_to_local_ranking():
+    local = MagicMock()
+    local.get_ranked_mentors = AsyncMock(return_value=[2, 1])
+    service = InterestRatingService(fallback=local)
+    service.deadline = 0.01
+
+    async def slow_post(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    client = MagicMock(is_closed=False)
+    client.post = AsyncMock(side_effect=slow_post)
+    service._client = client
+    mentors = [{"id": 1, "description": "a"}, {"id": 2, "description": "b"}]
+
+    ranking_degraded.set(False)
+    result = await service.get_ranked_mentors(mentors, "описание", {"admission_type": "ЕГЭ"})
+
+    assert result == [2, 1]
+    assert ranking_degraded.get() is True
+    assert service.fallbacks["timeout"] == 1
+    assert service.requests_in_flight == 0
+    local.get_ranked_mentors.assert_called_once_with(mentors, "описание", {"admission_type": "ЕГЭ"})
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_llm():
+    service = InterestRatingService()
+    client = MagicMock(is_closed=False)
+    client.post = AsyncMock(side_effect=RuntimeError("down"))
+    service._client = client
+    users = [{"id": 1, "description": "a"}]
+
+    for _ in range(service.breaker.failure_threshold):
+        await service.get_ranked_users(users, "описание")
+    calls = client.post.call_count
+
+    assert await service.get_ranked_users(users, "описание") == [1]
+    assert client.post.call_count == calls
+    assert service.fallbacks["circuit_open"] == 1
+
+
+def test_incremental_parser_handles_split_chunks():
+    parser = IncrementalIdParser()
+
+    assert parser.feed("```json\n[1") == []
+    assert parser.feed("2, 3") == ["12"]
+    assert parser.feed(', "4"') == ["3", "4"]
+    assert parser.feed("]\n```") == []
+    assert parser.finished
+
+
+def test_incremental_parser_truncated_response():
+    parser = IncrementalIdParser()
+    parser.feed("[5, 6")
+
+    assert parser.close() == ["6"]
+
+
+def sse_lines(chunks):
+    lines = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": chunk}}]})
+        for chunk in chunks
+    ]
+    return lines + ["data: [DONE]"]
+
+
+def make_streaming_client(lines, delay=0.0, error=None):
+    response = MagicMock()
+
+    async def aiter_lines():
+        for line in lines:
+            await asyncio.sleep(delay)
+            yield line
+        if error is not None:
+            raise error
+
+    response.aiter_lines = aiter_lines
+
+    @asynccontextmanager
+    async def stream(*args, **kwargs):
+        yield response
+
+    client = MagicMock(is_closed=False)
+    client.stream = MagicMock(side_effect=stream)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_llm_stream_yields_ids_incrementally():
+    service = InterestRatingService()
+    service._client = make_streaming_client(sse_lines(["```json\n[", "3, 1", ", 2]", "```"]))
+    mentors = [{"id": i, "description": "a"} for i in (1, 2, 3, 4)]
+
+    result = [mentor_id async for mentor_id in service.stream_ranked_mentors(mentors, "описание")]
+
+    assert result == [3, 1, 2, 4]
+    assert service.client.stream.call_args.kwargs["json"]["stream"] is True
+    assert service.pool_stats()["requests_in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_llm_stream_error_completes_with_fallback():
+    local = MagicMock()
+    local.get_ranked_users = AsyncMock(return_value=[3, 2, 1])
+    service = InterestRatingService(fallback=local)
+    service._client = make_streaming_client(sse_lines(["[2,"])[:-1], error=RuntimeError("reset"))
+    users = [{"id": i, "description": "a"} for i in (1, 2, 3)]
+
+    ranking_degraded.set(False)
+    result = [user_id async for user_id in service.stream_ranked_users(users, "описание")]
+
+    assert result == [2, 3, 1]
+    assert ranking_degraded.get() is True
+    assert service.fallbacks["error"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hybrid_passes_preferences_to_llm():
+    local = LocalInterestRatingService(dim=512)
+    llm = MagicMock()
+    llm.get_ranked_users = AsyncMock(side_effect=lambda head, description, preferences=None: [u["id"] for u in head])
+    hybrid = HybridInterestRatingService(local, llm, top_k=2)
+    users = [{"id": 1, "description": "физика"}, {"id": 2, "description": "химия"}]
+    preferences = {"university": "МГУ", "admission_type": "ЕГЭ"}
+
+    await hybrid.get_ranked_users(users, "физика", preferences)
+
+    assert llm.get_ranked_users.call_args.args[2] == preferences
+
+
+@pytest.mark.asyncio
+async def test_hybrid_stream_emits_head_then_tail():
+    local = LocalInterestRatingService(dim=512)
+    llm = MagicMock()
+
+    async def stream(head, description, preferences=None):
+        for mentor in reversed(head):
+            yield mentor["id"]
+
+    llm.stream_ranked_mentors = stream
+    hybrid = HybridInterestRatingService(local, llm, top_k=2)
+    mentors = [
+        {"id": 1, "description": "биология"},
+        {"id": 2, "description": "программирование алгоритмы"},
+        {"id": 3, "description": "алгоритмы"},
+    ]
+
+    result = [m async for m in hybrid.stream_ranked_mentors(mentors, "программирование алгоритмы")]
+
+    assert result == [3, 2, 1]
+
+
+def test_merge_chunk_rankings_interleaves_by_relative_position():
+    assert merge_chunk_rankings([[1, 2, 3, 4], [5, 6]]) == [1, 5, 2, 3, 6, 4]
+
+
+def test_small_pool_is_not_chunked():
+    service = InterestRatingService()
+    mentors = [{"id": i, "description": "коротко"} for i in range(10)]
+
+    assert len(service._chunk(mentors, "описание")) == 1
+
+
+def test_large_pool_is_striped_into_budgeted_chunks():
+    service = InterestRatingService()
+    service.chunk_token_budget = 600
+    mentors = [{"id": i, "description": "описание " * 20} for i in range(40)]
+
+    chunks = service._chunk(mentors, "описание")
+
+    assert len(chunks) > 1
+    assert sorted(m["id"] for chunk in chunks for m in chunk) == list(range(40))
+    assert [m["id"] for m in chunks[0]][:2] == [0, len(chunks)]
+    for chunk in chunks:
+        prompt_lines = "\n".join(f"ID: {m['id']}, Описание: {m['description']}" for m in chunk)
+        assert service.estimate_tokens(prompt_lines) <= service.chunk_token_budget
+
+
+@pytest.mark.asyncio
+async def test_chunks_ranked_concurrently_and_merged():
+    service = InterestRatingService()
+    service.chunk_token_budget = 600
+    service.chunk_concurrency = 8
+    active = 0
+    max_active = 0
+
+    async def fake_complete(system_prompt, prompt):
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        ids = [int(line.split(",")[0][4:]) for line in prompt.splitlines() if line.startswith("ID: ")]
+        return json.dumps(sorted(ids, reverse=True))
+
+    service._complete = fake_complete
+    mentors = [{"id": i, "description": "описание " * 20} for i in range(40)]
+    chunks = service._chunk(mentors, "описание")
+
+    result = await service.get_ranked_mentors(mentors, "описание")
+
+    assert 1 < len(chunks) <= service.chunk_concurrency
+    assert sorted(result) == list(range(40))
+    assert max_active == len(chunks)
+    # Каждая часть отсортирована по убыванию id, поэтому голова слияния — наибольшие id частей
+    assert result[0] == max(m["id"] for m in chunks[0])
+
+
+@pytest.mark.asyncio
+async def test_chunk_count_is_capped_and_tail_ranked_locally():
+    local = MagicMock()
+    local.get_ranked_mentors = AsyncMock(side_effect=lambda items, *args: [m["id"] for m in reversed(items)])
+    service = InterestRatingService(fallback=local)
+    service.chunk_token_budget = 600
+    service.chunk_concurrency = 2
+    prompts = []
+
+    async def fake_complete(system_prompt, prompt):
+        ids = [int(line.split(",")[0][4:]) for line in prompt.splitlines() if line.startswith("ID: ")]
+        prompts.append(ids)
+        return json.dumps(ids)
+
+    service._complete = fake_complete
+    mentors = [{"id": i, "description": "описание " * 20} for i in range(40)]
+
+    ranking_degraded.set(False)
+    result = await service.get_ranked_mentors(mentors, "описание")
+
+    assert len(prompts) == 2
+    sent = sorted(i for ids in prompts for i in ids)
+    # В LLM уходят лучшие по локальному порядку, остальные идут следом в нем же
+    assert sent == list(range(40 - len(sent), 40))
+    assert sorted(result[:len(sent)]) == sent
+    assert result[len(sent):] == list(range(39 - len(sent), -1, -1))
+    assert ranking_degraded.get() is False
+
+
+@pytest.mark.asyncio
+async def test_chunk_fallbacks_mark_ranking_degraded():
+    service = InterestRatingService()
+    service.chunk_token_budget = 600
+    service.chunk_concurrency = 8
+    service._complete = AsyncMock(side_effect=RuntimeError("down"))
+    mentors = [{"id": i, "description": "описание " * 20} for i in range(40)]
+
+    ranking_degraded.set(False)
+    result = await service.get_ranked_mentors(mentors, "описание")
+
+    assert sorted(result) == list(range(40))
+    assert ranking_degraded.get() is True
+
+    ranking_degraded.set(False)
+    streamed = [mentor_id async for mentor_id in service.stream_ranked_mentors(mentors, "описание")]
+
+    assert sorted(streamed) == list(range(40))
+    assert ranking_degraded.get() is True
+
+
+@pytest.mark.asyncio
+async def test_chunks_share_one_deadline():
+    service = InterestRatingService()
+    service.chunk_token_budget = 600
+    service.chunk_concurrency = 8
+    service.deadline = 0.05
+
+    async def hanging_rank(system_prompt, prompt, fallback):
+        await asyncio.sleep(10)
+
+    service._rank = hanging_rank
+    users = [{"id": i, "description": "описание " * 20} for i in range(40)]
+    chunks = service._chunk(users, "описание")
+
+    ranking_degraded.set(False)
+    started = asyncio.get_running_loop().time()
+    result = await service.get_ranked_users(users, "описание")
+
+    assert asyncio.get_running_loop().time() - started < 1
+    assert sorted(result) == list(range(40))
+    assert service.fallbacks["timeout"] == len(chunks)
+    assert ranking_degraded.get() is True
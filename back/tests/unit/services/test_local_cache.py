@@ -0,0 +1,71 @@
+import pytest
+
+from src.services.local_cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_get_counts_hits_and_misses(clock):
+    cache = LRUCache(max_entries=10, ttl=30, clock=clock)
+    cache.set("a", [1, 2])
+
+    assert cache.get("a") == [1, 2]
+    assert cache.get("b") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LRUCache(max_entries=10, ttl=30, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=5)
+
+    clock.now = 10
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+    clock.now = 31
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_is_capped_by_cache_ttl(clock):
+    cache = LRUCache(max_entries=10, ttl=30, clock=clock)
+    cache.set("a", 1, ttl=3600)
+
+    clock.now = 31
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = LRUCache(max_entries=2, ttl=30, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_delete_prefix(clock):
+    cache = LRUCache(max_entries=10, ttl=30, clock=clock)
+    cache.set("feed:ranking:users:1:x", 1)
+    cache.set("feed:ranking:users:2:y", 2)
+    cache.set("feed:ranking:mentors:1:x", 3)
+
+    assert cache.delete_prefix("feed:ranking:users:") == 2
+    assert cache.get("feed:ranking:mentors:1:x") == 3
+    assert len(cache) == 1
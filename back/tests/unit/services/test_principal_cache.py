@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.config import PRINCIPAL_CACHE_TTL, Roles
+from src.data.models import AdmissionType, Mentor, User
+from src.services.principal_cache import get_principal, invalidate_principal, principal_snapshot
+
+AVATAR = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+def make_user():
+    return User(
+        id=1,
+        login="ivan",
+        name="Иван",
+        is_active=True,
+        description="Готовлюсь к олимпиадам",
+        target_universities=["МГУ"],
+        admission_type=AdmissionType.OLYMPIADS,
+        avatar_uuid=AVATAR,
+        email="ivan@example.com",
+    )
+
+
+@pytest.fixture
+def redis():
+    with patch("src.services.principal_cache.redis_service") as mock_redis:
+        mock_redis.get_cache = AsyncMock(return_value=None)
+        mock_redis.set_cache = AsyncMock(return_value=True)
+        mock_redis.delete_cache = AsyncMock(return_value=True)
+        mock_redis.invalidations = 0
+        yield mock_redis
+
+
+@pytest.mark.asyncio
+async def test_miss_loads_profile_and_caches_snapshot(redis):
+    user = make_user()
+    with patch.dict("src.services.principal_cache._loaders", {Roles.USER: AsyncMock(return_value=user)}):
+        assert await get_principal(Roles.USER, "ivan") is user
+
+    redis.set_cache.assert_awaited_once_with(
+        "principal:user:ivan",
+        {
+            "id": 1,
+            "login": "ivan",
+            "name": "Иван",
+            "is_active": True,
+            "description": "Готовлюсь к олимпиадам",
+            "target_universities": ["МГУ"],
+            "admission_type": "олимпиады",
+            "avatar_uuid": str(AVATAR),
+        },
+        PRINCIPAL_CACHE_TTL,
+    )
+
+
+@pytest.mark.asyncio
+async def test_hit_builds_principal_without_database(redis):
+    redis.get_cache.return_value = principal_snapshot(Roles.USER, make_user())
+    loader = AsyncMock()
+
+    with patch.dict("src.services.principal_cache._loaders", {Roles.USER: loader}):
+        principal = await get_principal(Roles.USER, "ivan")
+
+    loader.assert_not_awaited()
+    assert isinstance(principal, User)
+    assert principal.id == 1
+    assert principal.admission_type == AdmissionType.OLYMPIADS
+    assert principal.avatar_uuid == AVATAR
+    assert principal.email is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_read_during_invalidation_is_not_cached(redis):
+    async def load(login):
+        redis.invalidations += 1
+        return make_user()
+
+    with patch.dict("src.services.principal_cache._loaders", {Roles.USER: load}):
+        await get_principal(Roles.USER, "ivan")
+
+    redis.set_cache.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unknown_login_is_not_cached(redis):
+    with patch.dict("src.services.principal_cache._loaders", {Roles.MENTOR: AsyncMock(return_value=None)}):
+        assert await get_principal(Roles.MENTOR, "nobody") is None
+
+    redis.set_cache.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_mentor_snapshot_round_trip(redis):
+    mentor = Mentor(id=2, login="petr", name="Петр", is_active=True, university="ВШЭ", admission_type=None)
+    redis.get_cache.return_value = principal_snapshot(Roles.MENTOR, mentor)
+
+    principal = await get_principal(Roles.MENTOR, "petr")
+
+    assert isinstance(principal, Mentor)
+    assert (principal.id, principal.university, principal.avatar_uuid) == (2, "ВШЭ", None)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_principal_deletes_snapshot(redis):
+    await invalidate_principal(Roles.MENTOR, "petr")
+    await invalidate_principal(Roles.MENTOR, None)
+
+    redis.delete_cache.assert_awaited_once_with("principal:mentor:petr")
@@ -0,0 +1,225 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.services.redis_service import MENTORS_POOL, USERS_POOL, RedisService
+
+
+@pytest.fixture
+def service():
+    service = RedisService()
+    service.redis_client = AsyncMock()
+    return service
+
+
+def test_ranking_cache_key_is_stable(service):
+    filters = {"target_universities": ["МГУ", "ВШЭ"], "admission_type": "ЕГЭ"}
+
+    first = service.generate_ranking_cache_key(MENTORS_POOL, 3, "Люблю математику", filters)
+    second = service.generate_ranking_cache_key(MENTORS_POOL, 3, "Люблю математику", dict(filters))
+
+    assert first == second
+    assert first.startswith("feed:ranking:mentors:3:")
+
+
+def test_ranking_cache_key_changes_with_generation_and_filters(service):
+    base = service.generate_ranking_cache_key(USERS_POOL, 1, "Описание")
+
+    assert base.endswith(":all")
+    assert service.generate_ranking_cache_key(USERS_POOL, 2, "Описание") != base
+    assert service.generate_ranking_cache_key(USERS_POOL, 1, "Описание", {"university": "МГУ"}) != base
+
+
+@pytest.mark.asyncio
+async def test_get_generation(service):
+    service.redis_client.get.return_value = "5"
+
+    assert await service.get_generation(MENTORS_POOL) == 5
+    service.redis_client.get.assert_called_once_with("feed:generation:mentors")
+
+
+@pytest.mark.asyncio
+async def test_get_generation_redis_unavailable(service):
+    service.redis_client.get.side_effect = ConnectionError()
+
+    assert await service.get_generation(USERS_POOL) == 0
+
+
+@pytest.mark.asyncio
+async def test_bump_generation(service):
+    assert await service.bump_generation(USERS_POOL) is True
+    service.redis_client.incr.assert_called_once_with("feed:generation:users")
+
+
+@pytest.mark.asyncio
+async def test_get_active_viewers(service):
+    service.redis_client.zrevrangebyscore.return_value = [("7", 200.0), ("3", 100.0)]
+
+    assert await service.get_active_viewers(USERS_POOL, 50.0, 10) == [(7, 200.0), (3, 100.0)]
+    service.redis_client.zrevrangebyscore.assert_called_once_with(
+        "feed:active:users", "+inf", 50.0, start=0, num=10, withscores=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_cache_is_served_from_local_cache(service):
+    service.redis_client.get.return_value = '{"ids": [1, 2]}'
+
+    assert await service.get_cache("feed:ranking:users:1:x:all") == {"ids": [1, 2]}
+    assert await service.get_cache("feed:ranking:users:1:x:all") == {"ids": [1, 2]}
+    service.redis_client.get.assert_called_once()
+    assert service.local_cache_stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_set_cache_fills_local_cache(service):
+    assert await service.set_cache("key", {"ids": [3]}) is True
+
+    assert await service.get_cache("key") == {"ids": [3]}
+    service.redis_client.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_generation_is_cached_until_bumped(service):
+    service.redis_client.get.return_value = "5"
+    assert await service.get_generation(USERS_POOL) == 5
+    assert await service.get_generation(USERS_POOL) == 5
+    service.redis_client.get.assert_called_once()
+
+    await service.bump_generation(USERS_POOL)
+    service.redis_client.get.return_value = "6"
+
+    assert await service.get_generation(USERS_POOL) == 6
+    service.redis_client.publish.assert_called_once_with(
+        "cache:invalidate", '["feed:generation:users", "feed:ranking:users:"]'
+    )
+
+
+class FakeRedis:
+    """Счетчики поколений в памяти; flush имитирует сброс Redis"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        value = self.data.get(key)
+        return None if value is None else str(value).encode()
+
+    async def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = int(value)
+        return True
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def incr(self, key):
+        self.data[key] = self.data.get(key, 0) + 1
+        return self.data[key]
+
+    async def publish(self, channel, message):
+        return 0
+
+    def flush(self):
+        self.data.clear()
+
+
+@pytest.mark.asyncio
+async def test_generation_survives_redis_flush(service):
+    service.redis_client = FakeRedis()
+    stored_generation = AsyncMock(return_value=0)
+    service.generation_seeds[USERS_POOL] = stored_generation
+    for _ in range(3):
+        await service.bump_generation(USERS_POOL)
+    assert await service.get_generation(USERS_POOL) == 3
+
+    # Ранжирования третьего поколения сохранены в Postgres
+    stored_generation.return_value = 3
+    service.redis_client.flush()
+    service.evict_local("feed:generation:")
+
+    assert await service.get_generation(USERS_POOL) == 3
+    await service.bump_generation(USERS_POOL)
+    assert await service.get_generation(USERS_POOL) == 4
+
+
+@pytest.mark.asyncio
+async def test_bump_after_redis_flush_continues_from_stored_generation(service):
+    service.redis_client = FakeRedis()
+    service.generation_seeds[MENTORS_POOL] = AsyncMock(return_value=7)
+
+    await service.bump_generation(MENTORS_POOL)
+
+    assert await service.get_generation(MENTORS_POOL) == 8
+
+
+@pytest.mark.asyncio
+async def test_generation_seed_failure_starts_from_zero(service):
+    service.redis_client = FakeRedis()
+    service.generation_seeds[MENTORS_POOL] = AsyncMock(side_effect=ConnectionError())
+
+    assert await service.get_generation(MENTORS_POOL) == 0
+
+
+@pytest.mark.asyncio
+async def test_value_read_before_invalidation_is_not_cached(service):
+    async def get(key):
+        # Инвалидация приходит, пока запрос к Redis в полете
+        service.evict_local("feed:generation:")
+        return "5"
+
+    service.redis_client.get.side_effect = get
+
+    assert await service.get_generation(MENTORS_POOL) == 5
+    assert await service.get_generation(MENTORS_POOL) == 5
+    assert service.redis_client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_listener_evicts_published_prefixes(service):
+    class FakePubSub:
+        async def subscribe(self, channel):
+            assert channel == "cache:invalidate"
+
+        async def listen(self):
+            # L1 очищается при подписке, поэтому наполняем его уже после нее
+            service.local_cache.set("feed:ranking:mentors:1:x:all", [2])
+            service.local_cache.set("feed:ranking:users:1:x:all", [1])
+            yield {"type": "subscribe", "data": 1}
+            yield {"type": "message", "data": '["feed:ranking:mentors:"]'}
+            raise asyncio.CancelledError
+
+        async def aclose(self):
+            pass
+
+    service.redis_client.pubsub = FakePubSub
+
+    with pytest.raises(asyncio.CancelledError):
+        await service.listen_invalidations()
+
+    assert service.local_cache.get("feed:ranking:mentors:1:x:all") is None
+    assert service.local_cache.get("feed:ranking:users:1:x:all") == [1]
+
+
+@pytest.mark.asyncio
+async def test_cache_values_are_stored_encoded(service):
+    await service.set_cache("key", {"ids": [1, 2], "total": 2})
+    stored = service.redis_client.setex.call_args.args[2]
+    service.local_cache.clear()
+    service.redis_client.get.return_value = stored
+
+    assert isinstance(stored, bytes)
+    assert await service.get_cache("key") == {"ids": [1, 2], "total": 2}
+
+
+@pytest.mark.asyncio
+async def test_delete_cache_removes_key_everywhere(service):
+    await service.set_cache("principal:user:ivan", {"id": 1})
+
+    assert await service.delete_cache("principal:user:ivan") is True
+
+    service.redis_client.delete.assert_called_once_with("principal:user:ivan")
+    service.redis_client.publish.assert_called_once()
+    assert service.local_cache.get("principal:user:ivan") is None
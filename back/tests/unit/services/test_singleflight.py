@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.services.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_same_key_runs_once():
+    singleflight = SingleFlight()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    results = await asyncio.gather(*[singleflight.do("key", compute) for _ in range(10)])
+
+    assert results == [1] * 10
+    assert calls == 1
+    assert singleflight.stats() == {"in_flight": 0, "executions_total": 1, "coalesced_total": 9}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_run_separately():
+    singleflight = SingleFlight()
+
+    async def compute(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        singleflight.do("a", lambda: compute("a")),
+        singleflight.do("b", lambda: compute("b")),
+    )
+
+    assert results == ["a", "b"]
+    assert singleflight.executions_total == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    singleflight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        singleflight.do("key", failing), singleflight.do("key", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def ok():
+        return "ok"
+
+    assert await singleflight.do("key", ok) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_distributed_lock_holder_computes():
+    redis_service = MagicMock()
+    lock = MagicMock()
+    redis_service.acquire_lock = AsyncMock(return_value=lock)
+    redis_service.release_lock = AsyncMock()
+    singleflight = SingleFlight(redis_service, lock_timeout=1, poll_interval=0.001)
+
+    assert await singleflight.do("key", AsyncMock(return_value=42)) == 42
+    redis_service.release_lock.assert_called_once_with(lock)
+
+
+@pytest.mark.asyncio
+async def test_distributed_waits_for_other_worker_result():
+    redis_service = MagicMock()
+    redis_service.acquire_lock = AsyncMock(return_value=None)
+    redis_service.get_cache = AsyncMock(side_effect=[None, {"ids": [1]}])
+    redis_service.is_locked = AsyncMock(return_value=True)
+    singleflight = SingleFlight(redis_service, lock_timeout=1, poll_interval=0.001)
+    compute = AsyncMock()
+
+    assert await singleflight.do("key", compute) == {"ids": [1]}
+    compute.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_distributed_computes_when_lock_released_without_result():
+    redis_service = MagicMock()
+    redis_service.acquire_lock = AsyncMock(return_value=None)
+    redis_service.get_cache = AsyncMock(return_value=None)
+    redis_service.is_locked = AsyncMock(return_value=False)
+    singleflight = SingleFlight(redis_service, lock_timeout=1, poll_interval=0.001)
+
+    assert await singleflight.do("key", AsyncMock(return_value="fresh")) == "fresh"
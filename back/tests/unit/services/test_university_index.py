@@ -0,0 +1,108 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from src.services.redis_service import UNIVERSITIES_POOL
+from src.services.university_index import UniversityIndex
+
+UNIVERSITIES = [
+    (1, "МГУ", "mgu"),
+    (2, "ВШЭ", "vshe"),
+    (3, "Московский авиационный институт", "moskovskii aviatsionnyi institut"),
+]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def redis():
+    with patch("src.services.university_index.redis_service") as mock_redis:
+        mock_redis.get_generation = AsyncMock(return_value=1)
+        mock_redis.bump_generation = AsyncMock(return_value=True)
+        yield mock_redis
+
+
+@pytest.fixture
+def list_universities():
+    with patch(
+        "src.services.university_index.list_universities", new_callable=AsyncMock, return_value=UNIVERSITIES
+    ) as mock_list:
+        yield mock_list
+
+
+def test_lookup_matches_prefixes_in_both_scripts_and_aliases(clock):
+    index = UniversityIndex(clock=clock)
+    index.build(UNIVERSITIES)
+
+    assert index.lookup("мг", 10) == [(1, "МГУ")]
+    assert index.lookup("MG", 10) == [(1, "МГУ")]
+    assert index.lookup("hse", 10) == [(2, "ВШЭ")]
+    assert index.lookup("физ", 10) == []
+
+
+def test_lookup_ranks_name_start_before_inner_words(clock):
+    index = UniversityIndex(clock=clock)
+    index.build(UNIVERSITIES)
+
+    # «Московский государственный университет» — синоним МГУ
+    assert index.lookup("моск", 10) == [(1, "МГУ"), (3, "Московский авиационный институт")]
+    assert index.lookup("институт", 10) == [(3, "Московский авиационный институт")]
+    assert index.lookup("моск", 1) == [(1, "МГУ")]
+
+
+@pytest.mark.asyncio
+async def test_search_reloads_only_when_generation_changes(clock, redis, list_universities):
+    index = UniversityIndex(refresh_interval=300, clock=clock)
+
+    assert await index.search("вшэ", 5) == [(2, "ВШЭ")]
+    await index.search("мгу", 5)
+    assert list_universities.await_count == 1
+
+    redis.get_generation.return_value = 2
+    await index.search("мгу", 5)
+    assert list_universities.await_count == 2
+    redis.get_generation.assert_awaited_with(UNIVERSITIES_POOL)
+
+
+@pytest.mark.asyncio
+async def test_search_reloads_after_refresh_interval(clock, redis, list_universities):
+    index = UniversityIndex(refresh_interval=300, clock=clock)
+    await index.search("мгу", 5)
+
+    clock.now = 301
+    await index.search("мгу", 5)
+
+    assert list_universities.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_search_keeps_previous_index_when_database_fails(clock, redis, list_universities):
+    index = UniversityIndex(refresh_interval=300, clock=clock)
+    await index.search("мгу", 5)
+
+    list_universities.side_effect = Exception("database unavailable")
+    redis.get_generation.return_value = 2
+
+    assert await index.search("мгу", 5) == [(1, "МГУ")]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_bumps_generation_and_reloads(clock, redis, list_universities):
+    index = UniversityIndex(refresh_interval=300, clock=clock)
+    await index.search("мгу", 5)
+
+    await index.invalidate()
+    await index.search("мгу", 5)
+
+    redis.bump_generation.assert_awaited_once_with(UNIVERSITIES_POOL)
+    assert list_universities.await_count == 2
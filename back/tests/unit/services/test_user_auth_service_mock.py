@@ -62,6 +62,25 @@ def mock_db_functions(mock_session_scope):
             'update_profile': mock_update
         }
 
+# Mock cache invalidation and feed precompute so the tests don't reach Redis
+@pytest.fixture(autouse=True)
+def mock_side_effects():
+    with patch('src.services.user_auth_service.redis_service') as mock_redis, \
+         patch('src.services.user_auth_service.feed_precompute_worker') as mock_worker, \
+         patch('src.services.user_auth_service.invalidate_principal', new_callable=AsyncMock) as mock_invalidate, \
+         patch('src.services.user_auth_service.university_index') as mock_index:
+
+        mock_redis.bump_generation = AsyncMock()
+        mock_worker.notify_user_changed = AsyncMock()
+        mock_index.invalidate = AsyncMock()
+
+        yield {
+            'redis_service': mock_redis,
+            'feed_precompute_worker': mock_worker,
+            'invalidate_principal': mock_invalidate,
+            'university_index': mock_index,
+        }
+
 # Override the password validator for testing
 @pytest.fixture(autouse=True)
 def mock_password_validator():
@@ -106,7 +125,7 @@ async def test_register_user_success():
     user_data = UserCreationSchema(name="Test User", password="password123")
     
     with patch('src.services.user_auth_service.generate_unique_login', new_callable=AsyncMock) as mock_generate_login, \
-         patch('src.services.user_auth_service.get_password_hash') as mock_hash, \
+         patch('src.services.user_auth_service.hash_password', new_callable=AsyncMock) as mock_hash, \
          patch('src.repository.user_repository.create_user', new_callable=AsyncMock) as mock_create, \
          patch('src.repository.user_repository.get_user_by_login', new_callable=AsyncMock) as mock_get, \
          patch('src.services.user_auth_service.create_access_token') as mock_token:
@@ -131,7 +150,7 @@ async def test_register_user_failure():
     user_data = UserCreationSchema(name="Test User", password="password123")
     
     with patch('src.services.user_auth_service.generate_unique_login', new_callable=AsyncMock) as mock_generate_login, \
-         patch('src.services.user_auth_service.get_password_hash') as mock_hash, \
+         patch('src.services.user_auth_service.hash_password', new_callable=AsyncMock) as mock_hash, \
          patch('src.repository.user_repository.create_user', new_callable=AsyncMock) as mock_create:
         
         mock_generate_login.return_value = "test_user"
@@ -148,7 +167,7 @@ async def test_register_user_failure():
 @pytest.mark.asyncio
 async def test_authenticate_user_success():
     with patch('src.repository.user_repository.get_user_by_login', new_callable=AsyncMock) as mock_get_user, \
-         patch('src.services.user_auth_service.verify_password') as mock_verify, \
+         patch('src.services.user_auth_service.check_password', new_callable=AsyncMock) as mock_verify, \
          patch('src.services.user_auth_service.create_access_token') as mock_token:
         
         mock_user = MagicMock()
@@ -156,7 +175,7 @@ async def test_authenticate_user_success():
         mock_user.password_hash = "hashed_password"
         
         mock_get_user.return_value = mock_user
-        mock_verify.return_value = True
+        mock_verify.return_value = (True, None)
         mock_token.return_value = "test_token"
         
         result = await authenticate_user("test_user", "password123")
@@ -176,17 +195,40 @@ async def test_authenticate_user_invalid_login():
         assert result is False
         mock_get_user.assert_called_once_with("invalid_user")
 
+@pytest.mark.asyncio
+async def test_authenticate_user_rehashes_outdated_hash():
+    with patch('src.repository.user_repository.get_user_by_login', new_callable=AsyncMock) as mock_get_user, \
+         patch('src.repository.user_repository.update_user_password_hash', new_callable=AsyncMock) as mock_rehash, \
+         patch('src.services.user_auth_service.check_password', new_callable=AsyncMock) as mock_verify, \
+         patch('src.services.user_auth_service.create_access_token') as mock_token:
+
+        mock_user = MagicMock()
+        mock_user.id = 1
+        mock_user.login = "test_user"
+        mock_user.password_hash = "old_hash"
+
+        mock_get_user.return_value = mock_user
+        mock_verify.return_value = (True, "new_hash")
+        mock_rehash.side_effect = Exception("DB error")
+        mock_token.return_value = "test_token"
+
+        result = await authenticate_user("test_user", "password123")
+
+        # Ошибка сохранения нового хеша не мешает входу
+        assert result == {"access_token": "test_token", "token_type": "bearer"}
+        mock_rehash.assert_called_once_with(1, "new_hash")
+
 @pytest.mark.asyncio
 async def test_authenticate_user_invalid_password():
     with patch('src.repository.user_repository.get_user_by_login', new_callable=AsyncMock) as mock_get_user, \
-         patch('src.services.user_auth_service.verify_password') as mock_verify:
+         patch('src.services.user_auth_service.check_password', new_callable=AsyncMock) as mock_verify:
         
         mock_user = MagicMock()
         mock_user.login = "test_user"
         mock_user.password_hash = "hashed_password"
         
         mock_get_user.return_value = mock_user
-        mock_verify.return_value = False
+        mock_verify.return_value = (False, None)
         
         result = await authenticate_user("test_user", "wrong_password")
         
@@ -215,13 +257,13 @@ async def test_update_user_profile_success():
         mock_update.assert_called_once()
 
 @pytest.mark.asyncio
-async def test_update_user_profile_with_password():
+async def test_update_user_profile_with_password(mock_side_effects):
     user_id = 1
     # Use a password that meets the complexity requirements
     update_data = UserUpdateSchema(password="newPassword123!")
     
     with patch('src.repository.user_repository.update_user_profile', new_callable=AsyncMock) as mock_update, \
-         patch('src.services.user_auth_service.get_password_hash') as mock_hash, \
+         patch('src.services.user_auth_service.hash_password', new_callable=AsyncMock) as mock_hash, \
          patch('src.schemas.schemas.UserUpdateSchema.password_complexity', return_value=True):
         
         mock_hash.return_value = "new_hashed_password"
@@ -236,6 +278,8 @@ async def test_update_user_profile_with_password():
         update_dict = mock_update.call_args[0][1]
         assert "password" not in update_dict
         assert update_dict["password_hash"] == "new_hashed_password"
+        # Смена пароля не запускает пересчет фидов
+        mock_side_effects['feed_precompute_worker'].notify_user_changed.assert_not_called()
 
 @pytest.mark.asyncio
 async def test_update_user_profile_user_not_found():
@@ -268,4 +312,22 @@ async def test_update_user_profile_email_conflict():
         
         assert exc_info.value.status_code == 400
         assert exc_info.value.detail == "Email уже используется другим пользователем"
-        mock_get_by_email.assert_called_once_with("existing@example.com")
\ No newline at end of file
+        mock_get_by_email.assert_called_once_with("existing@example.com")
+@pytest.mark.asyncio
+async def test_update_user_profile_contacts_keep_rankings(mock_side_effects):
+    update_data = UserUpdateSchema(name="Updated Name", email="updated@example.com")
+
+    await update_user_profile_service(1, update_data)
+
+    mock_side_effects['redis_service'].bump_generation.assert_not_called()
+    mock_side_effects['feed_precompute_worker'].notify_user_changed.assert_not_called()
+    mock_side_effects['invalidate_principal'].assert_called_once()
+
+@pytest.mark.asyncio
+async def test_update_user_profile_description_invalidates_rankings(mock_side_effects):
+    update_data = UserUpdateSchema(description="Готовлюсь к олимпиадам по информатике")
+
+    await update_user_profile_service(1, update_data)
+
+    mock_side_effects['redis_service'].bump_generation.assert_called_once_with("users")
+    mock_side_effects['feed_precompute_worker'].notify_user_changed.assert_called_once_with(1)